@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -37,10 +39,13 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'club',
 ]
 
 MIDDLEWARE = [
+    # En premier : la latence mesurée inclut les autres middlewares
+    'club.middleware.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -48,21 +53,32 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'club.middleware.RepliqueMiddleware',
 ]
 
 ROOT_URLCONF = 'asi_club.urls'
 
+CHARGEURS_GABARITS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates, avec mesure du temps de rendu (club/metriques.py)
+        'BACKEND': 'club.metriques.DjangoTemplatesInstrumentes',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # En production, chaque gabarit n'est lu et compilé qu'une fois par
+            # processus ; en développement, relu à chaque rendu.
+            'loaders': CHARGEURS_GABARITS if DEBUG else [
+                ('django.template.loaders.cached.Loader', CHARGEURS_GABARITS),
+            ],
         },
     },
 ]
@@ -73,6 +89,33 @@ WSGI_APPLICATION = 'asi_club.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+# Connexions : ASI_DB_CONNEXIONS = 'persistantes' (défaut : gardées
+# ASI_DB_CONN_MAX_AGE secondes et vérifiées avant réutilisation), 'pool'
+# (pool psycopg, nécessite psycopg[pool] ; à préférer sous ASGI, où les
+# connexions persistantes ne sont pas réutilisées) ou 'aucune'.
+# ASI_DB_REPLIQUE_HOST : serveur PostgreSQL en lecture seule (alias 'replica')
+# pour les pages publiques, voir club/replique.py.
+
+MODES_CONNEXION = {
+    'persistantes': {
+        'CONN_MAX_AGE': int(os.environ.get('ASI_DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+    },
+    'pool': {
+        'CONN_MAX_AGE': 0,
+        'OPTIONS': {
+            'pool': {
+                'min_size': int(os.environ.get('ASI_DB_POOL_MIN', 2)),
+                'max_size': int(os.environ.get('ASI_DB_POOL_MAX', 10)),
+                'timeout': 10,
+            },
+        },
+    },
+    'aucune': {
+        'CONN_MAX_AGE': 0,
+    },
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -81,9 +124,97 @@ DATABASES = {
         'PASSWORD': 'root',
         'HOST': 'localhost',
         'PORT': '5432',
+        **MODES_CONNEXION[os.environ.get('ASI_DB_CONNEXIONS', 'persistantes')],
+    }
+}
+
+if os.environ.get('ASI_DB_REPLIQUE_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.environ['ASI_DB_REPLIQUE_HOST'],
+        'PORT': os.environ.get('ASI_DB_REPLIQUE_PORT', DATABASES['default']['PORT']),
+        # Les tests lisent la base de test du primaire
+        'TEST': {'MIRROR': 'default'},
     }
+
+DATABASE_ROUTERS = ['club.replique.RouteurReplique']
+
+REPLIQUE = {
+    'ALIAS': 'replica',
+    # Secondes pendant lesquelles on relit le primaire après une écriture
+    'DELAI_COLLANT': int(os.environ.get('ASI_DB_REPLIQUE_DELAI', 10)),
+    'COOKIE': 'asi_primaire',
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# ASI_CACHE_BACKEND : 'locmem' (défaut), 'file' ou 'redis' (Redis ou serveur
+# compatible : Valkey, KeyDB...).
+
+CACHES_DISPONIBLES = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'asi-club',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('ASI_CACHE_DIR', str(BASE_DIR / '.cache')),
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('ASI_REDIS_URL', 'redis://127.0.0.1:6379/1'),
+    },
+}
+
+CACHES = {
+    'default': CACHES_DISPONIBLES[os.environ.get('ASI_CACHE_BACKEND', 'locmem')],
+}
+
+# Durée de vie (secondes) des pages publiques en cache ; l'invalidation
+# se fait par signaux, cette durée n'est qu'un garde-fou.
+CACHE_PAGES_DUREE = 60 * 60
+
+
+# Scores en direct (SSE)
+# Broker de diffusion : le broker en mémoire suffit pour un seul processus ASGI.
+
+LIVE_SCORES_BROKER = 'club.live.BrokerEnMemoire'
+
+
+# Métriques (club/metriques.py) exposées sur /metrics/ au staff ou avec
+# « Authorization: Bearer <ASI_METRIQUES_JETON> ». ASI_METRIQUES_IPS (adresses
+# séparées par des virgules) n'a de sens que sans proxy devant Django.
+# Par défaut, une requête sur dix est instrumentée (ASI_METRIQUES_ECHANTILLONNAGE=1
+# pour toutes).
+
+METRIQUES = {
+    'ACTIVE': True,
+    'ECHANTILLONNAGE': float(os.environ.get('ASI_METRIQUES_ECHANTILLONNAGE', '0.1')),
+    'SEUIL_LENT_MS': 500,
+    'JETON': os.environ.get('ASI_METRIQUES_JETON'),
+    'IPS_AUTORISEES': [ip for ip in os.environ.get('ASI_METRIQUES_IPS', '').split(',') if ip],
 }
 
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        # Les requêtes lentes sont déjà sérialisées en JSON par le middleware
+        'brut': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'metriques': {'class': 'logging.StreamHandler', 'formatter': 'brut'},
+    },
+    'loggers': {
+        'club.metriques': {'handlers': ['metriques'], 'level': 'WARNING', 'propagate': False},
+    },
+}
+
+if sys.argv[1:2] == ['test']:
+    # Requêtes lentes non journalisées pendant les tests (assertLogs les capte quand même)
+    LOGGING['loggers']['club.metriques']['level'] = 'CRITICAL'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -120,3 +251,50 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = os.environ.get('ASI_STATIC_ROOT', str(BASE_DIR / 'staticfiles'))
+
+# En production, collectstatic purge/minifie les fichiers du club, les nomme
+# d'après leur contenu et écrit les variantes .gz/.br (club/statiques.py) :
+# STATIC_URL peut alors être servi avec un cache d'un an.
+STOCKAGES_STATIQUES = {
+    'simple': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    'optimise': 'club.statiques.StockageStatiques',
+}
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': STOCKAGES_STATIQUES[os.environ.get('ASI_STOCKAGE_STATIQUES', 'simple' if DEBUG else 'optimise')],
+    },
+}
+
+# Médias : variantes d'images générées par `generer_images` (club/images.py),
+# nommées d'après le contenu de la source (cache d'un an possible).
+MEDIA_URL = 'media/'
+MEDIA_ROOT = os.environ.get('ASI_MEDIA_ROOT', str(BASE_DIR / 'media'))
+
+IMAGES = {
+    'LARGEURS': [160, 320, 640, 960, 1280],
+    'FORMATS': ['webp', 'jpeg'],
+    'QUALITE': {'webp': 78, 'jpeg': 80},
+    'SOURCES': 'assets/img',
+}
+
+STATIQUES = {
+    # Classes posées par le JavaScript (Bootstrap, js/scripts.js) : jamais purgées
+    'LISTE_BLANCHE': [
+        'active', 'show', 'showing', 'hiding', 'fade', 'collapse', 'collapsing', 'collapse-horizontal',
+        'modal-open', 'modal-backdrop', 'modal-static', 'dropdown-menu-end', 'was-validated',
+        'is-valid', 'is-invalid', 'navbar-shrink', 'carousel-item-next', 'carousel-item-prev',
+        'carousel-item-start', 'carousel-item-end',
+    ],
+    'CRITIQUE': {
+        'css/agency.css': ['index.html'],
+    },
+    'POLICES': [
+        'https://fonts.googleapis.com/css2?family=Montserrat:wght@400;700&family=Roboto+Slab:wght@100;300;400;700&display=swap',
+        'https://cdn.jsdelivr.net/npm/@fortawesome/fontawesome-free@6.3.0/css/all.min.css',
+    ],
+}
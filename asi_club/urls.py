@@ -1,10 +1,15 @@
 """
 URL configuration for asi_club project.
 """
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('club.urls')),  # Inclure les URLs de l'application club
-]
\ No newline at end of file
+]
+
+# En développement, variantes d'images (club/images.py) servies par Django
+urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -1,8 +1,108 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.http import StreamingHttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from .exportation import FORMATS, exporter, flux_reponse, lignes_joueurs, lignes_matchs
+from .importation import ErreurImport, importer, lire_lignes
+from .pagination import PaginateurEstime
+from .recherche import filtrer
 from .models import (
-    CategoryGenre, CategoryAge, Saison, Joueur, ChampionnatCompetition, EquipeAdverse, MatchDay, MatchDayEquipeAdverse, PalmaresClub
+    CategoryGenre, CategoryAge, Saison, Joueur, ChampionnatCompetition, EquipeAdverse, MatchDay, MatchDayEquipeAdverse, PalmaresClub,
+    Classement
 )
 
+# ==================== IMPORT DE FICHIERS ====================
+
+class ImportFichierForm(forms.Form):
+    fichier = forms.FileField(label='Fichier CSV ou XLSX')
+    strict = forms.BooleanField(
+        required=False,
+        label="S'arrêter à la première ligne invalide et tout annuler"
+    )
+
+
+class ImportFichierMixin:
+    """Ajoute une page « Importer un fichier » à la liste de l'admin"""
+    type_import = None
+    change_list_template = 'admin/club/change_list_import.html'
+    nombre_erreurs_affichees = 20
+
+    def get_urls(self):
+        info = self.opts.app_label, self.opts.model_name
+        return [
+            path('importer/', self.admin_site.admin_view(self.importer_view), name='%s_%s_importer' % info),
+        ] + super().get_urls()
+
+    def importer_view(self, request):
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+
+        form = ImportFichierForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            fichier = form.cleaned_data['fichier']
+            try:
+                rapport = importer(
+                    lire_lignes(fichier, fichier.name),
+                    self.type_import,
+                    strict=form.cleaned_data['strict'],
+                )
+            except ErreurImport as erreur:
+                self.message_user(request, str(erreur), messages.ERROR)
+            else:
+                niveau = messages.WARNING if rapport.erreurs else messages.SUCCESS
+                self.message_user(request, str(rapport), niveau)
+                for numero, message in rapport.erreurs[:self.nombre_erreurs_affichees]:
+                    self.message_user(request, f"Ligne {numero} : {message}", messages.WARNING)
+                info = self.opts.app_label, self.opts.model_name
+                return redirect(reverse('admin:%s_%s_changelist' % info))
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.opts,
+            'form': form,
+            'title': f"Importer des {self.opts.verbose_name_plural.lower()}",
+        }
+        return TemplateResponse(request, 'admin/club/importer.html', context)
+
+
+# ==================== EXPORT ====================
+
+def _reponse_export(request, lignes, format_export, nom_fichier):
+    response = StreamingHttpResponse(
+        flux_reponse(request, exporter(lignes, format_export)), content_type=FORMATS[format_export]
+    )
+    response['Content-Disposition'] = f'attachment; filename="{nom_fichier}.{format_export}"'
+    return response
+
+
+@admin.action(description="Exporter la sélection (CSV)")
+def exporter_csv(modeladmin, request, queryset):
+    return _reponse_export(request, modeladmin.lignes_export(queryset), 'csv', modeladmin.opts.model_name)
+
+
+@admin.action(description="Exporter la sélection (JSON Lines)")
+def exporter_jsonl(modeladmin, request, queryset):
+    return _reponse_export(request, modeladmin.lignes_export(queryset), 'jsonl', modeladmin.opts.model_name)
+
+
+# ==================== RECHERCHE ====================
+
+class RechercheMixin:
+    """Recherche de l'admin (et de l'autocomplétion) par les index plein texte et trigrammes.
+
+    `search_fields` reste déclaré pour afficher le champ de recherche, mais
+    n'est plus parcouru en ILIKE.
+    """
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return filtrer(queryset, search_term), False
+
+
 # ==================== CATÉGORIES ====================
 
 @admin.register(CategoryGenre)
@@ -26,12 +126,36 @@ class SaisonAdmin(admin.ModelAdmin):
     
 # ==================== JOUEURS ====================
 
+class TrancheAgeFilter(admin.SimpleListFilter):
+    """Filtre sur l'âge réel (calculé en SQL) selon les tranches des catégories d'âge"""
+    title = "tranche d'âge réelle"
+    parameter_name = 'tranche_age'
+
+    def lookups(self, request, model_admin):
+        return [(categorie.pk, str(categorie)) for categorie in CategoryAge.objects.all()]
+
+    def queryset(self, request, queryset):
+        if self.value() is None:
+            return queryset
+        categorie = CategoryAge.objects.filter(pk=self.value()).first()
+        if categorie is None:
+            return queryset.none()
+        return queryset.age_entre(categorie.age_min, categorie.age_max)
+
+
 @admin.register(Joueur)
-class JoueurAdmin(admin.ModelAdmin):
-    list_display = ['prenom', 'nom', 'date_naissance', 'category', 'category_age']
-    list_filter = ['category', 'category_age']
+class JoueurAdmin(RechercheMixin, ImportFichierMixin, admin.ModelAdmin):
+    type_import = 'joueurs'
+    actions = [exporter_csv, exporter_jsonl]
+    lignes_export = staticmethod(lignes_joueurs)
+    list_display = ['prenom', 'nom', 'date_naissance', 'age_revolu', 'category', 'category_age']
+    list_filter = ['category', 'category_age', TrancheAgeFilter]
+    list_select_related = ['category', 'category_age']
     search_fields = ['nom', 'prenom']
-    date_hierarchy = 'date_naissance'
+    # Pas de date_hierarchy : chaque niveau ferait un SELECT DISTINCT sur
+    # toute la table ; le filtre par tranche d'âge couvre ce besoin.
+    paginator = PaginateurEstime
+    show_full_result_count = False
     
     fieldsets = (
         ('Informations personnelles', {
@@ -40,13 +164,24 @@ class JoueurAdmin(admin.ModelAdmin):
         ('Catégories', {
             'fields': ('category', 'category_age')
         }),
+        ('Compte', {
+            'fields': ('utilisateur',)
+        }),
     )
+    autocomplete_fields = ['utilisateur']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).avec_age()
+
+    @admin.display(description='Âge', ordering='age_revolu')
+    def age_revolu(self, obj):
+        return obj.age_revolu
 
 
 # ==================== COMPÉTITIONS ====================
 
 @admin.register(ChampionnatCompetition)
-class ChampionnatCompetitionAdmin(admin.ModelAdmin):
+class ChampionnatCompetitionAdmin(RechercheMixin, admin.ModelAdmin):
     list_display = ['nom', 'date_champ', 'lieu_deroulement', 'category_age', 'category_genre']
     list_filter = ['category_age', 'category_genre', 'date_champ']
     search_fields = ['nom', 'lieu_deroulement']
@@ -56,7 +191,7 @@ class ChampionnatCompetitionAdmin(admin.ModelAdmin):
 # ==================== ÉQUIPES ====================
 
 @admin.register(EquipeAdverse)
-class EquipeAdverseAdmin(admin.ModelAdmin):
+class EquipeAdverseAdmin(RechercheMixin, admin.ModelAdmin):
     list_display = ['nom', 'category_genre', 'category_age']
     list_filter = ['category_genre', 'category_age']
     search_fields = ['nom']
@@ -67,14 +202,23 @@ class EquipeAdverseAdmin(admin.ModelAdmin):
 class MatchDayEquipeAdverseInline(admin.TabularInline):
     model = MatchDayEquipeAdverse
     extra = 1
+    autocomplete_fields = ['equipe_adverse']
 
 
 @admin.register(MatchDay)
-class MatchDayAdmin(admin.ModelAdmin):
+class MatchDayAdmin(ImportFichierMixin, admin.ModelAdmin):
+    type_import = 'matchs'
+    actions = [exporter_csv, exporter_jsonl]
+    lignes_export = staticmethod(lignes_matchs)
     list_display = ['date_rencontre', 'lieu_rencontre', 'championnat', 'saison', 'sets_club', 'sets_adverse', 'score_detaille', 'resultat']
-    list_filter = ['saison', 'championnat', 'date_rencontre']
+    list_filter = ['saison', 'issue', 'a_verifier', 'championnat', 'date_rencontre']
+    list_select_related = ['championnat', 'saison']
     search_fields = ['lieu_rencontre']
-    date_hierarchy = 'date_rencontre'
+    # Pas de date_hierarchy (SELECT DISTINCT sur toute la table à chaque
+    # niveau) : le filtre sur date_rencontre ne fait aucune requête.
+    paginator = PaginateurEstime
+    show_full_result_count = False
+    autocomplete_fields = ['championnat', 'saison']
     inlines = [MatchDayEquipeAdverseInline]
     
     fieldsets = (
@@ -82,8 +226,8 @@ class MatchDayAdmin(admin.ModelAdmin):
             'fields': ('date_rencontre', 'lieu_rencontre', 'championnat', 'saison')
         }),
         ('Résultat global', {
-            'fields': ('sets_club', 'sets_adverse'),
-            'description': 'Nombre de sets gagnés (le premier à 3 gagne)'
+            'fields': ('sets_club', 'sets_adverse', 'a_verifier'),
+            'description': 'Nombre de sets gagnés (le premier à 3 gagne), déduit des sets terminés si laissé vide'
         }),
         ('Set 1', {
             'fields': ('set1_club', 'set1_adverse'),
@@ -107,11 +251,31 @@ class MatchDayAdmin(admin.ModelAdmin):
         }),
     )
 
+    @admin.display(description='Résultat', ordering='issue')
+    def resultat(self, obj):
+        return obj.resultat()
+
+
+# ==================== CLASSEMENTS ====================
+
+@admin.register(Classement)
+class ClassementAdmin(admin.ModelAdmin):
+    """Lecture seule : alimenté par les signaux et `reconstruire_classement`"""
+    list_display = ['championnat', 'saison', 'category_genre', 'category_age', 'matchs_joues', 'victoires', 'defaites', 'sets_gagnes', 'sets_perdus', 'points_gagnes', 'points_perdus']
+    list_filter = ['saison', 'category_genre', 'category_age']
+    list_select_related = ['championnat', 'saison', 'category_genre', 'category_age']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
 
 # ==================== PALMARÈS ====================
 
 @admin.register(PalmaresClub)
-class PalmaresClubAdmin(admin.ModelAdmin):
+class PalmaresClubAdmin(RechercheMixin, admin.ModelAdmin):
     list_display = ['titre', 'competition', 'annee', 'category']
     list_filter = ['category', 'annee']
     search_fields = ['titre', 'competition']
\ No newline at end of file
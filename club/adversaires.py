@@ -0,0 +1,92 @@
+"""
+Bilan face à face contre les équipes adverses.
+
+Les statistiques (victoires, sets, points, par saison) sont calculées par
+agrégation SQL groupée sur les matchs joués, puis mises en cache par
+adversaire. La version de chaque adversaire est incrémentée quand un de
+ses matchs change (voir signals.py) : seul son bilan est recalculé.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+
+from .cache import version_objet, versions_modeles
+from .classement import somme_points
+from .metriques import noter_cache
+from .models import ChampionnatCompetition, EquipeAdverse, MatchDay, Saison
+
+NB_DERNIERS_MATCHS = 5
+
+# Matchs en cours exclus : un 2-1 provisoire n'est ni une victoire ni une
+# défaite (même filtre que MatchDay.objects.termines())
+JOUES = Q(issue__in=MatchDay.TERMINES, a_verifier=False)
+
+STATISTIQUES = {
+    'matchs': Count('id'),
+    'victoires': Count('id', filter=Q(issue=MatchDay.Issue.VICTOIRE)),
+    'sets_gagnes': Sum('sets_club'),
+    'sets_perdus': Sum('sets_adverse'),
+    'points_gagnes': somme_points('club'),
+    'points_perdus': somme_points('adverse'),
+}
+
+
+def _ratio(pour, contre):
+    if not contre:
+        return None
+    return round(pour / contre, 2)
+
+
+def _completer(ligne):
+    """Ajoute défaites et ratios à une ligne d'agrégats"""
+    ligne['defaites'] = ligne['matchs'] - ligne['victoires']
+    ligne['ratio_sets'] = _ratio(ligne['sets_gagnes'] or 0, ligne['sets_perdus'] or 0)
+    ligne['ratio_points'] = _ratio(ligne['points_gagnes'] or 0, ligne['points_perdus'] or 0)
+    return ligne
+
+
+def calculer_bilan(equipe_id, nb_derniers=NB_DERNIERS_MATCHS):
+    """Bilan contre un adversaire, en trois requêtes (total, par saison, derniers résultats)"""
+    matchs = MatchDay.objects.filter(JOUES, equipes_adverses=equipe_id).order_by()
+
+    total = _completer(matchs.aggregate(**STATISTIQUES))
+    saisons = [
+        _completer(ligne)
+        for ligne in matchs.values('saison_id', 'saison__periode')
+        .annotate(**STATISTIQUES)
+        .order_by('-saison__periode')
+    ]
+    derniers = list(
+        matchs.order_by('-date_rencontre', '-id')
+        .values('id', 'date_rencontre', 'saison__periode', 'championnat__nom', 'sets_club', 'sets_adverse', 'issue')
+        [:nb_derniers]
+    )
+    for match in derniers:
+        match['victoire'] = match['issue'] == MatchDay.Issue.VICTOIRE
+    return {'total': total, 'saisons': saisons, 'derniers': derniers}
+
+
+def bilan(equipe_id):
+    """Bilan mis en cache ; recalculé seulement si les matchs de cet adversaire ont changé"""
+    versions = versions_modeles([Saison, ChampionnatCompetition]) + [version_objet(EquipeAdverse, equipe_id)]
+    cle = f"bilan_adversaire:{equipe_id}:" + ':'.join(str(version) for version in versions)
+    resultat = cache.get(cle)
+    noter_cache('bilans', resultat is not None)
+    if resultat is None:
+        resultat = calculer_bilan(equipe_id)
+        cache.set(cle, resultat, settings.CACHE_PAGES_DUREE)
+    return resultat
+
+
+def bilans_adversaires():
+    """Bilan global de chaque adversaire rencontré, en une seule requête groupée"""
+    lignes = (
+        MatchDay.objects.filter(JOUES, equipes_adverses__isnull=False)
+        .values('equipes_adverses', 'equipes_adverses__nom')
+        .annotate(**STATISTIQUES)
+        .order_by('equipes_adverses__nom')
+    )
+    return [
+        _completer({'equipe_id': ligne.pop('equipes_adverses'), 'nom': ligne.pop('equipes_adverses__nom'), **ligne})
+        for ligne in lignes
+    ]
@@ -0,0 +1,294 @@
+"""
+API JSON en lecture seule (version 1).
+
+Les réponses sont construites à partir de ``.values()`` (aucune instance de
+modèle), paginées par curseur, et ``?champs=a,b,c`` limite les champs
+renvoyés. ``/api/v1/matches/export/`` diffuse une saison complète en
+streaming sans charger tout le queryset en mémoire. ``/api/v1/recherche/``
+renvoie les résultats classés de la recherche plein texte (club/recherche.py).
+"""
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+
+from . import recherche as moteur_recherche
+from .cache import mise_en_cache
+from .exportation import flux_reponse
+from .models import (
+    CategoryAge, CategoryGenre, ChampionnatCompetition, Classement, EquipeAdverse,
+    MatchDay, MatchDayEquipeAdverse, PalmaresClub, Saison
+)
+from .pagination import paginer_par_curseur
+
+TAILLE_PAGE_DEFAUT = 50
+TAILLE_PAGE_MAX = 200
+TAILLE_LOT_EXPORT = 1000
+
+MODELES_MATCHS = [MatchDay, Saison, CategoryAge, CategoryGenre, ChampionnatCompetition, EquipeAdverse, MatchDayEquipeAdverse]
+
+# Nom public -> chemin ORM
+COLONNES_MATCH = {
+    'id': 'id',
+    'date_rencontre': 'date_rencontre',
+    'lieu': 'lieu_rencontre',
+    'saison': 'saison__periode',
+    'championnat': 'championnat__nom',
+    'genre': 'championnat__category_genre__genre',
+    'categorie_age': 'championnat__category_age__nom',
+    'sets_club': 'sets_club',
+    'sets_adverse': 'sets_adverse',
+    'issue': 'issue',
+    'ecart_points': 'ecart_points',
+}
+COLONNES_SETS = [f'set{i}_{camp}' for i in range(1, 6) for camp in ('club', 'adverse')]
+# Champs calculés : 'sets' (scores par set) et 'adversaires' (noms)
+CHAMPS_MATCH = list(COLONNES_MATCH) + ['sets', 'adversaires']
+
+COLONNES_PALMARES = {
+    'id': 'id',
+    'titre': 'titre',
+    'competition': 'competition',
+    'annee': 'annee',
+    'genre': 'category__genre',
+}
+
+
+class ErreurParametre(ValueError):
+    pass
+
+
+def _erreur(message, status=400):
+    return JsonResponse({'erreur': message}, status=status)
+
+
+def _champs_demandes(request, disponibles):
+    """Champs demandés via ?champs=..., validés contre ``disponibles``"""
+    valeur = request.GET.get('champs')
+    if not valeur:
+        return list(disponibles)
+    champs = [champ.strip() for champ in valeur.split(',') if champ.strip()]
+    inconnus = [champ for champ in champs if champ not in disponibles]
+    if inconnus:
+        raise ErreurParametre(f"Champ(s) inconnu(s) : {', '.join(inconnus)}")
+    return champs
+
+
+def _taille_page(request):
+    try:
+        taille = int(request.GET.get('taille', TAILLE_PAGE_DEFAUT))
+    except ValueError:
+        raise ErreurParametre("Le paramètre 'taille' doit être un entier")
+    return max(1, min(taille, TAILLE_PAGE_MAX))
+
+
+def _url_suivante(request, page):
+    if not page.a_suivante:
+        return None
+    params = request.GET.copy()
+    params['curseur'] = page.curseur_suivant
+    return request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+
+
+# ==================== MATCHS ====================
+
+def _filtrer_matchs(matchs, request):
+    saison = request.GET.get('saison')
+    genre = request.GET.get('genre')
+    if saison:
+        matchs = matchs.filter(saison__periode=saison)
+    if genre:
+        matchs = matchs.filter(championnat__category_genre__genre=genre.upper())
+    return matchs
+
+
+def _values_matchs(matchs, champs):
+    colonnes = {'id', 'date_rencontre'} | {COLONNES_MATCH[c] for c in champs if c in COLONNES_MATCH}
+    if 'sets' in champs:
+        colonnes.update(COLONNES_SETS)
+    return matchs.values(*colonnes)
+
+
+def _serialiser_matchs(lignes, champs):
+    """Transforme un lot de lignes .values() en dicts publics (une requête pour les adversaires)"""
+    adversaires = {}
+    if 'adversaires' in champs:
+        liens = MatchDayEquipeAdverse.objects.filter(
+            match_day_id__in=[ligne['id'] for ligne in lignes]
+        ).values_list('match_day_id', 'equipe_adverse__nom')
+        for match_id, nom in liens:
+            adversaires.setdefault(match_id, []).append(nom)
+
+    for ligne in lignes:
+        match = {}
+        for champ in champs:
+            if champ == 'sets':
+                match['sets'] = [
+                    [ligne[f'set{i}_club'], ligne[f'set{i}_adverse']]
+                    for i in range(1, 6)
+                    if ligne[f'set{i}_club'] is not None and ligne[f'set{i}_adverse'] is not None
+                ]
+            elif champ == 'adversaires':
+                match['adversaires'] = adversaires.get(ligne['id'], [])
+            else:
+                match[champ] = ligne[COLONNES_MATCH[champ]]
+        yield match
+
+
+def _page_matchs(request, matchs):
+    try:
+        champs = _champs_demandes(request, CHAMPS_MATCH)
+        taille = _taille_page(request)
+    except ErreurParametre as erreur:
+        return _erreur(str(erreur))
+
+    page = paginer_par_curseur(_values_matchs(matchs, champs), request.GET.get('curseur'), taille)
+    return JsonResponse({
+        'resultats': list(_serialiser_matchs(page.elements, champs)),
+        'suivant': _url_suivante(request, page),
+    })
+
+
+@mise_en_cache(MODELES_MATCHS, parametres=['saison', 'genre', 'champs', 'taille', 'curseur'])
+def matchs(request):
+    """GET /api/v1/matches/?saison=2024-2025&genre=F"""
+    return _page_matchs(request, _filtrer_matchs(MatchDay.objects.all(), request))
+
+
+@mise_en_cache(MODELES_MATCHS, parametres=['saison', 'champs', 'taille', 'curseur'])
+def matchs_par_categorie(request, genre, age_id):
+    """GET /api/v1/matches/<genre>/<age_id>/"""
+    category_age = get_object_or_404(CategoryAge, id=age_id)
+    category_genre = get_object_or_404(CategoryGenre, genre=genre.upper())
+    matchs = MatchDay.objects.par_categorie(category_age, category_genre)
+    if request.GET.get('saison'):
+        matchs = matchs.filter(saison__periode=request.GET['saison'])
+    return _page_matchs(request, matchs)
+
+
+def _flux_json(lignes, champs):
+    """Tableau JSON produit lot par lot"""
+    encodeur = DjangoJSONEncoder()
+    yield '['
+    premier = True
+    lot = []
+    for ligne in lignes:
+        lot.append(ligne)
+        if len(lot) == TAILLE_LOT_EXPORT:
+            for match in _serialiser_matchs(lot, champs):
+                yield ('' if premier else ',') + encodeur.encode(match)
+                premier = False
+            lot = []
+    for match in _serialiser_matchs(lot, champs):
+        yield ('' if premier else ',') + encodeur.encode(match)
+        premier = False
+    yield ']'
+
+
+def export_matchs(request):
+    """GET /api/v1/matches/export/?saison=2024-2025 : tous les matchs, en streaming"""
+    try:
+        champs = _champs_demandes(request, CHAMPS_MATCH)
+    except ErreurParametre as erreur:
+        return _erreur(str(erreur))
+
+    lignes = (
+        _values_matchs(_filtrer_matchs(MatchDay.objects.all(), request), champs)
+        .order_by('-date_rencontre', '-id')
+        .iterator(chunk_size=TAILLE_LOT_EXPORT)
+    )
+    return StreamingHttpResponse(flux_reponse(request, _flux_json(lignes, champs)), content_type='application/json')
+
+
+# ==================== CLASSEMENTS ====================
+
+@mise_en_cache([Classement, MatchDay, Saison, ChampionnatCompetition, CategoryAge, CategoryGenre], parametres=['saison', 'genre', 'age'])
+def classement(request):
+    """GET /api/v1/standings/?saison=2024-2025&genre=F&age=<id>"""
+    lignes = Classement.objects.all()
+    if request.GET.get('saison'):
+        lignes = lignes.filter(saison__periode=request.GET['saison'])
+    if request.GET.get('genre'):
+        lignes = lignes.filter(category_genre__genre=request.GET['genre'].upper())
+    if request.GET.get('age'):
+        if not request.GET['age'].isdigit():
+            return _erreur("Le paramètre 'age' doit être un identifiant")
+        lignes = lignes.filter(category_age_id=request.GET['age'])
+
+    resultats = list(lignes.values(
+        'saison__periode', 'championnat__nom', 'category_genre__genre', 'category_age__nom',
+        'matchs_joues', 'victoires', 'defaites', 'sets_gagnes', 'sets_perdus',
+        'points_gagnes', 'points_perdus',
+    ))
+    for ligne in resultats:
+        ligne['saison'] = ligne.pop('saison__periode')
+        ligne['championnat'] = ligne.pop('championnat__nom')
+        ligne['genre'] = ligne.pop('category_genre__genre')
+        ligne['categorie_age'] = ligne.pop('category_age__nom')
+    return JsonResponse({'resultats': resultats})
+
+
+# ==================== PALMARÈS ET SAISONS ====================
+
+@mise_en_cache([PalmaresClub, CategoryGenre], parametres=['genre', 'champs', 'taille', 'curseur'])
+def palmares(request):
+    """GET /api/v1/palmares/?genre=M"""
+    try:
+        champs = _champs_demandes(request, COLONNES_PALMARES)
+        taille = _taille_page(request)
+    except ErreurParametre as erreur:
+        return _erreur(str(erreur))
+
+    lignes = PalmaresClub.objects.all()
+    if request.GET.get('genre'):
+        lignes = lignes.filter(category__genre=request.GET['genre'].upper())
+    colonnes = {'id', 'annee'} | {COLONNES_PALMARES[champ] for champ in champs}
+    page = paginer_par_curseur(lignes.values(*colonnes), request.GET.get('curseur'), taille, champs=('annee', 'id'))
+    return JsonResponse({
+        'resultats': [{champ: ligne[COLONNES_PALMARES[champ]] for champ in champs} for ligne in page.elements],
+        'suivant': _url_suivante(request, page),
+    })
+
+
+@mise_en_cache([Saison])
+def saisons(request):
+    """GET /api/v1/saisons/"""
+    return JsonResponse({'resultats': list(Saison.objects.values('id', 'periode'))})
+
+
+
+# ==================== RECHERCHE ====================
+
+def _types_recherche(request):
+    valeur = request.GET.get('types')
+    if not valeur:
+        return None
+    types = [type_resultat.strip() for type_resultat in valeur.split(',') if type_resultat.strip()]
+    inconnus = [type_resultat for type_resultat in types if type_resultat not in moteur_recherche.SOURCES]
+    if inconnus:
+        raise ErreurParametre(f"Type(s) inconnu(s) : {', '.join(inconnus)}")
+    return types
+
+
+def _limite_recherche(request):
+    try:
+        limite = int(request.GET.get('limite', moteur_recherche.LIMITE_DEFAUT))
+    except ValueError:
+        raise ErreurParametre("Le paramètre 'limite' doit être un entier")
+    return max(1, min(limite, moteur_recherche.LIMITE_MAX))
+
+
+@mise_en_cache(moteur_recherche.MODELES + [CategoryAge], parametres=['q', 'types', 'limite'])
+def recherche(request):
+    """GET /api/v1/recherche/?q=rakoto&types=joueur,adversaire&limite=10"""
+    texte = request.GET.get('q', '').strip()
+    try:
+        if len(texte) < moteur_recherche.LONGUEUR_MIN:
+            raise ErreurParametre(
+                f"Le paramètre 'q' doit contenir au moins {moteur_recherche.LONGUEUR_MIN} caractères"
+            )
+        types = _types_recherche(request)
+        limite = _limite_recherche(request)
+    except ErreurParametre as erreur:
+        return _erreur(str(erreur))
+
+    return JsonResponse({'resultats': moteur_recherche.rechercher(texte, types=types, limite=limite)})
@@ -3,3 +3,12 @@ from django.apps import AppConfig
 
 class ClubConfig(AppConfig):
     name = 'club'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from . import signals  # noqa: F401
+        from .metriques import brancher_connexion, reglages
+
+        if reglages()['ACTIVE']:
+            connection_created.connect(brancher_connexion, dispatch_uid='metriques_sql')
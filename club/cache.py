@@ -0,0 +1,145 @@
+"""
+Cache des pages publiques avec invalidation par modèle.
+
+Chaque modèle a un numéro de version stocké dans le cache. La clé d'une
+page contient les versions des modèles dont elle dépend : un post_save ou
+post_delete sur l'un d'eux change sa version (voir signals.py), ce qui rend
+obsolètes les seules pages concernées.
+
+La version change à la validation de la transaction (on_commit) : changée
+avant, une page recalculée entre-temps d'après les anciennes données serait
+mise en cache sous la nouvelle version et y resterait.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .metriques import noter_cache
+from .replique import noter_ecriture
+
+
+def _cle_version(modele, pk=None):
+    if pk is None:
+        return f"version:{modele._meta.label_lower}"
+    return f"version:{modele._meta.label_lower}:{pk}"
+
+
+def versions_modeles(modeles):
+    """Versions actuelles des modèles, lues en un seul aller-retour"""
+    return _lire_versions([_cle_version(modele) for modele in modeles])
+
+
+def version_objet(modele, pk):
+    """Version d'un seul objet : pour les caches propres à cet objet (ex : bilan d'un adversaire)"""
+    return _lire_versions([_cle_version(modele, pk)])[0]
+
+
+def _lire_versions(cles):
+    versions = cache.get_many(cles)
+    for cle in cles:
+        if cle not in versions:
+            # Version absente (cache vidé ou évincé) : on repart d'une valeur
+            # inédite pour ne jamais retomber sur une ancienne page.
+            cache.add(cle, time.time_ns(), timeout=None)
+            versions[cle] = cache.get(cle)
+    return [versions[cle] for cle in cles]
+
+
+async def aversions_modeles(modeles):
+    """Version asynchrone de versions_modeles (API de cache asynchrone)"""
+    cles = [_cle_version(modele) for modele in modeles]
+    versions = await cache.aget_many(cles)
+    for cle in cles:
+        if cle not in versions:
+            await cache.aadd(cle, time.time_ns(), timeout=None)
+            versions[cle] = await cache.aget(cle)
+    return [versions[cle] for cle in cles]
+
+
+def invalider_modele(modele):
+    """Rend obsolètes toutes les pages qui dépendent de ce modèle (après la transaction)"""
+    def executer():
+        _incrementer(_cle_version(modele))
+        # Les pages recalculées juste après ne doivent pas lire une réplique en retard
+        noter_ecriture()
+    transaction.on_commit(executer)
+
+
+def invalider_objets(modele, pks):
+    """Rend obsolètes les caches propres à ces objets (voir version_objet), après la transaction"""
+    cles = [_cle_version(modele, pk) for pk in set(pks)]
+    def executer():
+        for cle in cles:
+            _incrementer(cle)
+    transaction.on_commit(executer)
+
+
+def _incrementer(cle):
+    try:
+        cache.incr(cle)
+    except ValueError:
+        cache.set(cle, time.time_ns(), timeout=None)
+
+
+def cle_page(nom_vue, request, parametres, kwargs, versions):
+    # L'hôte fait varier les liens absolus (ex : « suivant » de l'API)
+    valeurs = [request.get_host()]
+    valeurs += [f"{nom}={request.GET.get(nom, '')}" for nom in parametres]
+    valeurs += [f"{nom}={valeur}" for nom, valeur in sorted(kwargs.items())]
+    valeurs += [str(version) for version in versions]
+    empreinte = hashlib.md5('&'.join(valeurs).encode()).hexdigest()
+    return f"page:{nom_vue}:{empreinte}"
+
+
+def mise_en_cache(modeles, parametres=()):
+    """
+    Met en cache la réponse d'une vue publique.
+
+    ``modeles`` : modèles lus par la vue (invalidation) ;
+    ``parametres`` : paramètres GET qui font varier la page.
+    Seules les requêtes GET/HEAD de visiteurs anonymes sont servies depuis le cache.
+    Fonctionne avec les vues synchrones et asynchrones.
+    """
+    def decorateur(vue):
+        nom_vue = f"{vue.__module__}.{vue.__qualname__}"
+
+        if iscoroutinefunction(vue):
+            @wraps(vue)
+            async def wrapper_async(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD') or (await request.auser()).is_authenticated:
+                    return await vue(request, *args, **kwargs)
+
+                cle = cle_page(nom_vue, request, parametres, kwargs, await aversions_modeles(modeles))
+                response = await cache.aget(cle)
+                noter_cache('pages', response is not None)
+                if response is not None:
+                    return response
+
+                response = await vue(request, *args, **kwargs)
+                if response.status_code == 200 and not response.cookies:
+                    await cache.aset(cle, response, settings.CACHE_PAGES_DUREE)
+                return response
+            return wrapper_async
+
+        @wraps(vue)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or request.user.is_authenticated:
+                return vue(request, *args, **kwargs)
+
+            cle = cle_page(nom_vue, request, parametres, kwargs, versions_modeles(modeles))
+            response = cache.get(cle)
+            noter_cache('pages', response is not None)
+            if response is not None:
+                return response
+
+            response = vue(request, *args, **kwargs)
+            if response.status_code == 200 and not response.cookies:
+                cache.set(cle, response, settings.CACHE_PAGES_DUREE)
+            return response
+        return wrapper
+    return decorateur
@@ -0,0 +1,121 @@
+"""
+Attribution automatique de la catégorie d'âge des joueurs.
+
+Les tranches de CategoryAge (age_min / age_max, bornes incluses) sont
+chargées une seule fois dans un index trié par âge minimum ; la catégorie
+d'un âge se trouve ensuite par recherche dichotomique (bisect), sans
+requête ni parcours de toutes les catégories. CategoryAge.clean() refuse
+les tranches qui se chevauchent ; s'il en existe malgré tout (données
+anciennes, écritures hors formulaire), l'index revient à un parcours.
+"""
+import re
+from bisect import bisect_right
+from datetime import date
+
+from django.db import transaction
+
+from .cache import invalider_modele
+from .models import CategoryAge, Joueur
+
+TAILLE_LOT = 1000
+
+# L'âge retenu pour toute une saison est celui atteint au 31 décembre
+# de sa première année (ex : 31/12/2024 pour la saison 2024-2025).
+DATE_REFERENCE = (12, 31)
+
+
+def age_au(date_naissance, reference):
+    """Âge révolu à la date de référence"""
+    return reference.year - date_naissance.year - (
+        (reference.month, reference.day) < (date_naissance.month, date_naissance.day)
+    )
+
+
+def date_reference(saison):
+    """Date de référence d'une saison dont la période commence par l'année (ex : « 2024-2025 »)"""
+    annee = re.match(r'\s*(\d{4})', saison.periode)
+    if annee is None:
+        raise ValueError(f"Période de saison illisible : {saison.periode}")
+    return date(int(annee.group(1)), *DATE_REFERENCE)
+
+
+class IndexCategories:
+    """
+    Index des tranches d'âge, trié par âge minimum.
+
+    Une borne absente vaut « sans limite ». Si des tranches se chevauchent,
+    la dichotomie ne suffit plus : parmi les tranches qui couvrent l'âge,
+    celle à l'âge minimum le plus élevé l'emporte.
+    """
+
+    def __init__(self, categories):
+        tranches = sorted(
+            (
+                categorie.age_min if categorie.age_min is not None else float('-inf'),
+                categorie.age_max if categorie.age_max is not None else float('inf'),
+                categorie.pk,
+            )
+            for categorie in categories
+        )
+        self.debuts = [debut for debut, _, _ in tranches]
+        self.fins = [fin for _, fin, _ in tranches]
+        self.ids = [pk for _, _, pk in tranches]
+        self.disjointes = all(fin < debut for fin, debut in zip(self.fins, self.debuts[1:]))
+
+    @classmethod
+    def charger(cls):
+        return cls(CategoryAge.objects.only('pk', 'age_min', 'age_max'))
+
+    def categorie_id(self, age):
+        """Identifiant de la catégorie couvrant cet âge, ou None"""
+        position = bisect_right(self.debuts, age) - 1
+        if self.disjointes:
+            if position >= 0 and age <= self.fins[position]:
+                return self.ids[position]
+            return None
+        # Chevauchements : une tranche plus ancienne peut encore couvrir l'âge
+        for indice in range(position, -1, -1):
+            if age <= self.fins[indice]:
+                return self.ids[indice]
+        return None
+
+    def pour_joueur(self, date_naissance, reference):
+        return self.categorie_id(age_au(date_naissance, reference))
+
+
+def reassigner(reference, queryset=None, taille_lot=TAILLE_LOT, simulation=False):
+    """
+    Recalcule la catégorie d'âge des joueurs à la date de référence.
+
+    Seuls les joueurs dont la catégorie change sont écrits, par lots avec
+    ``bulk_update``. Retourne {id de catégorie (ou None): nombre de joueurs
+    déplacés vers elle}.
+    """
+    index = IndexCategories.charger()
+    if queryset is None:
+        queryset = Joueur.objects.all()
+
+    deplacements = {}
+    with transaction.atomic():
+        lot = []
+        joueurs = queryset.order_by().only('pk', 'date_naissance', 'category_age').iterator(chunk_size=taille_lot)
+        for joueur in joueurs:
+            categorie_id = index.pour_joueur(joueur.date_naissance, reference)
+            if categorie_id == joueur.category_age_id:
+                continue
+            joueur.category_age_id = categorie_id
+            deplacements[categorie_id] = deplacements.get(categorie_id, 0) + 1
+            if simulation:
+                # Rien à écrire : le lot ne garderait que des joueurs en mémoire
+                continue
+            lot.append(joueur)
+            if len(lot) >= taille_lot:
+                Joueur.objects.bulk_update(lot, ['category_age'])
+                lot = []
+        if lot:
+            Joueur.objects.bulk_update(lot, ['category_age'])
+
+    # bulk_update n'émet pas de signaux : invalidation explicite
+    if deplacements and not simulation:
+        invalider_modele(Joueur)
+    return deplacements
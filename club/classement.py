@@ -0,0 +1,150 @@
+"""
+Mise à jour du classement précalculé (modèle Classement).
+
+Chaque match terminé apporte une contribution (victoire/défaite, sets,
+points) à la ligne Classement de son couple saison × championnat. Les
+signaux appliquent ces contributions de façon incrémentale ; les écritures
+groupées de MatchDayQuerySet (update, bulk_create, bulk_update), qui
+n'émettent pas de signaux, recalculent les lignes touchées (``recalculer``) ;
+la commande ``reconstruire_classement`` recalcule tout depuis les matchs.
+"""
+import operator
+from functools import reduce
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .cache import invalider_modele
+from .models import Classement, MatchDay, issue_sets
+
+CHAMPS_CLASSEMENT = ['saison_id', 'championnat_id', 'sets_club', 'sets_adverse', 'a_verifier'] + [
+    f'set{i}_{camp}' for i in range(1, 6) for camp in ('club', 'adverse')
+]
+
+COMPTEURS = [
+    'matchs_joues', 'victoires', 'defaites',
+    'sets_gagnes', 'sets_perdus', 'points_gagnes', 'points_perdus',
+]
+
+
+def etat_match(match):
+    """Valeurs d'un match utiles au classement, sous forme de dict"""
+    return {champ: getattr(match, champ) for champ in CHAMPS_CLASSEMENT}
+
+
+def contribution(etat):
+    """Contribution d'un match au classement (None s'il n'est pas terminé ou s'il est à vérifier)"""
+    if etat['a_verifier']:
+        return None
+    sets_club = etat['sets_club']
+    sets_adverse = etat['sets_adverse']
+    issue = issue_sets(sets_club, sets_adverse)
+    if issue not in MatchDay.TERMINES:
+        return None
+    victoire = issue == MatchDay.Issue.VICTOIRE
+    return {
+        'matchs_joues': 1,
+        'victoires': 1 if victoire else 0,
+        'defaites': 0 if victoire else 1,
+        'sets_gagnes': sets_club,
+        'sets_perdus': sets_adverse,
+        'points_gagnes': sum(etat[f'set{i}_club'] or 0 for i in range(1, 6)),
+        'points_perdus': sum(etat[f'set{i}_adverse'] or 0 for i in range(1, 6)),
+    }
+
+
+def retirer(etat):
+    """Retire la contribution d'un ancien état de match"""
+    valeurs = contribution(etat)
+    if valeurs is None:
+        return
+    # Pas de création ici : la ligne peut déjà avoir été supprimée en cascade
+    ligne = Classement.objects.filter(
+        saison_id=etat['saison_id'],
+        championnat_id=etat['championnat_id'],
+    )
+    ligne.update(**{champ: F(champ) - valeurs[champ] for champ in COMPTEURS})
+    # Plus aucun match joué : la ligne disparaît, comme après reconstruire()
+    ligne.filter(matchs_joues__lte=0).delete()
+
+
+def ajouter(match):
+    """Ajoute la contribution d'un match à sa ligne de classement"""
+    valeurs = contribution(etat_match(match))
+    if valeurs is None:
+        return
+    championnat = match.championnat
+    classement, _ = Classement.objects.get_or_create(
+        saison_id=match.saison_id,
+        championnat_id=match.championnat_id,
+    )
+    Classement.objects.filter(pk=classement.pk).update(
+        category_genre_id=championnat.category_genre_id,
+        category_age_id=championnat.category_age_id,
+        **{champ: F(champ) + valeurs[champ] for champ in COMPTEURS}
+    )
+
+
+def somme_points(camp):
+    """Somme SQL des points d'un camp ('club' ou 'adverse') sur les cinq sets"""
+    expression = Value(0)
+    for i in range(1, 6):
+        expression = expression + Coalesce(f'set{i}_{camp}', 0)
+    return Sum(expression)
+
+
+def reconstruire(saison=None):
+    """Recalcule entièrement le classement (d'une saison ou de toutes)"""
+    matchs = MatchDay.objects.termines()
+    existants = Classement.objects.all()
+    if saison is not None:
+        matchs = matchs.filter(saison=saison)
+        existants = existants.filter(saison=saison)
+    return _remplacer(matchs, existants)
+
+
+def recalculer(couples):
+    """Recalcule les seules lignes des couples (saison_id, championnat_id) donnés"""
+    couples = set(couples)
+    if not couples:
+        return 0
+    filtre = reduce(operator.or_, (
+        Q(saison_id=saison_id, championnat_id=championnat_id) for saison_id, championnat_id in couples
+    ))
+    return _remplacer(MatchDay.objects.termines().filter(filtre), Classement.objects.filter(filtre))
+
+
+def _remplacer(matchs, existants):
+    """Remplace les lignes `existants` par l'agrégat des matchs terminés `matchs`"""
+    lignes = (
+        matchs.order_by()
+        .values(
+            'saison_id', 'championnat_id',
+            'championnat__category_genre_id', 'championnat__category_age_id',
+        )
+        .annotate(
+            matchs_joues=Count('id'),
+            victoires=Count('id', filter=Q(issue=MatchDay.Issue.VICTOIRE)),
+            defaites=Count('id', filter=Q(issue=MatchDay.Issue.DEFAITE)),
+            sets_gagnes=Sum('sets_club'),
+            sets_perdus=Sum('sets_adverse'),
+            points_gagnes=somme_points('club'),
+            points_perdus=somme_points('adverse'),
+        )
+    )
+    classements = [
+        Classement(
+            saison_id=ligne['saison_id'],
+            championnat_id=ligne['championnat_id'],
+            category_genre_id=ligne['championnat__category_genre_id'],
+            category_age_id=ligne['championnat__category_age_id'],
+            **{champ: ligne[champ] for champ in COMPTEURS}
+        )
+        for ligne in lignes
+    ]
+    with transaction.atomic():
+        existants.delete()
+        Classement.objects.bulk_create(classements)
+    invalider_modele(Classement)
+    return len(classements)
@@ -0,0 +1,71 @@
+"""
+GET conditionnel (ETag) pour les pages de matchs et de palmarès.
+
+L'ETag d'une page se calcule sans requête SQL, à partir des versions des
+modèles qu'elle affiche (voir cache.py), des paramètres de la requête et de
+l'état de connexion : si le navigateur présente le même ETag, on répond 304
+sans exécuter la vue ni lire le cache des pages. Toute écriture sur l'un de
+ces modèles (ajout, modification, suppression) change sa version, donc l'ETag.
+
+Pas de Last-Modified : les versions ne sont pas des dates.
+"""
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+from .cache import aversions_modeles, versions_modeles
+
+
+def validateur(request, connecte, versions, parametres=(), kwargs=None):
+    """ETag d'une page : versions de ses modèles, paramètres GET et d'URL, état de connexion"""
+    elements = [
+        [(nom, request.GET.get(nom, '')) for nom in parametres],
+        sorted((kwargs or {}).items()),
+        connecte,
+        *versions,
+    ]
+    return quote_etag(hashlib.md5(repr(elements).encode()).hexdigest())
+
+
+def reponse_conditionnelle(modeles, parametres=()):
+    """
+    Répond 304 si la page n'a pas changé depuis la dernière visite.
+
+    ``modeles`` et ``parametres`` : les mêmes que pour ``mise_en_cache``.
+    """
+    def decorateur(vue):
+        def _completer(response, etag):
+            if response.status_code == 200:
+                response.headers.setdefault('ETag', etag)
+            return response
+
+        if iscoroutinefunction(vue):
+            @wraps(vue)
+            async def wrapper_async(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return await vue(request, *args, **kwargs)
+
+                connecte = (await request.auser()).is_authenticated
+                etag = validateur(request, connecte, await aversions_modeles(modeles), parametres, kwargs)
+                response = get_conditional_response(request, etag=etag)
+                if response is not None:
+                    return response
+                return _completer(await vue(request, *args, **kwargs), etag)
+            return wrapper_async
+
+        @wraps(vue)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return vue(request, *args, **kwargs)
+
+            connecte = request.user.is_authenticated
+            etag = validateur(request, connecte, versions_modeles(modeles), parametres, kwargs)
+            response = get_conditional_response(request, etag=etag)
+            if response is not None:
+                return response
+            return _completer(vue(request, *args, **kwargs), etag)
+        return wrapper
+    return decorateur
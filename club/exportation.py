@@ -0,0 +1,131 @@
+"""
+Export en continu des matchs et des effectifs (CSV ou JSON Lines).
+
+Les lignes sont lues avec ``values_list().iterator(chunk_size=...)`` et
+converties au fil de l'eau : la mémoire utilisée reste celle d'un lot,
+quel que soit le nombre de saisons exportées. Les générateurs produits
+s'écrivent dans un fichier ou se passent à un StreamingHttpResponse, via
+``flux_reponse`` : sous ASGI, Django lirait un générateur synchrone en
+entier avant d'envoyer le premier octet.
+"""
+import csv
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import MatchDayEquipeAdverse
+
+TAILLE_LOT = 2000
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+# (en-tête, chemin ORM)
+COLONNES_MATCHS = [
+    ('id', 'id'),
+    ('date_rencontre', 'date_rencontre'),
+    ('lieu', 'lieu_rencontre'),
+    ('saison', 'saison__periode'),
+    ('championnat', 'championnat__nom'),
+    ('genre', 'championnat__category_genre__genre'),
+    ('categorie_age', 'championnat__category_age__nom'),
+    ('sets_club', 'sets_club'),
+    ('sets_adverse', 'sets_adverse'),
+] + [
+    (f'set{i}_{camp}', f'set{i}_{camp}') for i in range(1, 6) for camp in ('club', 'adverse')
+]
+
+COLONNES_JOUEURS = [
+    ('nom', 'nom'),
+    ('prenom', 'prenom'),
+    ('date_naissance', 'date_naissance'),
+    ('genre', 'category__genre'),
+    ('categorie_age', 'category_age__nom'),
+]
+
+
+def _par_lots(iterable, taille):
+    iterateur = iter(iterable)
+    while lot := list(islice(iterateur, taille)):
+        yield lot
+
+
+def lignes_matchs(queryset, taille_lot=TAILLE_LOT):
+    """En-têtes puis lignes des matchs (adversaires séparés par « ; »)"""
+    chemins = [chemin for _, chemin in COLONNES_MATCHS]
+    yield [entete for entete, _ in COLONNES_MATCHS] + ['adversaires']
+
+    lignes = (
+        queryset.order_by('date_rencontre', 'id')
+        .values_list(*chemins)
+        .iterator(chunk_size=taille_lot)
+    )
+    for lot in _par_lots(lignes, taille_lot):
+        adversaires = {}
+        liens = MatchDayEquipeAdverse.objects.filter(
+            match_day_id__in=[ligne[0] for ligne in lot]
+        ).values_list('match_day_id', 'equipe_adverse__nom')
+        for match_id, nom in liens:
+            adversaires.setdefault(match_id, []).append(nom)
+        for ligne in lot:
+            yield list(ligne) + ['; '.join(adversaires.get(ligne[0], []))]
+
+
+def lignes_joueurs(queryset, taille_lot=TAILLE_LOT):
+    """En-têtes puis lignes de l'effectif, groupé par catégorie d'âge"""
+    yield [entete for entete, _ in COLONNES_JOUEURS]
+    yield from (
+        queryset.order_by('category_age__age_min', 'nom', 'prenom')
+        .values_list(*[chemin for _, chemin in COLONNES_JOUEURS])
+        .iterator(chunk_size=taille_lot)
+    )
+
+
+class _Tampon:
+    """Pseudo-fichier : csv.writer renvoie directement la ligne écrite"""
+
+    def write(self, valeur):
+        return valeur
+
+
+def en_csv(lignes):
+    writer = csv.writer(_Tampon())
+    for ligne in lignes:
+        yield writer.writerow(ligne)
+
+
+def en_jsonl(lignes):
+    encodeur = DjangoJSONEncoder(ensure_ascii=False)
+    lignes = iter(lignes)
+    entetes = next(lignes)
+    for ligne in lignes:
+        yield encodeur.encode(dict(zip(entetes, ligne))) + '\n'
+
+
+async def _flux_async(morceaux, taille_lot):
+    iterateur = iter(morceaux)
+    # Un lot par aller-retour dans le thread de l'ORM (curseur serveur compris)
+    lire_lot = sync_to_async(lambda: list(islice(iterateur, taille_lot)))
+    while lot := await lire_lot():
+        for morceau in lot:
+            yield morceau
+
+
+def flux_reponse(request, morceaux, taille_lot=TAILLE_LOT):
+    """Contenu d'un StreamingHttpResponse, diffusé au fil de l'eau sous WSGI comme sous ASGI"""
+    if isinstance(request, ASGIRequest):
+        return _flux_async(morceaux, taille_lot)
+    return morceaux
+
+
+def exporter(lignes, format_export):
+    """Générateur de texte au format demandé ('csv' ou 'jsonl')"""
+    if format_export == 'csv':
+        return en_csv(lignes)
+    if format_export == 'jsonl':
+        return en_jsonl(lignes)
+    raise ValueError(f"Format d'export inconnu : {format_export}")
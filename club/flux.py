@@ -0,0 +1,158 @@
+"""
+Fil de chaque catégorie (genre × âge) : prochains matchs et derniers résultats.
+
+Les listes sont précalculées et stockées dans le cache (DUREE_FLUX) ; les
+signaux les recalculent (après validation de la transaction) quand un
+match, ses adversaires ou un championnat change. Le tableau de bord n'a
+donc qu'une lecture de cache à faire. Une entrée évincée, expirée ou dont
+un match « à venir » est passé est recalculée à la lecture : sans écriture
+dans la catégorie, la liste ne se vide pas au fil des matchs joués.
+"""
+from contextvars import ContextVar
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .metriques import noter_cache
+from .models import ChampionnatCompetition, MatchDay, MatchDayEquipeAdverse
+
+NB_A_VENIR = 20  # marge : les matchs passés sont écartés à la lecture
+NB_RESULTATS = 5
+DUREE_FLUX = 6 * 3600
+
+CHAMPS_MATCH = ['id', 'date_rencontre', 'lieu_rencontre', 'championnat__nom', 'sets_club', 'sets_adverse', 'issue']
+
+
+def cle_flux(genre_id, age_id):
+    return f"flux:{genre_id}:{age_id}"
+
+
+def _matchs(genre_id, age_id):
+    """Matchs d'une catégorie ; sans catégorie d'âge, tous ceux du genre ; sans genre, tout le club"""
+    filtre = Q()
+    if genre_id is not None:
+        filtre &= Q(championnat__category_genre_id=genre_id)
+    if age_id is not None:
+        filtre &= Q(championnat__category_age_id=age_id)
+    return MatchDay.objects.filter(filtre)
+
+
+def _avec_adversaires(lignes):
+    lignes = list(lignes)
+    noms = {}
+    liens = (
+        MatchDayEquipeAdverse.objects.filter(match_day_id__in=[ligne['id'] for ligne in lignes])
+        .order_by('equipe_adverse__nom')
+        .values_list('match_day_id', 'equipe_adverse__nom')
+    )
+    for match_id, nom in liens:
+        noms.setdefault(match_id, []).append(nom)
+    for ligne in lignes:
+        ligne['adversaires'] = noms.get(ligne['id'], [])
+    return lignes
+
+
+def calculer(genre_id, age_id):
+    matchs = _matchs(genre_id, age_id)
+    return {
+        'a_venir': _avec_adversaires(matchs.a_venir().values(*CHAMPS_MATCH)[:NB_A_VENIR]),
+        'resultats': _avec_adversaires(
+            matchs.filter(sets_club__isnull=False).order_by('-date_rencontre', '-id').values(*CHAMPS_MATCH)[:NB_RESULTATS]
+        ),
+    }
+
+
+def rafraichir(categories):
+    """Recalcule et stocke le fil des catégories [(genre_id, age_id), ...]"""
+    # Les fils « tout le genre » (joueur sans catégorie d'âge) et « tout le
+    # club » (compte sans fiche joueur) contiennent aussi ces matchs.
+    fils = {(None, None)}
+    for genre_id, age_id in categories:
+        fils.update({(genre_id, age_id), (genre_id, None)})
+    for genre_id, age_id in fils:
+        cache.set(cle_flux(genre_id, age_id), calculer(genre_id, age_id), DUREE_FLUX)
+
+
+def rafraichir_tout():
+    """Recalcule le fil de toutes les catégories (après un import ou un changement de championnat)"""
+    rafraichir(ChampionnatCompetition.objects.values_list('category_genre_id', 'category_age_id').distinct())
+
+
+def categories_match(match_ids):
+    """Catégories [(genre_id, age_id)] des championnats des matchs donnés"""
+    return list(
+        MatchDay.objects.filter(pk__in=match_ids)
+        .values_list('championnat__category_genre_id', 'championnat__category_age_id').distinct()
+    )
+
+
+# ==================== RAFRAÎCHISSEMENT APRÈS VALIDATION ====================
+
+_en_attente = ContextVar('flux_en_attente', default=None)
+
+
+class _EnAttente:
+    """Changements accumulés pendant une transaction, traités en une fois à la validation"""
+
+    def __init__(self):
+        self.championnats = set()
+        self.matchs = set()
+        self.tout = False
+        self.execute = False
+
+    def executer(self):
+        # Un rappel est inscrit à chaque appel de planifier() : seul le premier travaille
+        if self.execute:
+            return
+        self.execute = True
+        if self.tout:
+            rafraichir_tout()
+            return
+        categories = set(categories_match(self.matchs))
+        categories.update(
+            ChampionnatCompetition.objects.filter(pk__in=self.championnats)
+            .values_list('category_genre_id', 'category_age_id')
+        )
+        rafraichir(categories)
+
+
+def planifier(championnats=(), matchs=(), tout=False, using=None):
+    """Rafraîchit, après validation, le fil des championnats et des matchs donnés.
+
+    Une suppression en cascade appelle les signaux pour chaque match : les
+    identifiants sont regroupés et les fils recalculés une seule fois. Après
+    un rollback, les changements abandonnés restent dans l'ensemble et sont
+    rafraîchis avec ceux de la transaction suivante (un calcul de trop, sans
+    conséquence).
+    """
+    en_attente = _en_attente.get()
+    if en_attente is None or en_attente.execute:
+        en_attente = _EnAttente()
+        _en_attente.set(en_attente)
+    en_attente.championnats.update(championnats)
+    en_attente.matchs.update(matchs)
+    en_attente.tout = en_attente.tout or tout
+    # Hors transaction, exécuté tout de suite
+    transaction.on_commit(en_attente.executer, using=using)
+
+
+def lire(genre_id=None, age_id=None, nb_a_venir=5):
+    """Fil d'une catégorie, lu dans le cache"""
+    fil = cache.get(cle_flux(genre_id, age_id))
+    noter_cache('flux', fil is not None)
+    maintenant = timezone.now()
+    if fil is not None:
+        a_venir = [match for match in fil['a_venir'] if match['date_rencontre'] >= maintenant]
+        if len(a_venir) < len(fil['a_venir']):
+            # Des matchs sont passés depuis le calcul : d'autres peuvent les remplacer
+            fil = None
+    if fil is None:
+        fil = calculer(genre_id, age_id)
+        cache.set(cle_flux(genre_id, age_id), fil, DUREE_FLUX)
+        a_venir = fil['a_venir']
+    return {
+        'a_venir': a_venir[:nb_a_venir],
+        'resultats': fil['resultats'],
+    }
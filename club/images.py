@@ -0,0 +1,170 @@
+"""
+Variantes redimensionnées (WebP et JPEG) des images de la galerie.
+
+`generer_images` calcule, pour chaque image source des fichiers statiques,
+une version par largeur de IMAGES['LARGEURS'] (sans jamais agrandir) dans
+chacun des formats, rangées sous ``derives/<empreinte>/`` du stockage des
+médias. L'empreinte est le SHA-256 du contenu de la source : une image
+inchangée n'est jamais recalculée, une image remplacée obtient de nouvelles
+URL (cache navigateur d'un an possible). Le manifeste ``derives/manifeste.json``
+relie chaque chemin statique à ses variantes ; la balise ``{% image_responsive %}``
+s'en sert pour écrire srcset/sizes, et retombe sur l'image d'origine tant
+qu'une source n'a pas été traitée.
+
+Pillow est facultatif : sans lui, la commande s'arrête et la balise sert les
+images d'origine, en chargement différé.
+"""
+import hashlib
+import json
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # dépendance facultative
+    Image = ImageOps = None
+
+REGLAGES_DEFAUT = {
+    'LARGEURS': [160, 320, 640, 960, 1280],
+    'FORMATS': ['webp', 'jpeg'],
+    'QUALITE': {'webp': 78, 'jpeg': 80},
+    # Sous-dossier des fichiers statiques parcouru par `generer_images`
+    'SOURCES': 'assets/img',
+}
+
+DOSSIER = 'derives'
+MANIFESTE = f'{DOSSIER}/manifeste.json'
+EXTENSIONS_SOURCES = {'.jpg', '.jpeg', '.png'}
+EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+TYPES_MIME = {'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+
+
+def reglages():
+    return {**REGLAGES_DEFAUT, **getattr(settings, 'IMAGES', {})}
+
+
+def empreinte(fichier):
+    sha = hashlib.sha256()
+    with open(fichier, 'rb') as source:
+        for bloc in iter(lambda: source.read(1 << 16), b''):
+            sha.update(bloc)
+    return sha.hexdigest()[:16]
+
+
+def largeurs_cibles(largeur_origine, largeurs):
+    """Largeurs à produire : celles de la liste plus petites que l'original, et l'original lui-même"""
+    return sorted({largeur for largeur in largeurs if largeur < largeur_origine} | {largeur_origine})
+
+
+# ==================== GÉNÉRATION ====================
+
+def generer(source, destination, reglages_images, forcer=False):
+    """Écrit les variantes de `source` dans `destination/<empreinte>/`.
+
+    Ne dépend ni des réglages Django ni de la base : exécutée telle quelle
+    dans les processus de `generer_images`.
+    """
+    cle = empreinte(source)
+    dossier = Path(destination) / cle
+    dossier.mkdir(parents=True, exist_ok=True)
+    nom = Path(source).stem
+
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        largeur, hauteur = image.size
+        variantes = {format_image: [] for format_image in reglages_images['FORMATS']}
+        for largeur_cible in largeurs_cibles(largeur, reglages_images['LARGEURS']):
+            copie = None
+            for format_image in reglages_images['FORMATS']:
+                fichier = dossier / f"{nom}-{largeur_cible}.{EXTENSIONS[format_image]}"
+                if forcer or not fichier.exists():
+                    if copie is None:
+                        hauteur_cible = round(hauteur * largeur_cible / largeur)
+                        copie = image.resize((largeur_cible, hauteur_cible), Image.Resampling.LANCZOS)
+                    sortie = copie.convert('RGB') if format_image == 'jpeg' else copie
+                    options = {'quality': reglages_images['QUALITE'][format_image]}
+                    if format_image == 'jpeg':
+                        options.update(optimize=True, progressive=True)
+                    else:
+                        options.update(method=6)
+                    sortie.save(fichier, format_image.upper(), **options)
+                variantes[format_image].append([largeur_cible, f"{DOSSIER}/{cle}/{fichier.name}"])
+
+    return {'empreinte': cle, 'largeur': largeur, 'hauteur': hauteur, 'variantes': variantes}
+
+
+def sources(sous_dossier=None):
+    """Chemins statiques des images sources (assets/img/... par défaut)"""
+    sous_dossier = sous_dossier or reglages()['SOURCES']
+    chemins = set()
+    for finder in finders.get_finders():
+        for chemin, _ in finder.list([]):
+            chemin = chemin.replace('\\', '/')
+            if chemin.startswith(sous_dossier + '/') and Path(chemin).suffix.lower() in EXTENSIONS_SOURCES:
+                chemins.add(chemin)
+    return sorted(chemins)
+
+
+def generer_tout(chemins, processus=None, forcer=False):
+    """Traite les images dans un pool de processus et met le manifeste à jour.
+
+    Renvoie {chemin: entrée du manifeste ou message d'erreur}.
+    """
+    if Image is None:
+        raise RuntimeError("Pillow n'est pas installé (pip install Pillow)")
+    destination = default_storage.path(DOSSIER)
+    reglages_images = reglages()
+    resultats = {}
+    with ProcessPoolExecutor(max_workers=processus) as pool:
+        travaux = {
+            chemin: pool.submit(generer, finders.find(chemin), destination, reglages_images, forcer)
+            for chemin in chemins
+        }
+        for chemin, travail in travaux.items():
+            try:
+                resultats[chemin] = travail.result()
+            except Exception as erreur:  # image illisible : les autres continuent
+                resultats[chemin] = f"{type(erreur).__name__} : {erreur}"
+
+    manifeste = lire_manifeste()
+    manifeste.update({chemin: entree for chemin, entree in resultats.items() if isinstance(entree, dict)})
+    if default_storage.exists(MANIFESTE):
+        default_storage.delete(MANIFESTE)
+    default_storage.save(MANIFESTE, ContentFile(json.dumps(manifeste, indent=1, sort_keys=True).encode()))
+    _manifeste_en_memoire.clear()
+    return resultats
+
+
+# ==================== LECTURE ====================
+
+_manifeste_en_memoire = {}
+
+
+def lire_manifeste():
+    """Manifeste des variantes, relu seulement quand le fichier change"""
+    if not default_storage.exists(MANIFESTE):
+        return {}
+    modification = default_storage.get_modified_time(MANIFESTE)
+    if _manifeste_en_memoire.get('modification') != modification:
+        with default_storage.open(MANIFESTE) as fichier:
+            _manifeste_en_memoire.update(modification=modification, contenu=json.load(fichier))
+    return dict(_manifeste_en_memoire['contenu'])
+
+
+def variantes(chemin):
+    """Entrée du manifeste pour un chemin statique, avec les URL des variantes (None si non traité)"""
+    entree = lire_manifeste().get(chemin)
+    if entree is None:
+        return None
+    return {
+        **entree,
+        'variantes': {
+            format_image: [(largeur, default_storage.url(nom)) for largeur, nom in liste]
+            for format_image, liste in entree['variantes'].items()
+        },
+    }
@@ -0,0 +1,348 @@
+"""
+Import en masse de matchs et de joueurs depuis un fichier CSV ou XLSX.
+
+Le fichier est lu ligne par ligne ; les références (saison, championnat,
+équipes adverses, catégories) sont résolues dans des dictionnaires chargés
+une seule fois, puis les objets valides sont écrits par lots avec
+``bulk_create`` dans une transaction. Comme ``bulk_create`` n'émet pas de
+signaux, le cache des pages est invalidé explicitement à la fin (ScoreSet
+et le classement le sont par ``MatchDay.objects.bulk_create``).
+"""
+import csv
+import io
+import time
+from datetime import date, datetime
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import flux
+from .cache import invalider_modele, invalider_objets
+from .models import (
+    POINTS_SET, POINTS_TIE_BREAK, CategoryAge, CategoryGenre, ChampionnatCompetition, EquipeAdverse, Joueur,
+    MatchDay, MatchDayEquipeAdverse, Saison, set_termine, sets_termines
+)
+
+TAILLE_LOT_DEFAUT = 500
+
+FORMATS_DATE = ['%Y-%m-%d', '%d/%m/%Y']
+FORMATS_DATE_HEURE = ['%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M', '%Y-%m-%d %H:%M:%S', '%d/%m/%Y %H:%M'] + FORMATS_DATE
+
+
+class ErreurImport(Exception):
+    """Erreur bloquante (fichier illisible, dépendance manquante, ...)"""
+
+
+class ErreurLigne(ValueError):
+    """Ligne invalide : signalée puis ignorée"""
+
+
+class RapportImport:
+    def __init__(self):
+        self.lignes_lues = 0
+        self.importees = 0
+        self.erreurs = []  # [(numéro de ligne, message), ...]
+        self.duree = 0.0
+
+    @property
+    def debit(self):
+        return self.lignes_lues / self.duree if self.duree else 0.0
+
+    def __str__(self):
+        return (
+            f"{self.importees}/{self.lignes_lues} ligne(s) importée(s) en {self.duree:.2f} s "
+            f"({self.debit:.0f} lignes/s), {len(self.erreurs)} erreur(s)"
+        )
+
+
+# ==================== LECTURE ====================
+
+def lire_lignes(fichier, nom_fichier):
+    """Itère sur les lignes du fichier (dicts colonne -> texte), sans tout charger"""
+    if nom_fichier.lower().endswith('.xlsx'):
+        yield from _lire_xlsx(fichier)
+    else:
+        if isinstance(fichier.read(0), bytes):
+            fichier = io.TextIOWrapper(fichier, encoding='utf-8-sig', newline='')
+        yield from csv.DictReader(fichier, delimiter=_detecter_separateur(fichier))
+
+
+def _detecter_separateur(fichier):
+    # Excel en français exporte souvent avec des points-virgules
+    debut = fichier.readline()
+    fichier.seek(0)
+    return ';' if debut.count(';') > debut.count(',') else ','
+
+
+def _lire_xlsx(fichier):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ErreurImport("La lecture des fichiers XLSX nécessite le paquet openpyxl")
+
+    classeur = load_workbook(fichier, read_only=True, data_only=True)
+    try:
+        lignes = classeur.active.iter_rows(values_only=True)
+        entetes = [str(valeur).strip() if valeur is not None else '' for valeur in next(lignes, [])]
+        for valeurs in lignes:
+            if any(valeur is not None for valeur in valeurs):
+                yield {
+                    entete: '' if valeur is None else valeur
+                    for entete, valeur in zip(entetes, valeurs)
+                }
+    finally:
+        classeur.close()
+
+
+# ==================== CONVERSIONS ====================
+
+def _texte(ligne, colonne, obligatoire=True):
+    valeur = ligne.get(colonne)
+    valeur = '' if valeur is None else str(valeur).strip()
+    if obligatoire and not valeur:
+        raise ErreurLigne(f"colonne '{colonne}' manquante")
+    return valeur
+
+
+def _entier(ligne, colonne):
+    valeur = ligne.get(colonne)
+    if valeur is None or str(valeur).strip() == '':
+        return None
+    try:
+        entier = int(float(valeur)) if isinstance(valeur, float) else int(str(valeur).strip())
+    except ValueError:
+        raise ErreurLigne(f"'{colonne}' doit être un entier (reçu '{valeur}')")
+    if entier < 0:
+        raise ErreurLigne(f"'{colonne}' ne peut pas être négatif")
+    return entier
+
+
+def _date(ligne, colonne, formats, avec_heure):
+    valeur = ligne.get(colonne)
+    if isinstance(valeur, datetime):
+        resultat = valeur
+    elif isinstance(valeur, date):
+        resultat = datetime.combine(valeur, datetime.min.time())
+    else:
+        texte = _texte(ligne, colonne)
+        for format_date in formats:
+            try:
+                resultat = datetime.strptime(texte, format_date)
+                break
+            except ValueError:
+                continue
+        else:
+            # Format ISO avec fuseau, tel que produit par l'export (exportation.py)
+            try:
+                resultat = datetime.fromisoformat(texte)
+            except ValueError:
+                raise ErreurLigne(f"date invalide pour '{colonne}' : '{texte}'")
+    if not avec_heure:
+        return resultat.date()
+    return timezone.make_aware(resultat) if timezone.is_naive(resultat) else resultat
+
+
+def valider_scores(sets_club, sets_adverse, scores_sets):
+    """
+    Vérifie la cohérence des scores d'un match et retourne (sets_club, sets_adverse).
+
+    ``scores_sets`` : [(club, adverse), ...] pour les sets 1 à 5. Mêmes règles
+    que le modèle (``set_termine``) : seul le dernier set joué peut être en
+    cours, et les sets gagnés, quand ils ne sont pas fournis, sont déduits des
+    seuls sets terminés (voir ``MatchDay.deriver_sets``).
+    """
+    joues = []
+    for numero, (club, adverse) in enumerate(scores_sets, start=1):
+        if (club is None) != (adverse is None):
+            raise ErreurLigne(f"set {numero} : score incomplet")
+        if club is None:
+            continue
+        if club < 0 or adverse < 0:
+            raise ErreurLigne(f"set {numero} : score négatif")
+        if len(joues) != numero - 1:
+            raise ErreurLigne(f"set {numero} renseigné alors que le set {len(joues) + 1} ne l'est pas")
+        if joues and not set_termine(*joues[-1]):
+            raise ErreurLigne(f"set {numero - 1} non terminé ({joues[-1][1]}-{joues[-1][2]}) suivi d'un autre set")
+        termines = sets_termines(joues)
+        if termines is not None and max(termines) == 3:
+            raise ErreurLigne(f"set {numero} joué après la fin du match")
+        objectif = POINTS_TIE_BREAK if numero == 5 else POINTS_SET
+        if max(club, adverse) > objectif and abs(club - adverse) > 2:
+            raise ErreurLigne(f"set {numero} : score impossible ({club}-{adverse})")
+        joues.append((numero, club, adverse))
+
+    termines = sets_termines(joues)
+    if termines is not None:
+        if sets_club is None and sets_adverse is None:
+            return termines
+        if (sets_club, sets_adverse) != termines:
+            raise ErreurLigne(
+                f"sets {sets_club}-{sets_adverse} incohérents avec les sets terminés ({termines[0]}-{termines[1]})"
+            )
+    if (sets_club is None) != (sets_adverse is None):
+        raise ErreurLigne("sets_club et sets_adverse doivent être renseignés ensemble")
+    if sets_club is not None and (max(sets_club, sets_adverse) > 3 or sets_club == sets_adverse == 3):
+        raise ErreurLigne(f"score en sets invalide : {sets_club}-{sets_adverse}")
+    return sets_club, sets_adverse
+
+
+# ==================== RÉFÉRENCES ====================
+
+class CacheReferences:
+    """Tables de référence chargées une fois, indexées par nom (insensible à la casse)"""
+
+    def __init__(self):
+        self.saisons = {saison.periode.lower(): saison for saison in Saison.objects.all()}
+        self.categories_age = {categorie.nom.lower(): categorie for categorie in CategoryAge.objects.all()}
+        self.genres = {genre.genre.lower(): genre for genre in CategoryGenre.objects.all()}
+        self.equipes = {equipe.nom.lower(): equipe for equipe in EquipeAdverse.objects.all()}
+        self.championnats = {}
+        for championnat in ChampionnatCompetition.objects.all():
+            self.championnats.setdefault(championnat.nom.lower(), []).append(championnat)
+
+    def _trouver(self, table, cle, libelle):
+        try:
+            return table[cle.lower()]
+        except KeyError:
+            raise ErreurLigne(f"{libelle} inconnu(e) : '{cle}'")
+
+    def saison(self, periode):
+        return self._trouver(self.saisons, periode, 'saison')
+
+    def categorie_age(self, nom):
+        return self._trouver(self.categories_age, nom, "catégorie d'âge")
+
+    def genre(self, code):
+        return self._trouver(self.genres, code, 'genre')
+
+    def equipe(self, nom):
+        return self._trouver(self.equipes, nom, 'équipe adverse')
+
+    def championnat(self, nom, date_champ=None):
+        candidats = self._trouver(self.championnats, nom, 'championnat')
+        if date_champ is not None:
+            candidats = [c for c in candidats if c.date_champ == date_champ]
+        if len(candidats) != 1:
+            raise ErreurLigne(
+                f"championnat '{nom}' ambigu ou introuvable : précisez la colonne date_championnat"
+            )
+        return candidats[0]
+
+
+# ==================== IMPORT ====================
+
+def _ligne_match(ligne, references):
+    date_championnat = None
+    if _texte(ligne, 'date_championnat', obligatoire=False):
+        date_championnat = _date(ligne, 'date_championnat', FORMATS_DATE, avec_heure=False)
+
+    scores = {
+        f'set{i}_{camp}': _entier(ligne, f'set{i}_{camp}')
+        for i in range(1, 6) for camp in ('club', 'adverse')
+    }
+    sets_club, sets_adverse = valider_scores(
+        _entier(ligne, 'sets_club'),
+        _entier(ligne, 'sets_adverse'),
+        [(scores[f'set{i}_club'], scores[f'set{i}_adverse']) for i in range(1, 6)],
+    )
+    adversaires = [
+        references.equipe(nom.strip())
+        for nom in _texte(ligne, 'adversaires', obligatoire=False).split(';')
+        if nom.strip()
+    ]
+    match = MatchDay(
+        date_rencontre=_date(ligne, 'date_rencontre', FORMATS_DATE_HEURE, avec_heure=True),
+        lieu_rencontre=_texte(ligne, 'lieu'),
+        saison=references.saison(_texte(ligne, 'saison')),
+        championnat=references.championnat(_texte(ligne, 'championnat'), date_championnat),
+        sets_club=sets_club,
+        sets_adverse=sets_adverse,
+        **scores
+    )
+    return match, adversaires
+
+
+def _ligne_joueur(ligne, references):
+    nom_categorie = _texte(ligne, 'categorie_age', obligatoire=False)
+    return Joueur(
+        nom=_texte(ligne, 'nom'),
+        prenom=_texte(ligne, 'prenom'),
+        date_naissance=_date(ligne, 'date_naissance', FORMATS_DATE, avec_heure=False),
+        category=references.genre(_texte(ligne, 'genre')),
+        category_age=references.categorie_age(nom_categorie) if nom_categorie else None,
+    )
+
+
+def _ecrire_matchs(lot):
+    matchs = MatchDay.objects.bulk_create([match for match, _ in lot])
+    MatchDayEquipeAdverse.objects.bulk_create(
+        [
+            MatchDayEquipeAdverse(match_day=match, equipe_adverse=equipe)
+            for match, (_, adversaires) in zip(matchs, lot)
+            for equipe in adversaires
+        ],
+        ignore_conflicts=True,
+    )
+    return matchs
+
+
+def importer(lignes, type_import, taille_lot=TAILLE_LOT_DEFAUT, strict=False, sortie=None):
+    """
+    Importe des lignes de type 'matchs' ou 'joueurs' et retourne un RapportImport.
+
+    Les lignes invalides sont ignorées et listées dans le rapport ; avec
+    ``strict`` la lecture s'arrête à la première ligne invalide et tout
+    l'import est annulé.
+    """
+    if type_import not in ('matchs', 'joueurs'):
+        raise ErreurImport(f"Type d'import inconnu : {type_import}")
+
+    rapport = RapportImport()
+    references = CacheReferences()
+    construire = _ligne_match if type_import == 'matchs' else _ligne_joueur
+    ecrire = _ecrire_matchs if type_import == 'matchs' else Joueur.objects.bulk_create
+    adversaires = set()
+    debut = time.perf_counter()
+
+    def vider(lot):
+        ecrire(lot)
+        rapport.importees += len(lot)
+        if sortie is not None:
+            debit = rapport.lignes_lues / (time.perf_counter() - debut)
+            sortie(f"{rapport.importees} ligne(s) écrite(s) ({debit:.0f} lignes/s)")
+
+    with transaction.atomic():
+        lot = []
+        # Ligne 1 : en-têtes
+        for numero, ligne in enumerate(lignes, start=2):
+            rapport.lignes_lues += 1
+            try:
+                objet = construire(ligne, references)
+            except ErreurLigne as erreur:
+                rapport.erreurs.append((numero, str(erreur)))
+                if strict:
+                    break
+                continue
+            if type_import == 'matchs':
+                adversaires.update(equipe.pk for equipe in objet[1])
+            lot.append(objet)
+            if len(lot) >= taille_lot:
+                vider(lot)
+                lot = []
+
+        if strict and rapport.erreurs:
+            # Lots déjà écrits annulés avec la transaction
+            transaction.set_rollback(True)
+            rapport.importees = 0
+        elif lot:
+            vider(lot)
+
+    if rapport.importees:
+        modeles = [MatchDay, MatchDayEquipeAdverse] if type_import == 'matchs' else [Joueur]
+        for modele in modeles:
+            invalider_modele(modele)
+        invalider_objets(EquipeAdverse, adversaires)
+        if type_import == 'matchs':
+            flux.rafraichir_tout()
+    rapport.duree = time.perf_counter() - debut
+    return rapport
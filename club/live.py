@@ -0,0 +1,116 @@
+"""
+Diffusion des scores en direct (Server-Sent Events).
+
+Quand les scores d'un match changent (admin ou endpoint de saisie), un
+message est publié sur le broker ; chaque spectateur abonné au match le
+reçoit sur sa connexion SSE ouverte, sans avoir à recharger la page.
+
+Le broker par défaut vit dans le processus : il suffit avec un seul worker
+ASGI. Avec plusieurs processus, ``LIVE_SCORES_BROKER`` désigne une autre
+implémentation de ``Broker`` (Redis pub/sub, ...).
+"""
+import asyncio
+import threading
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+TAILLE_FILE_ABONNE = 100
+
+
+class Broker:
+    """Interface d'un broker de scores en direct"""
+
+    def publier(self, match_id, message):
+        """Envoie ``message`` (dict sérialisable) aux abonnés du match. Appelable depuis n'importe quel thread."""
+        raise NotImplementedError
+
+    def abonner(self, match_id):
+        """Retourne un abonnement : ``async with`` puis ``await abonnement.recevoir()``"""
+        raise NotImplementedError
+
+
+class Abonnement:
+    def __init__(self, broker, match_id):
+        self.broker = broker
+        self.match_id = match_id
+        self.file = None
+        self.boucle = None
+
+    async def __aenter__(self):
+        self.boucle = asyncio.get_running_loop()
+        self.file = asyncio.Queue(maxsize=TAILLE_FILE_ABONNE)
+        self.broker._ajouter(self)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.broker._retirer(self)
+
+    async def recevoir(self, timeout=None):
+        """Prochain message, ou None après ``timeout`` secondes sans message"""
+        try:
+            return await asyncio.wait_for(self.file.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def _deposer(self, message):
+        # Exécuté dans la boucle de l'abonné. Un spectateur trop lent perd
+        # les messages les plus anciens : seul le dernier score compte.
+        if self.file.full():
+            self.file.get_nowait()
+        self.file.put_nowait(message)
+
+
+class BrokerEnMemoire(Broker):
+    """Broker interne au processus"""
+
+    def __init__(self):
+        self._abonnements = defaultdict(set)
+        self._verrou = threading.Lock()
+
+    def _ajouter(self, abonnement):
+        with self._verrou:
+            self._abonnements[abonnement.match_id].add(abonnement)
+
+    def _retirer(self, abonnement):
+        with self._verrou:
+            abonnements = self._abonnements.get(abonnement.match_id)
+            if abonnements is not None:
+                abonnements.discard(abonnement)
+                if not abonnements:
+                    del self._abonnements[abonnement.match_id]
+
+    def nombre_abonnes(self, match_id):
+        with self._verrou:
+            return len(self._abonnements.get(match_id, ()))
+
+    def publier(self, match_id, message):
+        with self._verrou:
+            abonnements = list(self._abonnements.get(match_id, ()))
+        for abonnement in abonnements:
+            try:
+                abonnement.boucle.call_soon_threadsafe(abonnement._deposer, message)
+            except RuntimeError:
+                # Boucle fermée : la connexion a disparu sans se désabonner
+                self._retirer(abonnement)
+
+    def abonner(self, match_id):
+        return Abonnement(self, match_id)
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(settings.LIVE_SCORES_BROKER)()
+
+
+def message_score(match):
+    """Message diffusé pour l'état courant d'un match"""
+    return {
+        'match': match.pk,
+        'sets_club': match.sets_club,
+        'sets_adverse': match.sets_adverse,
+        'sets': [[club, adverse] for _, club, adverse in match.sets_joues()],
+        'score': match.score_detaille(),
+    }
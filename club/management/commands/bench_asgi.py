@@ -0,0 +1,79 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from club.models import CategoryAge, CategoryGenre
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare le débit des pages publiques servies par le gestionnaire WSGI "
+        "et par le gestionnaire ASGI, en processus, sur la base courante"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requetes', type=int, default=200, help="Requêtes par page et par gestionnaire")
+        parser.add_argument('--concurrence', type=int, default=20, help="Requêtes simultanées")
+        parser.add_argument(
+            '--avec-cache', action='store_true',
+            help="Garde le cache des pages (par défaut désactivé pour mesurer l'accès à la base)",
+        )
+
+    def urls(self):
+        urls = [
+            reverse('club:home'),
+            reverse('club:calendar'),
+            reverse('club:categories_choice'),
+            reverse('club:historique'),
+        ]
+        category_age = CategoryAge.objects.first()
+        category_genre = CategoryGenre.objects.first()
+        if category_age and category_genre:
+            urls.append(reverse('club:matchs_by_category', args=[category_genre.genre, category_age.pk]))
+        return urls
+
+    def bench_wsgi(self, url, requetes, concurrence):
+        def lot(nombre):
+            client = Client()
+            try:
+                for _ in range(nombre):
+                    client.get(url)
+            finally:
+                connections.close_all()
+
+        repartition = [requetes // concurrence + (1 if i < requetes % concurrence else 0) for i in range(concurrence)]
+        debut = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrence) as executeur:
+            list(executeur.map(lot, repartition))
+        return requetes / (time.perf_counter() - debut)
+
+    async def bench_asgi(self, url, requetes, concurrence):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrence)
+
+        async def une_requete():
+            async with semaphore:
+                await client.get(url)
+
+        debut = time.perf_counter()
+        await asyncio.gather(*(une_requete() for _ in range(requetes)))
+        return requetes / (time.perf_counter() - debut)
+
+    def handle(self, *args, **options):
+        requetes, concurrence = options['requetes'], options['concurrence']
+        reglages = {'ALLOWED_HOSTS': ['*']}
+        if not options['avec_cache']:
+            reglages['CACHES'] = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+        with override_settings(**reglages):
+            self.stdout.write(f"{'Page':<40} {'WSGI req/s':>12} {'ASGI req/s':>12} {'Ratio':>7}")
+            for url in self.urls():
+                wsgi = self.bench_wsgi(url, requetes, concurrence)
+                asgi = asyncio.run(self.bench_asgi(url, requetes, concurrence))
+                self.stdout.write(f"{url:<40} {wsgi:>12.1f} {asgi:>12.1f} {asgi / wsgi:>7.2f}")
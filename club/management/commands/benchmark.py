@@ -0,0 +1,250 @@
+import json
+import statistics
+import subprocess
+import time
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+
+from club import urls as club_urls
+from club.models import MatchDay, MatchDayEquipeAdverse
+
+# Routes non mesurées : flux SSE sans fin, saisie réservée au POST, déconnexion
+EXCLUSIONS = {
+    'live_score': "flux Server-Sent Events sans fin",
+    'saisir_score': "POST réservé au personnel",
+    'logout': "déconnecte l'utilisateur",
+}
+
+# Paramètres GET des routes qui en exigent (noms du jeu de données de `seed`)
+CHAINES_REQUETE = {
+    'recherche': 'q=rako',
+    'api_recherche': 'q=rako',
+}
+
+CENTILES = (50, 90, 95, 99)
+
+
+def _commit():
+    try:
+        sortie = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return 'inconnu'
+    return sortie.stdout.strip()
+
+
+class CompteurSql:
+    """execute_wrapper comptant les requêtes SQL et leur durée"""
+    # CaptureQueriesContext ne convient pas hors des tests : request_started
+    # vide connection.queries au début de chaque requête.
+
+    def __init__(self):
+        self.nombre = 0
+        self.duree = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        debut = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.nombre += 1
+            self.duree += time.perf_counter() - debut
+
+
+def latences(durees):
+    """Statistiques de latence en millisecondes"""
+    durees = sorted(duree * 1000 for duree in durees)
+    resultat = {
+        'min': durees[0],
+        'moyenne': statistics.fmean(durees),
+        'max': durees[-1],
+    }
+    quantiles = statistics.quantiles(durees, n=100, method='inclusive') if len(durees) > 1 else durees * 99
+    for centile in CENTILES:
+        resultat[f'p{centile}'] = quantiles[centile - 1]
+    return {cle: round(valeur, 3) for cle, valeur in resultat.items()}
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure latence (centiles), nombre de requêtes SQL et débit de chaque URL de club/urls.py ; "
+        "écrit le résultat en JSON pour comparer les commits entre eux"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requetes', type=int, default=50, help="Requêtes mesurées par URL")
+        parser.add_argument('--sortie', help="Fichier JSON (par défaut : .cache/benchmarks/<commit>.json)")
+        parser.add_argument('--comparer', help="Résultat JSON de référence à comparer")
+        parser.add_argument(
+            '--seuil', type=float,
+            help="Échoue si le p95 d'une URL augmente de plus de ce pourcentage, ou si ses requêtes SQL augmentent",
+        )
+        parser.add_argument('--utilisateur', help="Mesure en étant connecté avec ce nom d'utilisateur")
+        parser.add_argument(
+            '--avec-cache', action='store_true',
+            help="Garde le cache des pages (par défaut désactivé pour mesurer l'accès à la base)",
+        )
+        parser.add_argument('--filtre', help="Ne mesure que les routes dont le nom contient ce texte")
+
+    # ==================== URLS ====================
+
+    def parametres(self):
+        """Valeurs des paramètres d'URL, prises sur un match existant"""
+        match = (
+            MatchDay.objects.select_related('championnat__category_genre')
+            .filter(championnat__category_age__isnull=False, championnat__category_genre__isnull=False)
+            .order_by('-date_rencontre').first()
+        )
+        if match is None:
+            return {}
+        parametres = {
+            'match_id': match.pk,
+            'genre': match.championnat.category_genre.genre,
+            'age_id': match.championnat.category_age_id,
+        }
+        equipe_id = (
+            MatchDayEquipeAdverse.objects.filter(match_day=match)
+            .values_list('equipe_adverse_id', flat=True).first()
+        )
+        if equipe_id is not None:
+            parametres['equipe_id'] = equipe_id
+        return parametres
+
+    def urls(self, filtre=None):
+        """[(nom, url ou None, raison de l'exclusion)] pour chaque route nommée de club/urls.py"""
+        parametres = self.parametres()
+        routes = []
+        for motif in club_urls.urlpatterns:
+            if not isinstance(motif, URLPattern) or not motif.name:
+                continue
+            if filtre and filtre not in motif.name:
+                continue
+            if motif.name in EXCLUSIONS:
+                routes.append((motif.name, None, EXCLUSIONS[motif.name]))
+                continue
+            noms = list(motif.pattern.converters)
+            manquants = [nom for nom in noms if nom not in parametres]
+            if manquants:
+                routes.append((motif.name, None, f"aucune valeur pour {', '.join(manquants)} (lancer seed ?)"))
+                continue
+            url = reverse(f'{club_urls.app_name}:{motif.name}', kwargs={nom: parametres[nom] for nom in noms})
+            if motif.name in CHAINES_REQUETE:
+                url = f"{url}?{CHAINES_REQUETE[motif.name]}"
+            routes.append((motif.name, url, None))
+        return routes
+
+    # ==================== MESURES ====================
+
+    def requete(self, client, url):
+        response = client.get(url)
+        if response.streaming:
+            taille = sum(len(morceau) for morceau in response.streaming_content)
+        else:
+            taille = len(response.content)
+        return response, taille
+
+    def mesurer(self, client, url, nombre):
+        # Première requête (à chaud ensuite) : nombre de requêtes SQL
+        compteur = CompteurSql()
+        with connection.execute_wrapper(compteur):
+            response, taille = self.requete(client, url)
+
+        durees = []
+        debut = time.perf_counter()
+        for _ in range(nombre):
+            depart = time.perf_counter()
+            self.requete(client, url)
+            durees.append(time.perf_counter() - depart)
+        total = time.perf_counter() - debut
+
+        return {
+            'url': url,
+            'statut': response.status_code,
+            'octets': taille,
+            'requetes_sql': compteur.nombre,
+            'duree_sql_ms': round(compteur.duree * 1000, 3),
+            'latence_ms': latences(durees),
+            'debit_rps': round(nombre / total, 1),
+        }
+
+    def handle(self, *args, **options):
+        if options['requetes'] < 1:
+            raise CommandError("--requetes doit être au moins 1")
+        reference = None
+        if options['comparer']:
+            try:
+                reference = json.loads(Path(options['comparer']).read_text(encoding='utf-8'))
+            except (OSError, ValueError) as erreur:
+                raise CommandError(f"Référence illisible : {erreur}")
+
+        # Une page en erreur est mesurée (statut 500) au lieu d'interrompre la série
+        client = Client(raise_request_exception=False)
+        if options['utilisateur']:
+            utilisateur = get_user_model().objects.filter(username=options['utilisateur']).first()
+            if utilisateur is None:
+                raise CommandError(f"Utilisateur inconnu : {options['utilisateur']}")
+            client.force_login(utilisateur)
+
+        reglages = {'ALLOWED_HOSTS': ['*']}
+        if not options['avec_cache']:
+            reglages['CACHES'] = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+        resultats = {}
+        with override_settings(**reglages):
+            for nom, url, raison in self.urls(options['filtre']):
+                if url is None:
+                    self.stdout.write(f"{nom:<24} ignorée : {raison}")
+                    continue
+                resultats[nom] = mesure = self.mesurer(client, url, options['requetes'])
+                latence = mesure['latence_ms']
+                self.stdout.write(
+                    f"{nom:<24} {mesure['statut']:>3}  p50 {latence['p50']:>8.2f} ms  p95 {latence['p95']:>8.2f} ms  "
+                    f"{mesure['requetes_sql']:>3} SQL  {mesure['debit_rps']:>8.1f} req/s"
+                )
+
+        rapport = {
+            'commit': _commit(),
+            'date': timezone.now().isoformat(),
+            'django': django.get_version(),
+            'base': connection.vendor,
+            'requetes_par_url': options['requetes'],
+            'cache': options['avec_cache'],
+            'connecte': bool(options['utilisateur']),
+            'urls': resultats,
+        }
+        sortie = Path(options['sortie'] or Path(settings.BASE_DIR) / '.cache' / 'benchmarks' / f"{rapport['commit']}.json")
+        sortie.parent.mkdir(parents=True, exist_ok=True)
+        sortie.write_text(json.dumps(rapport, indent=2, ensure_ascii=False), encoding='utf-8')
+        self.stdout.write(self.style.SUCCESS(f"Résultats écrits dans {sortie}"))
+
+        if reference is not None:
+            self.comparer(reference, rapport, options['seuil'])
+
+    # ==================== COMPARAISON ====================
+
+    def comparer(self, reference, rapport, seuil):
+        self.stdout.write(f"\nComparaison avec {reference.get('commit', '?')} :")
+        regressions = []
+        for nom, mesure in rapport['urls'].items():
+            avant = reference.get('urls', {}).get(nom)
+            if avant is None:
+                continue
+            p95_avant, p95 = avant['latence_ms']['p95'], mesure['latence_ms']['p95']
+            variation = (p95 - p95_avant) / p95_avant * 100 if p95_avant else 0.0
+            sql = mesure['requetes_sql'] - avant['requetes_sql']
+            self.stdout.write(f"{nom:<24} p95 {p95_avant:>8.2f} -> {p95:>8.2f} ms ({variation:+6.1f} %)  SQL {sql:+d}")
+            if seuil is not None and (variation > seuil or sql > 0):
+                regressions.append(nom)
+        if regressions:
+            raise CommandError(f"Régression sur : {', '.join(regressions)}")
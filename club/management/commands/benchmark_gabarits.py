@@ -0,0 +1,99 @@
+import json
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.template import Template, engines
+from django.test import Client
+from django.test.signals import template_rendered
+from django.test.utils import instrumented_test_render, override_settings
+
+from club.management.commands.benchmark import Command as Benchmark, _commit, latences
+
+CACHES_MESURES = {
+    # Fragments toujours recalculés : coût complet du gabarit
+    'froid': {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}},
+    # Fragments déjà en cache : coût de chaque requête en régime établi
+    'chaud': {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark-gabarits'}},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure le temps de rendu du gabarit principal de chaque URL de club/urls.py, "
+        "fragments en cache (chaud) ou non (froid), avec le contexte réel de la vue"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rendus', type=int, default=200, help="Rendus mesurés par gabarit")
+        parser.add_argument('--sortie', help="Fichier JSON (par défaut : .cache/benchmarks/gabarits-<commit>.json)")
+        parser.add_argument('--filtre', help="Ne mesure que les routes dont le nom contient ce texte")
+
+    def capturer(self, filtre):
+        """{route: (nom du gabarit, contexte aplati, requête)} du premier gabarit rendu par chaque vue"""
+        captures = {}
+        courant = {}
+
+        def enregistrer(sender, template, context, **kwargs):
+            if 'gabarit' not in courant and template.name:
+                courant['gabarit'] = (template.name, context.flatten())
+
+        client = Client(raise_request_exception=False)
+        rendu_normal = Template._render
+        # Comme le lanceur de tests : Template._render émet template_rendered
+        Template._render = instrumented_test_render
+        template_rendered.connect(enregistrer)
+        try:
+            for nom, url, raison in Benchmark().urls(filtre):
+                if url is None:
+                    self.stdout.write(f"{nom:<24} ignorée : {raison}")
+                    continue
+                courant.clear()
+                response = client.get(url)
+                if response.status_code != 200 or 'gabarit' not in courant:
+                    self.stdout.write(f"{nom:<24} ignorée : statut {response.status_code}, aucun gabarit rendu")
+                    continue
+                captures[nom] = (*courant['gabarit'], response.wsgi_request)
+        finally:
+            template_rendered.disconnect(enregistrer)
+            Template._render = rendu_normal
+        return captures
+
+    def mesurer(self, gabarit, contexte, request, nombre):
+        moteur = engines.all()[0]
+        resultats = {}
+        for regime, caches in CACHES_MESURES.items():
+            with override_settings(CACHES=caches):
+                gabarit_compile = moteur.get_template(gabarit)
+                gabarit_compile.render(contexte, request)  # remplit le cache des fragments
+                durees = []
+                for _ in range(nombre):
+                    depart = time.perf_counter()
+                    gabarit_compile.render(contexte, request)
+                    durees.append(time.perf_counter() - depart)
+            resultats[regime] = latences(durees)
+        return resultats
+
+    def handle(self, *args, **options):
+        if options['rendus'] < 1:
+            raise CommandError("--rendus doit être au moins 1")
+
+        resultats = {}
+        with override_settings(ALLOWED_HOSTS=['*']):
+            for nom, (gabarit, contexte, request) in self.capturer(options['filtre']).items():
+                mesure = self.mesurer(gabarit, contexte, request, options['rendus'])
+                resultats[nom] = {'gabarit': gabarit, **mesure}
+                self.stdout.write(
+                    f"{nom:<24} {gabarit:<32} froid p50 {mesure['froid']['p50']:>7.3f} ms  "
+                    f"chaud p50 {mesure['chaud']['p50']:>7.3f} ms"
+                )
+
+        commit = _commit()
+        sortie = Path(options['sortie'] or Path(settings.BASE_DIR) / '.cache' / 'benchmarks' / f"gabarits-{commit}.json")
+        sortie.parent.mkdir(parents=True, exist_ok=True)
+        sortie.write_text(
+            json.dumps({'commit': commit, 'rendus': options['rendus'], 'gabarits': resultats}, indent=2, ensure_ascii=False),
+            encoding='utf-8',
+        )
+        self.stdout.write(self.style.SUCCESS(f"Résultats écrits dans {sortie}"))
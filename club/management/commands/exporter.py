@@ -0,0 +1,44 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from club.exportation import FORMATS, TAILLE_LOT, exporter, lignes_joueurs, lignes_matchs
+from club.models import CategoryAge, Joueur, MatchDay, Saison
+
+
+class Command(BaseCommand):
+    help = "Exporte les matchs ou l'effectif en CSV ou JSON Lines, en mémoire constante"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--type', choices=['matchs', 'joueurs'], default='matchs', dest='type_export')
+        parser.add_argument('--format', choices=list(FORMATS), default='csv', dest='format_export')
+        parser.add_argument('--saison', action='append', help="Période à exporter (répétable). Par défaut : toutes.")
+        parser.add_argument('--categorie-age', help="Nom de la catégorie d'âge (export des joueurs)")
+        parser.add_argument('--sortie', help="Fichier de sortie (par défaut : sortie standard)")
+        parser.add_argument('--lot', type=int, default=TAILLE_LOT, help="Lignes lues par lot")
+
+    def handle(self, *args, **options):
+        if options['type_export'] == 'matchs':
+            queryset = MatchDay.objects.all()
+            if options['saison']:
+                saisons = Saison.objects.filter(periode__in=options['saison'])
+                if saisons.count() != len(set(options['saison'])):
+                    raise CommandError("Saison inconnue parmi : " + ', '.join(options['saison']))
+                queryset = queryset.filter(saison__in=saisons)
+            lignes = lignes_matchs(queryset, options['lot'])
+        else:
+            queryset = Joueur.objects.all()
+            if options['categorie_age']:
+                try:
+                    categorie = CategoryAge.objects.get(nom=options['categorie_age'])
+                except CategoryAge.DoesNotExist:
+                    raise CommandError(f"Catégorie d'âge inconnue : {options['categorie_age']}")
+                queryset = queryset.filter(category_age=categorie)
+            lignes = lignes_joueurs(queryset, options['lot'])
+
+        morceaux = exporter(lignes, options['format_export'])
+        if options['sortie']:
+            with open(options['sortie'], 'w', encoding='utf-8', newline='') as fichier:
+                fichier.writelines(morceaux)
+        else:
+            sys.stdout.writelines(morceaux)
@@ -0,0 +1,38 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from club.images import generer_tout, sources
+
+
+class Command(BaseCommand):
+    help = "Génère les variantes WebP/JPEG redimensionnées des images de la galerie (pool de processus)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('chemins', nargs='*', help="Chemins statiques (défaut : toutes les images de IMAGES['SOURCES'])")
+        parser.add_argument('--processus', type=int, default=os.cpu_count(), help="Nombre de processus")
+        parser.add_argument('--forcer', action='store_true', help="Recalcule les variantes déjà présentes")
+
+    def handle(self, *args, **options):
+        chemins = options['chemins'] or sources()
+        if not chemins:
+            raise CommandError("Aucune image source trouvée dans les fichiers statiques")
+
+        debut = time.perf_counter()
+        try:
+            resultats = generer_tout(chemins, processus=options['processus'], forcer=options['forcer'])
+        except RuntimeError as erreur:
+            raise CommandError(str(erreur))
+
+        erreurs = {chemin: message for chemin, message in resultats.items() if isinstance(message, str)}
+        for chemin, message in erreurs.items():
+            self.stderr.write(f"{chemin} : {message}")
+        variantes = sum(
+            len(liste) for entree in resultats.values() if isinstance(entree, dict)
+            for liste in entree['variantes'].values()
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(resultats) - len(erreurs)} image(s), {variantes} variante(s) "
+            f"en {time.perf_counter() - debut:.1f} s ({options['processus']} processus)"
+        ))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from club.importation import TAILLE_LOT_DEFAUT, ErreurImport, importer, lire_lignes
+
+
+class Command(BaseCommand):
+    help = "Importe des matchs ou des joueurs depuis un fichier CSV ou XLSX"
+
+    def add_arguments(self, parser):
+        parser.add_argument('fichier', help="Chemin du fichier .csv ou .xlsx")
+        parser.add_argument('--type', choices=['matchs', 'joueurs'], default='matchs', dest='type_import')
+        parser.add_argument('--lot', type=int, default=TAILLE_LOT_DEFAUT, help="Taille des lots bulk_create")
+        parser.add_argument(
+            '--strict', action='store_true',
+            help="S'arrête à la première ligne invalide et annule tout l'import",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['fichier'], 'rb') as fichier:
+                rapport = importer(
+                    lire_lignes(fichier, options['fichier']),
+                    options['type_import'],
+                    taille_lot=options['lot'],
+                    strict=options['strict'],
+                    sortie=self.stdout.write,
+                )
+        except (OSError, ErreurImport) as erreur:
+            raise CommandError(str(erreur))
+
+        for numero, message in rapport.erreurs:
+            self.stderr.write(f"Ligne {numero} : {message}")
+        style = self.style.WARNING if rapport.erreurs else self.style.SUCCESS
+        self.stdout.write(style(str(rapport)))
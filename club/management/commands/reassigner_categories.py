@@ -0,0 +1,52 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from club.categories import TAILLE_LOT, date_reference, reassigner
+from club.models import CategoryAge, Saison
+
+
+class Command(BaseCommand):
+    help = "Réattribue la catégorie d'âge de tous les joueurs (changement de saison)"
+
+    def add_arguments(self, parser):
+        reference = parser.add_mutually_exclusive_group()
+        reference.add_argument(
+            '--saison',
+            help="Période de la nouvelle saison (ex : 2025-2026). Par défaut : la plus récente.",
+        )
+        reference.add_argument('--date', help="Date de référence explicite (AAAA-MM-JJ)")
+        parser.add_argument('--lot', type=int, default=TAILLE_LOT, help="Joueurs écrits par lot")
+        parser.add_argument('--simulation', action='store_true', help="Affiche les changements sans les écrire")
+
+    def reference(self, options):
+        if options['date']:
+            try:
+                return date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError(f"Date invalide : {options['date']}")
+
+        if options['saison']:
+            saison = Saison.objects.filter(periode=options['saison']).first()
+            if saison is None:
+                raise CommandError(f"Saison inconnue : {options['saison']}")
+        else:
+            saison = Saison.objects.order_by('-periode').first()
+            if saison is None:
+                raise CommandError("Aucune saison : précisez --date")
+        try:
+            return date_reference(saison)
+        except ValueError as erreur:
+            raise CommandError(str(erreur))
+
+    def handle(self, *args, **options):
+        reference = self.reference(options)
+        deplacements = reassigner(reference, taille_lot=options['lot'], simulation=options['simulation'])
+
+        noms = dict(CategoryAge.objects.values_list('pk', 'nom'))
+        for categorie_id, nombre in sorted(deplacements.items(), key=lambda item: -item[1]):
+            self.stdout.write(f"  {noms.get(categorie_id, 'Sans catégorie'):<30} {nombre:>6}")
+        verbe = "seraient déplacé(s)" if options['simulation'] else "déplacé(s)"
+        self.stdout.write(self.style.SUCCESS(
+            f"{sum(deplacements.values())} joueur(s) {verbe} (âges au {reference:%d/%m/%Y})"
+        ))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from club.classement import reconstruire
+from club.models import Saison, ScoreSet
+
+
+class Command(BaseCommand):
+    help = "Recalcule le classement précalculé à partir des matchs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--saison',
+            help="Période de la saison à recalculer (ex : 2024-2025). Par défaut : toutes.",
+        )
+        parser.add_argument(
+            '--scores-sets', action='store_true',
+            help="Recopie aussi les scores par set dans ScoreSet (après un loaddata ou un import SQL brut)",
+        )
+
+    def handle(self, *args, **options):
+        saison = None
+        if options['saison']:
+            try:
+                saison = Saison.objects.get(periode=options['saison'])
+            except Saison.DoesNotExist:
+                raise CommandError(f"Saison inconnue : {options['saison']}")
+
+        if options['scores_sets']:
+            nombre = ScoreSet.objects.reconstruire()
+            self.stdout.write(self.style.SUCCESS(f"{nombre} score(s) de set recopié(s)"))
+
+        nombre = reconstruire(saison=saison)
+        self.stdout.write(self.style.SUCCESS(f"{nombre} ligne(s) de classement recalculée(s)"))
@@ -0,0 +1,212 @@
+import random
+from datetime import date, datetime, time, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from club import classement, flux
+from club.cache import invalider_modele, invalider_objets
+from club.categories import reassigner
+from club.models import (
+    CategoryAge, CategoryGenre, ChampionnatCompetition, Classement, EquipeAdverse,
+    Joueur, MatchDay, MatchDayEquipeAdverse, Saison, ScoreSet
+)
+from club.signals import MODELES_EN_CACHE
+
+TAILLE_LOT = 2000
+
+CATEGORIES_AGE = [('U13', 11, 12), ('U15', 13, 14), ('U17', 15, 16), ('U19', 17, 18), ('U21', 19, 20), ('Senior', 21, None)]
+
+NOMS = [
+    'Rakoto', 'Rabe', 'Randria', 'Rasoa', 'Ravelo', 'Razafy', 'Rajaona', 'Andria',
+    'Ranaivo', 'Rakotobe', 'Rasolo', 'Ramanana', 'Raharison', 'Rafidy', 'Rabemananjara',
+]
+PRENOMS = [
+    'Hery', 'Soa', 'Fara', 'Tiana', 'Mamy', 'Nirina', 'Lova', 'Faly', 'Aina', 'Voahirana',
+    'Tahina', 'Haja', 'Onja', 'Miora', 'Toky', 'Fenitra', 'Ny Aina', 'Rova',
+]
+VILLES = ['Antananarivo', 'Toamasina', 'Antsirabe', 'Fianarantsoa', 'Mahajanga', 'Toliara', 'Antsiranana']
+LIEUX = ['Gymnase couvert de Mahamasina', 'Palais des sports', 'Gymnase ASI', 'Terrain municipal']
+
+
+class Command(BaseCommand):
+    help = (
+        "Génère un jeu de données volumineux et reproductible (saisons, championnats, "
+        "équipes adverses, matchs avec scores par set, joueurs) par insertions groupées"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--graine', type=int, default=42, help="Graine aléatoire : même graine, mêmes données")
+        parser.add_argument('--saisons', type=int, default=5, help="Nombre de saisons")
+        parser.add_argument(
+            '--annee', type=int,
+            help="Année de fin de la dernière saison (par défaut : la saison en cours, pour avoir des matchs à venir)",
+        )
+        parser.add_argument('--matchs', type=int, default=2000, help="Matchs par saison")
+        parser.add_argument('--adversaires', type=int, default=200, help="Nombre d'équipes adverses")
+        parser.add_argument('--joueurs', type=int, default=1500, help="Nombre de joueurs")
+        parser.add_argument(
+            '--a-venir', type=float, default=0.1,
+            help="Part des matchs de la dernière saison laissés sans score (matchs à venir)",
+        )
+        parser.add_argument('--vider', action='store_true', help="Supprime d'abord les données existantes du club")
+
+    def handle(self, *args, **options):
+        self.hasard = random.Random(options['graine'])
+        if options['annee'] is None:
+            aujourd_hui = timezone.localdate()
+            options['annee'] = aujourd_hui.year + 1 if aujourd_hui.month >= 9 else aujourd_hui.year
+
+        with transaction.atomic():
+            if options['vider']:
+                self.vider()
+            genres = self.genres()
+            ages = self.categories_age()
+            saisons = self.saisons(options['saisons'], options['annee'])
+            championnats = self.championnats(saisons, genres, ages)
+            adversaires = self.adversaires(options['adversaires'], genres, ages)
+            nb_matchs = self.matchs(saisons, championnats, adversaires, options['matchs'], options['a_venir'])
+            nb_joueurs = self.joueurs(options['joueurs'], genres, options['annee'])
+
+        # bulk_create n'émet aucun signal : tables dérivées et cache à la main
+        classement.reconstruire()
+        for modele in MODELES_EN_CACHE:
+            invalider_modele(modele)
+        invalider_objets(EquipeAdverse, [equipe.pk for equipe in adversaires])
+        flux.rafraichir_tout()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(saisons)} saison(s), {len(championnats)} championnat(s), {len(adversaires)} adversaire(s), "
+            f"{nb_matchs} match(s), {nb_joueurs} joueur(s) générés (graine {options['graine']})"
+        ))
+
+    def vider(self):
+        for modele in (ScoreSet, MatchDayEquipeAdverse, MatchDay, Classement, ChampionnatCompetition,
+                       EquipeAdverse, Joueur, Saison):
+            modele.objects.all().delete()
+
+    # ==================== RÉFÉRENCES ====================
+
+    def genres(self):
+        return [CategoryGenre.objects.get_or_create(genre=genre)[0] for genre, _ in CategoryGenre.GENRE_CHOICES]
+
+    def categories_age(self):
+        return [
+            CategoryAge.objects.get_or_create(nom=nom, defaults={'age_min': age_min, 'age_max': age_max})[0]
+            for nom, age_min, age_max in CATEGORIES_AGE
+        ]
+
+    def saisons(self, nombre, annee_fin):
+        saisons = []
+        for annee in range(annee_fin - nombre, annee_fin):
+            saison, _ = Saison.objects.get_or_create(periode=f'{annee}-{annee + 1}')
+            saisons.append(saison)
+        return saisons
+
+    def championnats(self, saisons, genres, ages):
+        """Un championnat par saison et par catégorie (âge × genre)"""
+        return ChampionnatCompetition.objects.bulk_create([
+            ChampionnatCompetition(
+                nom=f'Championnat {age.nom} {genre.genre} {saison.periode}',
+                date_champ=date(int(saison.periode[:4]), 10, 1),
+                lieu_deroulement=self.hasard.choice(VILLES),
+                category_age=age,
+                category_genre=genre,
+            )
+            for saison in saisons for genre in genres for age in ages
+        ])
+
+    def adversaires(self, nombre, genres, ages):
+        return EquipeAdverse.objects.bulk_create([
+            EquipeAdverse(
+                nom=f'{self.hasard.choice(VILLES)} VB {numero + 1}',
+                category_genre=self.hasard.choice(genres),
+                category_age=self.hasard.choice(ages),
+            )
+            for numero in range(nombre)
+        ])
+
+    # ==================== MATCHS ====================
+
+    def score_set(self, numero, club_gagne):
+        objectif = 15 if numero == 5 else 25
+        perdant = self.hasard.randint(max(0, objectif - 17), objectif + 3)
+        gagnant = max(objectif, perdant + 2)
+        if perdant >= objectif - 1:
+            gagnant = perdant + 2
+        return (gagnant, perdant) if club_gagne else (perdant, gagnant)
+
+    def scores_match(self):
+        """Scores d'un match complet au meilleur des cinq sets"""
+        club_gagne = self.hasard.random() < 0.55
+        sets_perdant = self.hasard.choice([0, 1, 2])
+        ordre = [True] * 3 + [False] * sets_perdant
+        self.hasard.shuffle(ordre)
+        # Le dernier set est toujours remporté par le vainqueur du match
+        ordre.remove(True)
+        ordre.append(True)
+        scores = {}
+        for numero, gagne_par_vainqueur in enumerate(ordre, start=1):
+            club, adverse = self.score_set(numero, gagne_par_vainqueur == club_gagne)
+            scores[f'set{numero}_club'] = club
+            scores[f'set{numero}_adverse'] = adverse
+        scores['sets_club'] = 3 if club_gagne else sets_perdant
+        scores['sets_adverse'] = sets_perdant if club_gagne else 3
+        return scores
+
+    def matchs(self, saisons, championnats, adversaires, par_saison, part_a_venir):
+        par_categorie = {}
+        for equipe in adversaires:
+            par_categorie.setdefault((equipe.category_genre_id, equipe.category_age_id), []).append(equipe)
+
+        total = 0
+        for index_saison, saison in enumerate(saisons):
+            debut = datetime.combine(date(int(saison.periode[:4]), 9, 1), time(15), tzinfo=timezone.get_current_timezone())
+            duree = timedelta(days=300)
+            championnats_saison = [c for c in championnats if c.date_champ.year == int(saison.periode[:4])]
+            a_venir_depuis = par_saison * (1 - part_a_venir) if index_saison == len(saisons) - 1 else par_saison
+
+            lot = []
+            for numero in range(par_saison):
+                championnat = self.hasard.choice(championnats_saison)
+                candidats = par_categorie.get((championnat.category_genre_id, championnat.category_age_id)) or adversaires
+                match = MatchDay(
+                    date_rencontre=debut + duree * numero / par_saison,
+                    lieu_rencontre=self.hasard.choice(LIEUX),
+                    championnat=championnat,
+                    saison=saison,
+                    **(self.scores_match() if numero < a_venir_depuis else {})
+                )
+                lot.append((match, self.hasard.choice(candidats)))
+                if len(lot) >= TAILLE_LOT:
+                    total += self.ecrire_matchs(lot)
+                    lot = []
+            if lot:
+                total += self.ecrire_matchs(lot)
+        return total
+
+    def ecrire_matchs(self, lot):
+        matchs = MatchDay.objects.bulk_create([match for match, _ in lot])
+        MatchDayEquipeAdverse.objects.bulk_create([
+            MatchDayEquipeAdverse(match_day=match, equipe_adverse=equipe)
+            for match, (_, equipe) in zip(matchs, lot)
+        ])
+        return len(matchs)
+
+    # ==================== JOUEURS ====================
+
+    def joueurs(self, nombre, genres, annee):
+        debut = date(annee - 35, 1, 1)
+        etendue = (date(annee - 11, 12, 31) - debut).days
+        joueurs = Joueur.objects.bulk_create([
+            Joueur(
+                nom=self.hasard.choice(NOMS),
+                prenom=self.hasard.choice(PRENOMS),
+                date_naissance=debut + timedelta(days=self.hasard.randrange(etendue)),
+                category=self.hasard.choice(genres),
+            )
+            for _ in range(nombre)
+        ], batch_size=TAILLE_LOT)
+        reassigner(date(annee - 1, 12, 31))
+        return len(joueurs)
@@ -0,0 +1,57 @@
+import hashlib
+import re
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+from urllib.request import Request, urlopen
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from club.statiques import reglages
+
+# Un navigateur récent : Google Fonts ne renvoie alors que du woff2
+AGENT = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'
+URL_CSS = re.compile(r'url\(\s*["\']?([^"\')]+)["\']?\s*\)')
+
+
+class Command(BaseCommand):
+    help = "Télécharge les polices (Google Fonts, Font Awesome) dans club/static pour ne plus dépendre des CDN"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--delai', type=float, default=30, help="Délai réseau en secondes")
+
+    def telecharger(self, url, delai):
+        try:
+            with urlopen(Request(url, headers={'User-Agent': AGENT}), timeout=delai) as reponse:
+                return reponse.read()
+        except OSError as erreur:
+            raise CommandError(f"Téléchargement impossible ({url}) : {erreur}")
+
+    def handle(self, *args, **options):
+        statiques = Path(apps.get_app_config('club').path) / 'static'
+        dossier_polices = statiques / 'fonts'
+        dossier_polices.mkdir(parents=True, exist_ok=True)
+
+        feuilles = []
+        for url_feuille in reglages()['POLICES']:
+            css = self.telecharger(url_feuille, options['delai']).decode('utf-8')
+
+            def localiser(correspondance):
+                url = urljoin(url_feuille, correspondance.group(1))
+                if url.startswith('data:'):
+                    return correspondance.group(0)
+                nom = Path(urlsplit(url).path).name
+                # Google Fonts nomme ses fichiers par leur contenu : on garde un nom court et stable
+                nom = f"{hashlib.sha1(url.encode()).hexdigest()[:10]}-{nom}"[-60:]
+                fichier = dossier_polices / nom
+                if not fichier.exists():
+                    fichier.write_bytes(self.telecharger(url, options['delai']))
+                return f'url("../fonts/{nom}")'
+
+            feuilles.append(f"/* {url_feuille} */\n" + URL_CSS.sub(localiser, css))
+
+        sortie = statiques / 'css' / 'polices.css'
+        sortie.write_text('\n'.join(feuilles), encoding='utf-8')
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(feuilles)} feuille(s) de polices écrite(s) dans {sortie.relative_to(statiques.parent)}"
+        ))
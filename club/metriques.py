@@ -0,0 +1,199 @@
+"""
+Métriques en mémoire du processus, exposées au format texte de Prometheus.
+
+Le middleware (middleware.py) ouvre une ``Mesure`` par requête échantillonnée
+et la place dans une ContextVar ; le compteur SQL (branché sur chaque
+connexion), le moteur de gabarits instrumenté et le cache des pages y
+ajoutent leurs chiffres. Les ContextVar suivent sync_to_async : les requêtes
+SQL des vues asynchrones sont donc bien attribuées.
+
+Chaque processus a ses propres histogrammes : derrière plusieurs workers,
+Prometheus agrège les séries de chaque processus.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.template.backends.django import DjangoTemplates, Template, reraise
+from django.template.exceptions import TemplateDoesNotExist
+
+REGLAGES_DEFAUT = {
+    'ACTIVE': True,
+    # Part des requêtes instrumentées (0 : aucune, 1 : toutes)
+    'ECHANTILLONNAGE': 1.0,
+    # Requêtes journalisées en JSON au-delà de cette durée (None : jamais)
+    'SEUIL_LENT_MS': 500,
+    # Accès à /metrics/ sans être membre du staff : en-tête « Authorization: Bearer <jeton> »
+    'JETON': None,
+    # Adresses autorisées sans jeton (vide par défaut : derrière un proxy
+    # local, REMOTE_ADDR vaut 127.0.0.1 pour tous les visiteurs)
+    'IPS_AUTORISEES': (),
+}
+
+SECONDES = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+NOMBRES = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+_mesure_courante = ContextVar('mesure_courante', default=None)
+
+
+def reglages():
+    return {**REGLAGES_DEFAUT, **getattr(settings, 'METRIQUES', {})}
+
+
+# ==================== SÉRIES ====================
+
+class Histogramme:
+    """Histogramme cumulatif à bornes fixes (type « histogram » de Prometheus)"""
+
+    def __init__(self, bornes):
+        self.bornes = bornes
+        self.compteurs = [0] * (len(bornes) + 1)  # dernier : +Inf
+        self.somme = 0.0
+        self.nombre = 0
+
+    def observer(self, valeur):
+        self.compteurs[bisect_left(self.bornes, valeur)] += 1
+        self.somme += valeur
+        self.nombre += 1
+
+    def lignes(self, nom, etiquettes):
+        cumul = 0
+        for borne, compteur in zip(list(self.bornes) + ['+Inf'], self.compteurs):
+            cumul += compteur
+            yield f'{nom}_bucket{_etiquettes({**etiquettes, "le": borne})} {cumul}'
+        yield f'{nom}_sum{_etiquettes(etiquettes)} {self.somme:.6f}'
+        yield f'{nom}_count{_etiquettes(etiquettes)} {self.nombre}'
+
+
+class Registre:
+    """Séries indexées par (métrique, étiquettes), protégées par un verrou"""
+
+    def __init__(self):
+        self.verrou = threading.Lock()
+        self.histogrammes = {}
+        self.compteurs = {}
+
+    def observer(self, nom, etiquettes, valeur, bornes=SECONDES):
+        cle = (nom, tuple(sorted(etiquettes.items())))
+        with self.verrou:
+            histogramme = self.histogrammes.get(cle)
+            if histogramme is None:
+                histogramme = self.histogrammes[cle] = Histogramme(bornes)
+            histogramme.observer(valeur)
+
+    def incrementer(self, nom, etiquettes, valeur=1):
+        cle = (nom, tuple(sorted(etiquettes.items())))
+        with self.verrou:
+            self.compteurs[cle] = self.compteurs.get(cle, 0) + valeur
+
+    def vider(self):
+        with self.verrou:
+            self.histogrammes.clear()
+            self.compteurs.clear()
+
+    def exposition(self):
+        """Texte au format d'exposition Prometheus 0.0.4"""
+        lignes = []
+        with self.verrou:
+            for (nom, etiquettes), valeur in sorted(self.compteurs.items()):
+                lignes.append(f'{nom}{_etiquettes(dict(etiquettes))} {valeur}')
+            for (nom, etiquettes), histogramme in sorted(self.histogrammes.items()):
+                lignes.extend(histogramme.lignes(nom, dict(etiquettes)))
+        types = sorted(
+            {(nom, 'counter') for nom, _ in self.compteurs} | {(nom, 'histogram') for nom, _ in self.histogrammes}
+        )
+        entetes = [f'# TYPE {nom} {type_metrique}' for nom, type_metrique in types]
+        return '\n'.join(entetes + lignes) + '\n'
+
+
+def _echapper(valeur):
+    return str(valeur).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _etiquettes(etiquettes):
+    if not etiquettes:
+        return ''
+    return '{' + ','.join(f'{cle}="{_echapper(valeur)}"' for cle, valeur in etiquettes.items()) + '}'
+
+
+registre = Registre()
+
+
+# ==================== MESURE D'UNE REQUÊTE ====================
+
+class Mesure:
+    """Chiffres d'une requête HTTP en cours"""
+
+    def __init__(self):
+        self.sql_nombre = 0
+        self.sql_duree = 0.0
+        self.gabarits_duree = 0.0
+        self.cache_trouve = 0
+        self.cache_manque = 0
+
+    def demarrer(self):
+        return _mesure_courante.set(self)
+
+    @staticmethod
+    def terminer(jeton):
+        _mesure_courante.reset(jeton)
+
+
+def compter_sql(execute, sql, params, many, context):
+    """execute_wrapper installé sur chaque connexion (voir ClubConfig.ready)"""
+    mesure = _mesure_courante.get()
+    if mesure is None:
+        return execute(sql, params, many, context)
+    debut = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        mesure.sql_nombre += 1
+        mesure.sql_duree += time.perf_counter() - debut
+
+
+def brancher_connexion(sender, connection, **kwargs):
+    """Receveur de connection_created"""
+    if compter_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(compter_sql)
+
+
+def noter_cache(nom, trouve):
+    """Succès ou échec d'une lecture de cache (« pages », « bilans »...) pendant une requête mesurée"""
+    mesure = _mesure_courante.get()
+    if mesure is None:
+        return
+    registre.incrementer('asi_cache_lectures_total', {'cache': nom, 'resultat': 'succes' if trouve else 'echec'})
+    if trouve:
+        mesure.cache_trouve += 1
+    else:
+        mesure.cache_manque += 1
+
+
+# ==================== GABARITS ====================
+
+class TemplateInstrumente(Template):
+    def render(self, context=None, request=None):
+        mesure = _mesure_courante.get()
+        if mesure is None:
+            return super().render(context, request)
+        debut = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            mesure.gabarits_duree += time.perf_counter() - debut
+
+
+class DjangoTemplatesInstrumentes(DjangoTemplates):
+    """Moteur DjangoTemplates qui chronomètre le rendu des gabarits (les inclusions comptent dans leur parent)"""
+
+    def from_string(self, template_code):
+        return TemplateInstrumente(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TemplateInstrumente(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
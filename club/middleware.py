@@ -0,0 +1,108 @@
+import json
+import logging
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from .metriques import NOMBRES, Mesure, registre, reglages
+from .replique import coller_au_primaire
+
+logger = logging.getLogger('club.metriques')
+
+
+class InstrumentationMiddleware:
+    """
+    Latence, requêtes SQL, rendu des gabarits et cache de chaque vue.
+
+    Seule une part des requêtes (METRIQUES['ECHANTILLONNAGE']) est mesurée ;
+    les autres ne coûtent qu'un tirage aléatoire. Les requêtes plus lentes
+    que METRIQUES['SEUIL_LENT_MS'] sont journalisées en JSON.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.reglages = reglages()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def echantillonnee(self):
+        taux = self.reglages['ECHANTILLONNAGE']
+        return self.reglages['ACTIVE'] and taux > 0 and (taux >= 1 or random.random() < taux)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.echantillonnee():
+            return self.get_response(request)
+        mesure = Mesure()
+        jeton = mesure.demarrer()
+        debut = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            Mesure.terminer(jeton)
+        self.enregistrer(request, response, mesure, time.perf_counter() - debut)
+        return response
+
+    async def __acall__(self, request):
+        if not self.echantillonnee():
+            return await self.get_response(request)
+        mesure = Mesure()
+        jeton = mesure.demarrer()
+        debut = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            Mesure.terminer(jeton)
+        self.enregistrer(request, response, mesure, time.perf_counter() - debut)
+        return response
+
+    def enregistrer(self, request, response, mesure, duree):
+        match = getattr(request, 'resolver_match', None)
+        vue = match.view_name if match is not None else 'non_resolue'
+        etiquettes = {'vue': vue}
+
+        registre.incrementer('asi_requetes_total', {**etiquettes, 'statut': response.status_code})
+        registre.observer('asi_requete_duree_secondes', etiquettes, duree)
+        registre.observer('asi_requete_sql_nombre', etiquettes, mesure.sql_nombre, bornes=NOMBRES)
+        registre.observer('asi_requete_sql_duree_secondes', etiquettes, mesure.sql_duree)
+        if mesure.gabarits_duree:
+            registre.observer('asi_gabarit_duree_secondes', etiquettes, mesure.gabarits_duree)
+
+        seuil = self.reglages['SEUIL_LENT_MS']
+        if seuil is not None and duree * 1000 >= seuil:
+            logger.warning(json.dumps({
+                'evenement': 'requete_lente',
+                'vue': vue,
+                'methode': request.method,
+                'chemin': request.path,
+                'statut': response.status_code,
+                'duree_ms': round(duree * 1000, 1),
+                'sql_nombre': mesure.sql_nombre,
+                'sql_ms': round(mesure.sql_duree * 1000, 1),
+                'gabarits_ms': round(mesure.gabarits_duree * 1000, 1),
+                'cache_succes': mesure.cache_trouve,
+                'cache_echecs': mesure.cache_manque,
+            }, ensure_ascii=False))
+
+
+class RepliqueMiddleware:
+    """Lire ce qu'on vient d'écrire : après un POST, ce visiteur lit sur le primaire (voir replique.py)"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return coller_au_primaire(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return coller_au_primaire(request, await self.get_response(request))
@@ -0,0 +1,40 @@
+# Generated by Django 6.0.1 on 2026-10-18 10:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('club', '0002_matchday_set1_adverse_matchday_set1_club_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Classement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('matchs_joues', models.IntegerField(default=0, verbose_name='Matchs joués')),
+                ('victoires', models.IntegerField(default=0)),
+                ('defaites', models.IntegerField(default=0, verbose_name='Défaites')),
+                ('sets_gagnes', models.IntegerField(default=0, verbose_name='Sets gagnés')),
+                ('sets_perdus', models.IntegerField(default=0, verbose_name='Sets perdus')),
+                ('points_gagnes', models.IntegerField(default=0, verbose_name='Points gagnés')),
+                ('points_perdus', models.IntegerField(default=0, verbose_name='Points perdus')),
+                ('category_age', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='club.categoryage', verbose_name="Catégorie d'âge")),
+                ('category_genre', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='club.categorygenre', verbose_name='Genre')),
+                ('championnat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='club.championnatcompetition', verbose_name='Championnat')),
+                ('saison', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='club.saison', verbose_name='Saison')),
+            ],
+            options={
+                'verbose_name': 'Classement',
+                'verbose_name_plural': 'Classements',
+                'db_table': 'classement',
+                'ordering': ['-victoires', 'defaites'],
+                'managed': True,
+                'indexes': [models.Index(fields=['saison', 'category_genre', 'category_age'], name='classement_saison_categ_idx')],
+                'constraints': [models.UniqueConstraint(fields=('saison', 'championnat'), name='classement_saison_championnat_uniq')],
+            },
+        ),
+    ]
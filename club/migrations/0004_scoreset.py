@@ -0,0 +1,52 @@
+# Generated by Django 6.0.1 on 2026-10-18 10:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def copier_scores_sets(apps, schema_editor):
+    """Recopie les colonnes set1_club ... set5_adverse dans la table score_set"""
+    MatchDay = apps.get_model('club', 'MatchDay')
+    ScoreSet = apps.get_model('club', 'ScoreSet')
+    colonnes = ['id'] + [f'set{i}_{camp}' for i in range(1, 6) for camp in ('club', 'adverse')]
+
+    sets = []
+    for ligne in MatchDay.objects.values_list(*colonnes).iterator(chunk_size=2000):
+        match_id, scores = ligne[0], ligne[1:]
+        for numero in range(1, 6):
+            club, adverse = scores[2 * (numero - 1)], scores[2 * numero - 1]
+            if club is not None and adverse is not None:
+                sets.append(ScoreSet(match_day_id=match_id, numero=numero, points_club=club, points_adverse=adverse))
+        if len(sets) >= 2000:
+            ScoreSet.objects.bulk_create(sets)
+            sets = []
+    ScoreSet.objects.bulk_create(sets)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('club', '0003_classement'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreSet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('numero', models.PositiveSmallIntegerField(verbose_name='Numéro du set')),
+                ('points_club', models.IntegerField(verbose_name='Points du club')),
+                ('points_adverse', models.IntegerField(verbose_name="Points de l'adversaire")),
+                ('match_day', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scores_sets', to='club.matchday', verbose_name='Match')),
+            ],
+            options={
+                'verbose_name': 'Score de set',
+                'verbose_name_plural': 'Scores de sets',
+                'db_table': 'score_set',
+                'ordering': ['match_day', 'numero'],
+                'managed': True,
+                'constraints': [models.UniqueConstraint(fields=('match_day', 'numero'), name='score_set_match_numero_uniq')],
+            },
+        ),
+        migrations.RunPython(copier_scores_sets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('club', '0004_scoreset'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='championnatcompetition',
+            index=models.Index(fields=['category_age', 'category_genre'], name='championnat_categories_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='matchday',
+            index=models.Index(fields=['date_rencontre', 'id'], name='match_day_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='matchday',
+            index=models.Index(fields=['saison', '-date_rencontre', '-id'], name='match_day_saison_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='matchday',
+            index=models.Index(condition=models.Q(('sets_club__isnull', True)), fields=['date_rencontre'], name='match_day_a_venir_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('club', '0005_index_matchday_championnat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='matchday',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Dernière modification'),
+        ),
+        migrations.AddField(
+            model_name='palmaresclub',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Dernière modification'),
+        ),
+    ]
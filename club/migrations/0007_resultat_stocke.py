@@ -0,0 +1,207 @@
+# Generated by Django 6.0.1 on 2026-10-18 10:41
+
+import django.db.models.expressions
+import django.db.models.functions.comparison
+import django.db.models.functions.math
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def set_termine(numero, club, adverse):
+    # Copie de club.models.set_termine au moment de la migration
+    if club is None or adverse is None:
+        return False
+    return max(club, adverse) >= (15 if numero == 5 else 25) and abs(club - adverse) >= 2
+
+
+def sets_termines(match):
+    # Copie de MatchDay.sets_termines au moment de la migration
+    termines = [
+        (club, adverse)
+        for numero in range(1, 6)
+        for club, adverse in [(getattr(match, f'set{numero}_club'), getattr(match, f'set{numero}_adverse'))]
+        if set_termine(numero, club, adverse)
+    ]
+    if not termines:
+        return None
+    gagnes = sum(1 for club, adverse in termines if club > adverse)
+    return gagnes, len(termines) - gagnes
+
+
+def corriger_sets(apps, schema_editor):
+    """
+    Prépare les matchs existants aux nouvelles contraintes sans rien effacer :
+    sets déduits des sets terminés quand aucun résultat n'est saisi, résultats
+    saisis conservés, et matchs hors règles (sets négatifs, résultat
+    impossible ou incomplet) marqués a_verifier au lieu d'être corrigés.
+    """
+    MatchDay = apps.get_model('club', 'MatchDay')
+    champs_sets = [f'set{i}_{camp}' for i in range(1, 6) for camp in ('club', 'adverse')]
+    a_corriger = []
+    for match in MatchDay.objects.order_by().iterator(chunk_size=2000):
+        sets = (match.sets_club, match.sets_adverse)
+        termines = sets_termines(match)
+        deduits = sets == (None, None) and termines is not None and max(termines) <= 3
+        if deduits:
+            match.sets_club, match.sets_adverse = sets = termines
+        valides = (
+            (sets == (None, None) or None not in sets and 0 <= min(sets) and max(sets) <= 3 and sets != (3, 3))
+            and all((getattr(match, champ) or 0) >= 0 for champ in champs_sets)
+        )
+        if deduits or not valides:
+            match.a_verifier = not valides
+            a_corriger.append(match)
+    MatchDay.objects.bulk_update(a_corriger, ['sets_club', 'sets_adverse', 'a_verifier'], batch_size=1000)
+
+
+def reconstruire(apps, schema_editor):
+    """
+    Le bulk_update ne passe pas par les signaux : classement et scores par set
+    recalculés ici (copie de classement.reconstruire et ScoreSet.synchroniser).
+    """
+    MatchDay = apps.get_model('club', 'MatchDay')
+    Classement = apps.get_model('club', 'Classement')
+    ScoreSet = apps.get_model('club', 'ScoreSet')
+
+    def somme_points(camp):
+        expression = models.Value(0)
+        for i in range(1, 6):
+            expression = expression + Coalesce(f'set{i}_{camp}', 0)
+        return models.Sum(expression)
+
+    lignes = (
+        MatchDay.objects.filter(issue__in=['V', 'D'], a_verifier=False)
+        .order_by()
+        .values('saison_id', 'championnat_id', 'championnat__category_genre_id', 'championnat__category_age_id')
+        .annotate(
+            matchs_joues=models.Count('id'),
+            victoires=models.Count('id', filter=models.Q(issue='V')),
+            defaites=models.Count('id', filter=models.Q(issue='D')),
+            sets_gagnes=models.Sum('sets_club'),
+            sets_perdus=models.Sum('sets_adverse'),
+            points_gagnes=somme_points('club'),
+            points_perdus=somme_points('adverse'),
+        )
+    )
+    Classement.objects.all().delete()
+    Classement.objects.bulk_create([
+        Classement(
+            saison_id=ligne['saison_id'],
+            championnat_id=ligne['championnat_id'],
+            category_genre_id=ligne['championnat__category_genre_id'],
+            category_age_id=ligne['championnat__category_age_id'],
+            **{champ: ligne[champ] for champ in (
+                'matchs_joues', 'victoires', 'defaites',
+                'sets_gagnes', 'sets_perdus', 'points_gagnes', 'points_perdus',
+            )},
+        )
+        for ligne in lignes
+    ], batch_size=1000)
+
+    ScoreSet.objects.all().delete()
+    scores = []
+    for match in MatchDay.objects.order_by().iterator(chunk_size=2000):
+        for numero in range(1, 6):
+            club = getattr(match, f'set{numero}_club')
+            adverse = getattr(match, f'set{numero}_adverse')
+            if club is not None and adverse is not None:
+                scores.append(ScoreSet(match_day_id=match.pk, numero=numero, points_club=club, points_adverse=adverse))
+    ScoreSet.objects.bulk_create(scores, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('club', '0006_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='matchday',
+            name='a_verifier',
+            field=models.BooleanField(default=False, verbose_name='Résultat à vérifier'),
+        ),
+        migrations.RunPython(corriger_sets, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='matchday',
+            name='ecart_points',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.Value(0), '+', django.db.models.functions.comparison.Coalesce('set1_club', 0)), '+', django.db.models.functions.comparison.Coalesce('set2_club', 0)), '+', django.db.models.functions.comparison.Coalesce('set3_club', 0)), '+', django.db.models.functions.comparison.Coalesce('set4_club', 0)), '+', django.db.models.functions.comparison.Coalesce('set5_club', 0)), '-', django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.Value(0), '+', django.db.models.functions.comparison.Coalesce('set1_adverse', 0)), '+', django.db.models.functions.comparison.Coalesce('set2_adverse', 0)), '+', django.db.models.functions.comparison.Coalesce('set3_adverse', 0)), '+', django.db.models.functions.comparison.Coalesce('set4_adverse', 0)), '+', django.db.models.functions.comparison.Coalesce('set5_adverse', 0))), output_field=models.IntegerField(), verbose_name='Écart de points'),
+        ),
+        migrations.AddField(
+            model_name='matchday',
+            name='ecart_sets',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.expressions.CombinedExpression(models.F('sets_club'), '-', models.F('sets_adverse')), output_field=models.IntegerField(null=True), verbose_name='Écart de sets'),
+        ),
+        migrations.AddField(
+            model_name='matchday',
+            name='issue',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(sets_club=3, then=models.Value('V')), models.When(sets_adverse=3, then=models.Value('D')), models.When(sets_club__isnull=True, then=models.Value('A')), default=models.Value('E')), output_field=models.CharField(choices=[('A', 'À venir'), ('E', 'En cours'), ('V', 'Victoire'), ('D', 'Défaite')], max_length=1), verbose_name='Issue'),
+        ),
+        migrations.AddField(
+            model_name='matchday',
+            name='points_adverse',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.Value(0), '+', django.db.models.functions.comparison.Coalesce('set1_adverse', 0)), '+', django.db.models.functions.comparison.Coalesce('set2_adverse', 0)), '+', django.db.models.functions.comparison.Coalesce('set3_adverse', 0)), '+', django.db.models.functions.comparison.Coalesce('set4_adverse', 0)), '+', django.db.models.functions.comparison.Coalesce('set5_adverse', 0)), output_field=models.IntegerField(), verbose_name='Points encaissés'),
+        ),
+        migrations.AddField(
+            model_name='matchday',
+            name='points_club',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.Value(0), '+', django.db.models.functions.comparison.Coalesce('set1_club', 0)), '+', django.db.models.functions.comparison.Coalesce('set2_club', 0)), '+', django.db.models.functions.comparison.Coalesce('set3_club', 0)), '+', django.db.models.functions.comparison.Coalesce('set4_club', 0)), '+', django.db.models.functions.comparison.Coalesce('set5_club', 0)), output_field=models.IntegerField(), verbose_name='Points marqués'),
+        ),
+        migrations.AddIndex(
+            model_name='matchday',
+            index=models.Index(fields=['saison', 'issue'], name='match_day_saison_issue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='matchday',
+            index=models.Index(django.db.models.functions.math.Abs('ecart_points'), name='match_day_ecart_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='matchday',
+            constraint=models.CheckConstraint(condition=models.Q(('a_verifier', True), models.Q(('sets_adverse__isnull', True), ('sets_club__isnull', True)), models.Q(('sets_adverse__isnull', False), ('sets_club__isnull', False)), _connector='OR'), name='match_day_sets_ensemble'),
+        ),
+        migrations.AddConstraint(
+            model_name='matchday',
+            constraint=models.CheckConstraint(condition=models.Q(('a_verifier', True), ('sets_club__isnull', True), models.Q(('sets_adverse__gte', 0), ('sets_adverse__lte', 3), ('sets_club__gte', 0), ('sets_club__lte', 3), models.Q(('sets_adverse', 3), ('sets_club', 3), _negated=True)), _connector='OR'), name='match_day_sets_valides'),
+        ),
+        migrations.AddConstraint(
+            model_name='matchday',
+            constraint=models.CheckConstraint(condition=models.Q(('a_verifier', True), ('set1_club__gte', 0), ('set1_club__isnull', True), _connector='OR'), name='match_day_set1_club_positif'),
+        ),
+        migrations.AddConstraint(
+            model_name='matchday',
+            constraint=models.CheckConstraint(condition=models.Q(('a_verifier', True), ('set1_adverse__gte', 0), ('set1_adverse__isnull', True), _connector='OR'), name='match_day_set1_adverse_positif'),
+        ),
+        migrations.AddConstraint(
+            model_name='matchday',
+            constraint=models.CheckConstraint(condition=models.Q(('a_verifier', True), ('set2_club__gte', 0), ('set2_club__isnull', True), _connector='OR'), name='match_day_set2_club_positif'),
+        ),
+        migrations.AddConstraint(
+            model_name='matchday',
+            constraint=models.CheckConstraint(condition=models.Q(('a_verifier', True), ('set2_adverse__gte', 0), ('set2_adverse__isnull', True), _connector='OR'), name='match_day_set2_adverse_positif'),
+        ),
+        migrations.AddConstraint(
+            model_name='matchday',
+            constraint=models.CheckConstraint(condition=models.Q(('a_verifier', True), ('set3_club__gte', 0), ('set3_club__isnull', True), _connector='OR'), name='match_day_set3_club_positif'),
+        ),
+        migrations.AddConstraint(
+            model_name='matchday',
+            constraint=models.CheckConstraint(condition=models.Q(('a_verifier', True), ('set3_adverse__gte', 0), ('set3_adverse__isnull', True), _connector='OR'), name='match_day_set3_adverse_positif'),
+        ),
+        migrations.AddConstraint(
+            model_name='matchday',
+            constraint=models.CheckConstraint(condition=models.Q(('a_verifier', True), ('set4_club__gte', 0), ('set4_club__isnull', True), _connector='OR'), name='match_day_set4_club_positif'),
+        ),
+        migrations.AddConstraint(
+            model_name='matchday',
+            constraint=models.CheckConstraint(condition=models.Q(('a_verifier', True), ('set4_adverse__gte', 0), ('set4_adverse__isnull', True), _connector='OR'), name='match_day_set4_adverse_positif'),
+        ),
+        migrations.AddConstraint(
+            model_name='matchday',
+            constraint=models.CheckConstraint(condition=models.Q(('a_verifier', True), ('set5_club__gte', 0), ('set5_club__isnull', True), _connector='OR'), name='match_day_set5_club_positif'),
+        ),
+        migrations.AddConstraint(
+            model_name='matchday',
+            constraint=models.CheckConstraint(condition=models.Q(('a_verifier', True), ('set5_adverse__gte', 0), ('set5_adverse__isnull', True), _connector='OR'), name='match_day_set5_adverse_positif'),
+        ),
+        migrations.RunPython(reconstruire, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 6.0.1 on 2026-10-18 10:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def _cle(nom, prenom):
+    return (nom or '').strip().casefold(), (prenom or '').strip().casefold()
+
+
+def lier_comptes(apps, schema_editor):
+    """
+    Relie chaque compte à son joueur par nom et prénom (sans tenir compte de
+    la casse), en une lecture de chaque table et un bulk_update. Les
+    homonymes, d'un côté comme de l'autre, restent à relier à la main.
+    """
+    Joueur = apps.get_model('club', 'Joueur')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+
+    comptes = {}
+    for pk, nom, prenom in User.objects.values_list('pk', 'last_name', 'first_name').iterator():
+        if nom and prenom:
+            comptes.setdefault(_cle(nom, prenom), []).append(pk)
+
+    joueurs = {}
+    for joueur in Joueur.objects.filter(utilisateur__isnull=True).only('pk', 'nom', 'prenom').iterator():
+        joueurs.setdefault(_cle(joueur.nom, joueur.prenom), []).append(joueur)
+
+    a_lier = []
+    for cle, candidats in joueurs.items():
+        utilisateurs = comptes.get(cle, [])
+        if len(candidats) == 1 and len(utilisateurs) == 1:
+            candidats[0].utilisateur_id = utilisateurs[0]
+            a_lier.append(candidats[0])
+    Joueur.objects.bulk_update(a_lier, ['utilisateur'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('club', '0007_resultat_stocke'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='joueur',
+            name='utilisateur',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='joueur', to=settings.AUTH_USER_MODEL, verbose_name='Compte utilisateur'),
+        ),
+        migrations.RunPython(lier_comptes, migrations.RunPython.noop),
+    ]
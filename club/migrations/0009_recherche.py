@@ -0,0 +1,110 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:11
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import DatabaseError, migrations, models, transaction
+
+# Repli des accents sans l'extension unaccent (souvent absente des hébergements) :
+# translate() et lower() sont immuables, la fonction peut donc servir dans une
+# colonne générée et dans un index.
+AVEC_ACCENTS = 'àáâãäåçèéêëìíîïñòóôõöùúûüýÿÀÁÂÃÄÅÇÈÉÊËÌÍÎÏÑÒÓÔÕÖÙÚÛÜÝŸ'
+SANS_ACCENTS = 'aaaaaaceeeeiiiinooooouuuuyyAAAAAACEEEEIIIINOOOOOUUUUYY'
+
+CREER_FONCTION = f"""
+CREATE OR REPLACE FUNCTION club_sans_accents(text) RETURNS text AS $$
+    SELECT lower(translate($1, '{AVEC_ACCENTS}', '{SANS_ACCENTS}'))
+$$ LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE
+"""
+SUPPRIMER_FONCTION = "DROP FUNCTION IF EXISTS club_sans_accents(text)"
+
+INDEX_TRIGRAMMES = [
+    ('championnatcompetition', django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(models.Func(models.F('nom'), function='club_sans_accents', output_field=models.TextField()), name='gin_trgm_ops'), name='championnat_nom_trgm_idx')),
+    ('equipeadverse', django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(models.Func(models.F('nom'), function='club_sans_accents', output_field=models.TextField()), name='gin_trgm_ops'), name='equipe_adverse_nom_trgm_idx')),
+    ('joueur', django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(models.Func(django.db.models.functions.text.Concat('prenom', models.Value(' '), 'nom'), function='club_sans_accents', output_field=models.TextField()), name='gin_trgm_ops'), name='joueur_nom_trgm_idx')),
+    ('palmaresclub', django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(models.Func(models.F('titre'), function='club_sans_accents', output_field=models.TextField()), name='gin_trgm_ops'), name='palmares_titre_trgm_idx')),
+]
+
+
+def activer_pg_trgm(schema_editor):
+    """Installe pg_trgm si le serveur le propose ; False sinon (la recherche se passe alors des trigrammes)"""
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return False
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    except DatabaseError:  # droits insuffisants
+        return False
+    return True
+
+
+def creer_index_trigrammes(apps, schema_editor):
+    if not activer_pg_trgm(schema_editor):
+        return
+    for nom_modele, index in INDEX_TRIGRAMMES:
+        schema_editor.add_index(apps.get_model('club', nom_modele), index)
+
+
+def supprimer_index_trigrammes(apps, schema_editor):
+    for _, index in INDEX_TRIGRAMMES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {schema_editor.quote_name(index.name)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('club', '0008_joueur_utilisateur'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREER_FONCTION, SUPPRIMER_FONCTION),
+        migrations.AddField(
+            model_name='championnatcompetition',
+            name='recherche',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector(models.Func(models.F('nom'), function='club_sans_accents', output_field=models.TextField()), config='french', weight='A'), '||', django.contrib.postgres.search.SearchVector(models.Func(models.F('lieu_deroulement'), function='club_sans_accents', output_field=models.TextField()), config='french', weight='B'), django.contrib.postgres.search.SearchConfig('french')), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddField(
+            model_name='equipeadverse',
+            name='recherche',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.SearchVector(models.Func(models.F('nom'), function='club_sans_accents', output_field=models.TextField()), config='french', weight='A'), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddField(
+            model_name='joueur',
+            name='recherche',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector(models.Func(models.F('nom'), function='club_sans_accents', output_field=models.TextField()), config='french', weight='A'), '||', django.contrib.postgres.search.SearchVector(models.Func(models.F('prenom'), function='club_sans_accents', output_field=models.TextField()), config='french', weight='A'), django.contrib.postgres.search.SearchConfig('french')), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddField(
+            model_name='palmaresclub',
+            name='recherche',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector(models.Func(models.F('titre'), function='club_sans_accents', output_field=models.TextField()), config='french', weight='A'), '||', django.contrib.postgres.search.SearchVector(models.Func(models.F('competition'), function='club_sans_accents', output_field=models.TextField()), config='french', weight='B'), django.contrib.postgres.search.SearchConfig('french')), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddIndex(
+            model_name='championnatcompetition',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['recherche'], name='championnat_recherche_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipeadverse',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['recherche'], name='equipe_adverse_recherche_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='joueur',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['recherche'], name='joueur_recherche_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='palmaresclub',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['recherche'], name='palmares_recherche_idx'),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name=nom_modele, index=index)
+                for nom_modele, index in INDEX_TRIGRAMMES
+            ],
+            database_operations=[
+                migrations.RunPython(creer_index_trigrammes, supprimer_index_trigrammes),
+            ],
+        ),
+    ]
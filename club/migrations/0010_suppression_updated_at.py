@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:20
+
+from django.db import migrations
+
+# Les réponses conditionnelles s'appuient sur les versions du cache
+# (conditionnel.py) : les dates de modification n'étaient plus lues.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('club', '0009_recherche'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='matchday',
+            name='updated_at',
+        ),
+        migrations.RemoveField(
+            model_name='palmaresclub',
+            name='updated_at',
+        ),
+    ]
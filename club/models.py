@@ -1,4 +1,12 @@
-from django.db import models
+import operator
+from functools import reduce
+
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.core.exceptions import ValidationError
+from django.db import models, router, transaction
+from django.db.models.functions import Concat
 
 # Create your models here.
 # This is an auto-generated Django model module.
@@ -15,6 +23,43 @@ from django.db import models
 
 
 
+"""
+Recherche : vecteurs plein texte et index trigrammes (voir club/recherche.py)
+"""
+
+def sans_accents(expression):
+    """Minuscules sans accents, par la fonction SQL immuable créée par la migration 0009"""
+    if isinstance(expression, str):
+        expression = models.F(expression)
+    return models.Func(expression, function='club_sans_accents', output_field=models.TextField())
+
+
+def vecteur_recherche(**poids):
+    """tsvector français (sans accents) des champs donnés, pondérés : vecteur_recherche(nom='A', lieu='B')"""
+    return reduce(operator.add, [
+        SearchVector(sans_accents(champ), config='french', weight=lettre)
+        for champ, lettre in poids.items()
+    ])
+
+
+def champ_recherche(**poids):
+    """Colonne tsvector calculée et stockée par PostgreSQL à chaque écriture"""
+    return models.GeneratedField(
+        expression=vecteur_recherche(**poids),
+        output_field=SearchVectorField(),
+        db_persist=True,
+        editable=False,
+    )
+
+
+def index_trigrammes(expression, nom):
+    """Index GIN gin_trgm_ops sur le texte sans accents (créé seulement si pg_trgm est disponible)"""
+    return GinIndex(OpClass(sans_accents(expression), name='gin_trgm_ops'), name=nom)
+
+
+NOM_COMPLET_JOUEUR = Concat('prenom', models.Value(' '), 'nom')
+
+
 """
 LES TYPES DE CATEGORIES : Age et Genre 
 """
@@ -29,6 +74,20 @@ class CategoryAge(models.Model):
             return f"{self.nom} ({self.age_min}-{self.age_max} ans)"
         return self.nom
 
+    def clean(self):
+        """Tranches disjointes : l'index de categories.py cherche par dichotomie"""
+        if self.age_min is not None and self.age_max is not None and self.age_min > self.age_max:
+            raise ValidationError({'age_max': "L'âge maximum doit être supérieur ou égal à l'âge minimum."})
+        # Une borne absente vaut « sans limite »
+        chevauchements = CategoryAge.objects.exclude(pk=self.pk)
+        if self.age_max is not None:
+            chevauchements = chevauchements.filter(models.Q(age_min__isnull=True) | models.Q(age_min__lte=self.age_max))
+        if self.age_min is not None:
+            chevauchements = chevauchements.filter(models.Q(age_max__isnull=True) | models.Q(age_max__gte=self.age_min))
+        autre = chevauchements.order_by('age_min').first()
+        if autre is not None:
+            raise ValidationError(f"Cette tranche d'âge chevauche la catégorie « {autre} ».")
+
     class Meta:
         managed = True  # ✅ Changé
         db_table = 'category_age'
@@ -79,6 +138,7 @@ class ChampionnatCompetition(models.Model):
         null=True,
         verbose_name='Genre'
     )
+    recherche = champ_recherche(nom='A', lieu_deroulement='B')
 
     def __str__(self):
         return f"{self.nom} - {self.date_champ.year}"
@@ -89,6 +149,12 @@ class ChampionnatCompetition(models.Model):
         verbose_name = 'Championnat/Compétition'
         verbose_name_plural = 'Championnats/Compétitions'
         ordering = ['-date_champ']
+        indexes = [
+            # Recherche des championnats d'une catégorie (matchs_by_category)
+            models.Index(fields=['category_age', 'category_genre'], name='championnat_categories_idx'),
+            GinIndex(fields=['recherche'], name='championnat_recherche_idx'),
+            index_trigrammes('nom', 'championnat_nom_trgm_idx'),
+        ]
         
 
         
@@ -127,6 +193,7 @@ class EquipeAdverse(models.Model):
         null=True,
         verbose_name='Catégorie d\'âge'
     )
+    recherche = champ_recherche(nom='A')
 
     def __str__(self):
         return self.nom
@@ -137,9 +204,73 @@ class EquipeAdverse(models.Model):
         verbose_name = 'Équipe adverse'
         verbose_name_plural = 'Équipes adverses'
         ordering = ['nom']
+        indexes = [
+            GinIndex(fields=['recherche'], name='equipe_adverse_recherche_idx'),
+            index_trigrammes('nom', 'equipe_adverse_nom_trgm_idx'),
+        ]
 
 """Les joueurs du club"""
 
+class JoueurQuerySet(models.QuerySet):
+    """Âge et tranche d'âge calculés en SQL, pour trier, filtrer et agréger sans charger les joueurs"""
+
+    def avec_age(self, reference=None):
+        """
+        Annote ``age_revolu`` : âge atteint à la date de référence (aujourd'hui par défaut).
+
+        Année de référence moins année de naissance, moins un si
+        l'anniversaire tombe après la date de référence.
+        """
+        from datetime import date
+        from django.db.models.functions import ExtractYear
+        reference = reference or date.today()
+        anniversaire_a_venir = (
+            models.Q(date_naissance__month__gt=reference.month)
+            | models.Q(date_naissance__month=reference.month, date_naissance__day__gt=reference.day)
+        )
+        return self.annotate(
+            age_revolu=models.ExpressionWrapper(
+                models.Value(reference.year) - ExtractYear('date_naissance')
+                - models.Case(
+                    models.When(anniversaire_a_venir, then=models.Value(1)),
+                    default=models.Value(0),
+                ),
+                output_field=models.IntegerField(),
+            )
+        )
+
+    def avec_tranche_age(self, reference=None):
+        """Annote aussi ``tranche_age_id`` / ``tranche_age`` : la CategoryAge couvrant l'âge calculé"""
+        if 'age_revolu' not in self.query.annotations:
+            self = self.avec_age(reference)
+        tranches = CategoryAge.objects.filter(
+            models.Q(age_min__isnull=True) | models.Q(age_min__lte=models.OuterRef('age_revolu')),
+            models.Q(age_max__isnull=True) | models.Q(age_max__gte=models.OuterRef('age_revolu')),
+        ).order_by('-age_min')
+        return self.annotate(
+            tranche_age_id=models.Subquery(tranches.values('pk')[:1]),
+            tranche_age=models.Subquery(tranches.values('nom')[:1]),
+        )
+
+    def age_entre(self, age_min=None, age_max=None, reference=None):
+        """Joueurs dont l'âge est compris entre les bornes (incluses, facultatives)"""
+        queryset = self if 'age_revolu' in self.query.annotations else self.avec_age(reference)
+        if age_min is not None:
+            queryset = queryset.filter(age_revolu__gte=age_min)
+        if age_max is not None:
+            queryset = queryset.filter(age_revolu__lte=age_max)
+        return queryset
+
+    def histogramme_ages(self, reference=None):
+        """Nombre de joueurs par catégorie d'âge attribuée et par âge, en une requête"""
+        return (
+            self.avec_age(reference)
+            .order_by('category_age__age_min', 'age_revolu')
+            .values('category_age__nom', 'age_revolu')
+            .annotate(nombre=models.Count('id'))
+        )
+
+
 class Joueur(models.Model):
     """Joueur du club"""
     nom = models.CharField(max_length=100)
@@ -158,11 +289,25 @@ class Joueur(models.Model):
         verbose_name='Catégorie d\'âge'
     )
 
+    utilisateur = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='joueur',
+        verbose_name='Compte utilisateur'
+    )
+    recherche = champ_recherche(nom='A', prenom='A')
+
+    objects = JoueurQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.prenom} {self.nom}"
 
     def age(self):
-        """Calcule l'âge du joueur"""
+        """Calcule l'âge du joueur (ou reprend l'annotation age_revolu si la requête l'a calculée)"""
+        if hasattr(self, 'age_revolu'):
+            return self.age_revolu
         from datetime import date
         today = date.today()
         return today.year - self.date_naissance.year - (
@@ -175,11 +320,155 @@ class Joueur(models.Model):
         verbose_name = 'Joueur'
         verbose_name_plural = 'Joueurs'
         ordering = ['nom', 'prenom']
+        indexes = [
+            GinIndex(fields=['recherche'], name='joueur_recherche_idx'),
+            index_trigrammes(NOM_COMPLET_JOUEUR, 'joueur_nom_trgm_idx'),
+        ]
         
         
 """Matchs"""
+
+POINTS_SET = 25
+POINTS_TIE_BREAK = 15  # 5e set
+
+
+def set_termine(numero, points_club, points_adverse):
+    """Un set est terminé à 25 points (15 au tie-break) avec deux points d'écart"""
+    if points_club is None or points_adverse is None:
+        return False
+    objectif = POINTS_TIE_BREAK if numero == 5 else POINTS_SET
+    return max(points_club, points_adverse) >= objectif and abs(points_club - points_adverse) >= 2
+
+
+def sets_termines(sets_joues):
+    """(sets gagnés, sets perdus) des sets terminés parmi [(numero, club, adverse), ...], ou None"""
+    termines = [(club, adverse) for numero, club, adverse in sets_joues if set_termine(numero, club, adverse)]
+    if not termines:
+        return None
+    gagnes = sum(1 for club, adverse in termines if club > adverse)
+    return gagnes, len(termines) - gagnes
+
+
+def issue_sets(sets_club, sets_adverse):
+    """Issue d'un score en sets, même règle que la colonne générée MatchDay.issue"""
+    if sets_club == 3:
+        return MatchDay.Issue.VICTOIRE
+    if sets_adverse == 3:
+        return MatchDay.Issue.DEFAITE
+    if sets_club is None:
+        return MatchDay.Issue.A_VENIR
+    return MatchDay.Issue.EN_COURS
+
+
+# Colonnes recopiées dans ScoreSet (une ligne par set joué)
+CHAMPS_SETS = [f'set{i}_{camp}' for i in range(1, 6) for camp in ('club', 'adverse')]
+# Champs dont dépend la ligne de classement d'un match (voir classement.py)
+CHAMPS_CLASSEMENT_MATCH = {'saison', 'championnat', 'sets_club', 'sets_adverse', 'a_verifier', *CHAMPS_SETS}
+
+
+def _somme_sets(camp):
+    expression = models.Value(0)
+    for i in range(1, 6):
+        expression = expression + models.functions.Coalesce(f'set{i}_{camp}', 0)
+    return expression
+
+
+class MatchDayQuerySet(models.QuerySet):
+    """Filtres courants sur les matchs, alignés sur les index de MatchDay"""
+
+    def a_venir(self):
+        """Matchs non joués à partir de maintenant (index partiel match_day_a_venir_idx)"""
+        from django.utils import timezone
+        return self.filter(
+            date_rencontre__gte=timezone.now(),
+            sets_club__isnull=True,
+        ).order_by('date_rencontre')
+
+    def par_categorie(self, category_age, category_genre):
+        """Matchs des championnats d'une catégorie d'âge et de genre"""
+        return self.filter(
+            championnat__category_age=category_age,
+            championnat__category_genre=category_genre,
+        )
+
+    def termines(self):
+        """Matchs joués jusqu'au bout (un match en cours ou à vérifier ne compte nulle part)"""
+        return self.filter(issue__in=MatchDay.TERMINES, a_verifier=False)
+
+    def victoires(self):
+        return self.termines().filter(issue=MatchDay.Issue.VICTOIRE)
+
+    def defaites(self):
+        return self.termines().filter(issue=MatchDay.Issue.DEFAITE)
+
+    def plus_serres(self):
+        """Matchs terminés, du plus petit au plus grand écart de points (index match_day_ecart_idx)"""
+        return self.termines().order_by(models.functions.Abs('ecart_points'), '-date_rencontre')
+
+    # Écritures groupées : sans signal post_save, ScoreSet et les lignes de
+    # classement touchées (avant et après l'écriture) sont recalculés ici
+
+    def bulk_create(self, objs, *args, **kwargs):
+        from . import classement
+        with transaction.atomic(using=self._db or router.db_for_write(self.model)):
+            matchs = super().bulk_create(objs, *args, **kwargs)
+            crees = [match for match in matchs if match.pk is not None]
+            ScoreSet.objects.synchroniser([match for match in crees if match.sets_joues()])
+            classement.recalculer((match.saison_id, match.championnat_id) for match in crees)
+        return matchs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        if CHAMPS_CLASSEMENT_MATCH.isdisjoint(self._noms(fields)):
+            return super().bulk_update(objs, fields, *args, **kwargs)
+        objs = list(objs)
+        alias = self._db or router.db_for_write(self.model)
+        with transaction.atomic(using=alias):
+            pks = [match.pk for match in objs]
+            avant = self._couples(alias, pks)
+            nombre = super().bulk_update(objs, fields, *args, **kwargs)
+            self._apres_ecriture(alias, pks, fields, avant)
+        return nombre
+
+    def update(self, **kwargs):
+        if CHAMPS_CLASSEMENT_MATCH.isdisjoint(self._noms(kwargs)):
+            return super().update(**kwargs)
+        alias = self._db or router.db_for_write(self.model)
+        with transaction.atomic(using=alias):
+            pks = list(self.using(alias).values_list('pk', flat=True))
+            avant = self._couples(alias, pks)
+            nombre = super().update(**kwargs)
+            self._apres_ecriture(alias, pks, kwargs, avant)
+        return nombre
+
+    @staticmethod
+    def _noms(champs):
+        return {champ.removesuffix('_id') for champ in champs}
+
+    @staticmethod
+    def _couples(alias, pks):
+        return set(MatchDay.objects.using(alias).filter(pk__in=pks).values_list('saison_id', 'championnat_id'))
+
+    def _apres_ecriture(self, alias, pks, champs, avant):
+        from . import classement
+        champs = self._noms(champs)
+        if not set(CHAMPS_SETS).isdisjoint(champs):
+            # Relu en base : les objets peuvent être périmés sur les champs non mis à jour
+            ScoreSet.objects.synchroniser(MatchDay.objects.using(alias).filter(pk__in=pks).only(*CHAMPS_SETS))
+        if not CHAMPS_CLASSEMENT_MATCH.isdisjoint(champs):
+            classement.recalculer(avant | self._couples(alias, pks))
+
+
 class MatchDay(models.Model):
     """Match / Rencontre"""
+
+    class Issue(models.TextChoices):
+        A_VENIR = 'A', 'À venir'
+        EN_COURS = 'E', 'En cours'
+        VICTOIRE = 'V', 'Victoire'
+        DEFAITE = 'D', 'Défaite'
+
+    TERMINES = [Issue.VICTOIRE, Issue.DEFAITE]
+
     date_rencontre = models.DateTimeField(verbose_name='Date de la rencontre')
     lieu_rencontre = models.CharField(max_length=150, verbose_name='Lieu')
     championnat = models.ForeignKey(
@@ -225,28 +514,121 @@ class MatchDay(models.Model):
     set5_club = models.IntegerField(blank=True, null=True, verbose_name='Set 5 - Club (Tie-break)')
     set5_adverse = models.IntegerField(blank=True, null=True, verbose_name='Set 5 - Adverse (Tie-break)')
 
+    # Posé par la migration 0007 sur les résultats hors règles conservés tels
+    # quels : exemptés des contraintes, exclus des classements et bilans
+    a_verifier = models.BooleanField(default=False, verbose_name='Résultat à vérifier')
+
+    # Colonnes calculées par la base (GENERATED ... STORED) : toujours
+    # cohérentes, y compris après bulk_create() ou update(), et indexables.
+    issue = models.GeneratedField(
+        expression=models.Case(
+            models.When(sets_club=3, then=models.Value(Issue.VICTOIRE)),
+            models.When(sets_adverse=3, then=models.Value(Issue.DEFAITE)),
+            models.When(sets_club__isnull=True, then=models.Value(Issue.A_VENIR)),
+            default=models.Value(Issue.EN_COURS),
+        ),
+        output_field=models.CharField(max_length=1, choices=Issue.choices),
+        db_persist=True,
+        verbose_name='Issue',
+    )
+    points_club = models.GeneratedField(
+        expression=_somme_sets('club'),
+        output_field=models.IntegerField(),
+        db_persist=True,
+        verbose_name='Points marqués',
+    )
+    points_adverse = models.GeneratedField(
+        expression=_somme_sets('adverse'),
+        output_field=models.IntegerField(),
+        db_persist=True,
+        verbose_name='Points encaissés',
+    )
+    ecart_points = models.GeneratedField(
+        expression=_somme_sets('club') - _somme_sets('adverse'),
+        output_field=models.IntegerField(),
+        db_persist=True,
+        verbose_name='Écart de points',
+    )
+    ecart_sets = models.GeneratedField(
+        expression=models.F('sets_club') - models.F('sets_adverse'),
+        output_field=models.IntegerField(null=True),
+        db_persist=True,
+        verbose_name='Écart de sets',
+    )
+
+    objects = MatchDayQuerySet.as_manager()
+
+    def clean(self):
+        # Avant validate_constraints() : les formulaires valident les sets déduits
+        self.deriver_sets()
+        if self.a_verifier or self.sets_club is None:
+            return
+        termines = self.sets_termines()
+        if termines and termines != (self.sets_club, self.sets_adverse):
+            raise ValidationError({
+                'sets_club': (
+                    f"Le résultat saisi ({self.sets_club}-{self.sets_adverse}) ne correspond pas "
+                    f"aux sets terminés ({termines[0]}-{termines[1]})."
+                ),
+            })
+
+    def save(self, *args, **kwargs):
+        """Déduit les sets gagnés des scores par set quand aucun résultat n'est saisi"""
+        if self.deriver_sets():
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'sets_club', 'sets_adverse'}
+        super().save(*args, **kwargs)
+
+    def sets_termines(self):
+        """(sets gagnés, sets perdus) d'après les sets terminés, ou None s'il n'y en a aucun"""
+        return sets_termines(self.sets_joues())
+
+    def deriver_sets(self):
+        """
+        Remplit sets_club / sets_adverse à partir des sets terminés.
+
+        Un résultat déjà saisi n'est jamais écrasé (clean() signale
+        l'incohérence) : pour recalculer, remettre les deux à None.
+        Retourne True si les sets ont été déduits.
+        """
+        if self.sets_club is not None or self.sets_adverse is not None:
+            return False
+        termines = self.sets_termines()
+        if termines is None:
+            return False
+        self.sets_club, self.sets_adverse = termines
+        return True
+
     def __str__(self):
         if self.sets_club is not None and self.sets_adverse is not None:
             return f"Match du {self.date_rencontre.strftime('%d/%m/%Y')} - {self.sets_club}:{self.sets_adverse}"
         return f"Match du {self.date_rencontre.strftime('%d/%m/%Y')} - {self.lieu_rencontre}"
     
+    LIBELLES_RESULTAT = {
+        Issue.VICTOIRE: "✅ Victoire",
+        Issue.DEFAITE: "❌ Défaite",
+        Issue.EN_COURS: "En cours",
+        Issue.A_VENIR: "À venir",
+    }
+
     def resultat(self):
-        """Retourne Victoire ou Défaite"""
-        if self.sets_club is None or self.sets_adverse is None:
-            return "À venir"
-        if self.sets_club == 3:
-            return "✅ Victoire"
-        else:
-            return "❌ Défaite"
+        """Retourne Victoire, Défaite, En cours ou À venir (d'après la colonne issue)"""
+        return self.LIBELLES_RESULTAT[self.issue]
     
-    def score_detaille(self):
-        """Affiche le score détaillé de tous les sets joués"""
-        scores = []
+    def sets_joues(self):
+        """Liste des sets joués : [(numero, points_club, points_adverse), ...]"""
+        sets = []
         for i in range(1, 6):
             club = getattr(self, f'set{i}_club')
             adverse = getattr(self, f'set{i}_adverse')
             if club is not None and adverse is not None:
-                scores.append(f"{club}-{adverse}")
+                sets.append((i, club, adverse))
+        return sets
+
+    def score_detaille(self):
+        """Affiche le score détaillé de tous les sets joués"""
+        scores = [f"{club}-{adverse}" for _, club, adverse in self.sets_joues()]
         return " / ".join(scores) if scores else "Pas de score"
 
     def __str__(self):
@@ -258,6 +640,46 @@ class MatchDay(models.Model):
         verbose_name = 'Match'
         verbose_name_plural = 'Matchs'
         ordering = ['-date_rencontre']
+        indexes = [
+            # Calendrier complet et pagination par curseur (date_rencontre, id)
+            models.Index(fields=['date_rencontre', 'id'], name='match_day_date_idx'),
+            # Calendrier filtré par saison
+            models.Index(fields=['saison', '-date_rencontre', '-id'], name='match_day_saison_date_idx'),
+            # Prochains matchs : seuls les matchs sans score sont indexés
+            models.Index(
+                fields=['date_rencontre'],
+                condition=models.Q(sets_club__isnull=True),
+                name='match_day_a_venir_idx'
+            ),
+            # Victoires / défaites d'une saison
+            models.Index(fields=['saison', 'issue'], name='match_day_saison_issue_idx'),
+            # Matchs les plus serrés
+            models.Index(models.functions.Abs('ecart_points'), name='match_day_ecart_idx'),
+        ]
+        # Les résultats à vérifier (voir a_verifier) sont exemptés
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(a_verifier=True)
+                | models.Q(sets_club__isnull=True, sets_adverse__isnull=True)
+                | models.Q(sets_club__isnull=False, sets_adverse__isnull=False),
+                name='match_day_sets_ensemble',
+            ),
+            models.CheckConstraint(
+                condition=models.Q(a_verifier=True)
+                | models.Q(sets_club__isnull=True)
+                | models.Q(
+                    sets_club__gte=0, sets_club__lte=3, sets_adverse__gte=0, sets_adverse__lte=3,
+                ) & ~models.Q(sets_club=3, sets_adverse=3),
+                name='match_day_sets_valides',
+            ),
+        ] + [
+            models.CheckConstraint(
+                condition=models.Q(a_verifier=True)
+                | models.Q(**{f'set{i}_{camp}__gte': 0}) | models.Q(**{f'set{i}_{camp}__isnull': True}),
+                name=f'match_day_set{i}_{camp}_positif',
+            )
+            for i in range(1, 6) for camp in ('club', 'adverse')
+        ]
         
 class MatchDayEquipeAdverse(models.Model):
     """Table de liaison entre Match et Équipe Adverse"""
@@ -281,6 +703,157 @@ class MatchDayEquipeAdverse(models.Model):
         unique_together = [['match_day', 'equipe_adverse']]
 
 
+"""Scores par set"""
+
+class ScoreSetQuerySet(models.QuerySet):
+    """Requêtes d'agrégation sur les scores par set"""
+
+    def statistiques_par_set(self):
+        """Moyennes et totaux par numéro de set, en une seule requête"""
+        ecart = models.F('points_club') - models.F('points_adverse')
+        return (
+            self.order_by('numero')
+            .values('numero')
+            .annotate(
+                nb_sets=models.Count('id'),
+                sets_gagnes=models.Count('id', filter=models.Q(points_club__gt=models.F('points_adverse'))),
+                total_points_club=models.Sum('points_club'),
+                total_points_adverse=models.Sum('points_adverse'),
+                moyenne_points_club=models.Avg('points_club'),
+                moyenne_points_adverse=models.Avg('points_adverse'),
+                moyenne_ecart=models.Avg(ecart),
+            )
+        )
+
+    def scores_par_match(self, match_ids):
+        """Lecture groupée : {match_id: [(numero, club, adverse), ...]}"""
+        scores = {match_id: [] for match_id in match_ids}
+        lignes = (
+            self.filter(match_day_id__in=match_ids)
+            .order_by('match_day_id', 'numero')
+            .values_list('match_day_id', 'numero', 'points_club', 'points_adverse')
+        )
+        for match_id, numero, club, adverse in lignes:
+            scores[match_id].append((numero, club, adverse))
+        return scores
+
+    def synchroniser(self, matchs):
+        """Écriture groupée : remplace les sets des matchs donnés à partir de leurs colonnes setN_*"""
+        matchs = list(matchs)
+        sets = [
+            self.model(match_day_id=match.pk, numero=numero, points_club=club, points_adverse=adverse)
+            for match in matchs
+            for numero, club, adverse in match.sets_joues()
+        ]
+        self.filter(match_day_id__in=[match.pk for match in matchs]).delete()
+        return self.bulk_create(sets, batch_size=1000)
+
+    def reconstruire(self, taille_lot=2000):
+        """Recopie les sets de tous les matchs (après un loaddata ou un import SQL brut)"""
+        matchs = MatchDay.objects.only(*CHAMPS_SETS).order_by('pk').iterator(chunk_size=taille_lot)
+        with transaction.atomic():
+            self.all().delete()
+            return len(self.bulk_create(
+                (
+                    self.model(match_day_id=match.pk, numero=numero, points_club=club, points_adverse=adverse)
+                    for match in matchs
+                    for numero, club, adverse in match.sets_joues()
+                ),
+                batch_size=1000,
+            ))
+
+
+class ScoreSet(models.Model):
+    """Score d'un set d'un match (une ligne par set joué)"""
+    match_day = models.ForeignKey(
+        MatchDay,
+        on_delete=models.CASCADE,
+        related_name='scores_sets',
+        verbose_name='Match'
+    )
+    numero = models.PositiveSmallIntegerField(verbose_name='Numéro du set')
+    points_club = models.IntegerField(verbose_name='Points du club')
+    points_adverse = models.IntegerField(verbose_name='Points de l\'adversaire')
+
+    objects = ScoreSetQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.match_day} - Set {self.numero} : {self.points_club}-{self.points_adverse}"
+
+    class Meta:
+        managed = True
+        db_table = 'score_set'
+        verbose_name = 'Score de set'
+        verbose_name_plural = 'Scores de sets'
+        ordering = ['match_day', 'numero']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['match_day', 'numero'],
+                name='score_set_match_numero_uniq'
+            ),
+        ]
+
+
+"""Classements"""
+
+class Classement(models.Model):
+    """Classement précalculé par saison et par championnat"""
+    saison = models.ForeignKey(
+        Saison,
+        on_delete=models.CASCADE,
+        verbose_name='Saison'
+    )
+    championnat = models.ForeignKey(
+        ChampionnatCompetition,
+        on_delete=models.CASCADE,
+        verbose_name='Championnat'
+    )
+    # Copie des catégories du championnat pour filtrer sans jointure
+    category_genre = models.ForeignKey(
+        CategoryGenre,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        verbose_name='Genre'
+    )
+    category_age = models.ForeignKey(
+        CategoryAge,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        verbose_name='Catégorie d\'âge'
+    )
+    matchs_joues = models.IntegerField(default=0, verbose_name='Matchs joués')
+    victoires = models.IntegerField(default=0)
+    defaites = models.IntegerField(default=0, verbose_name='Défaites')
+    sets_gagnes = models.IntegerField(default=0, verbose_name='Sets gagnés')
+    sets_perdus = models.IntegerField(default=0, verbose_name='Sets perdus')
+    points_gagnes = models.IntegerField(default=0, verbose_name='Points gagnés')
+    points_perdus = models.IntegerField(default=0, verbose_name='Points perdus')
+
+    def __str__(self):
+        return f"{self.championnat} ({self.saison}) - {self.victoires}V/{self.defaites}D"
+
+    class Meta:
+        managed = True
+        db_table = 'classement'
+        verbose_name = 'Classement'
+        verbose_name_plural = 'Classements'
+        ordering = ['-victoires', 'defaites']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['saison', 'championnat'],
+                name='classement_saison_championnat_uniq'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['saison', 'category_genre', 'category_age'],
+                name='classement_saison_categ_idx'
+            ),
+        ]
+
+
 """Palmares du club ASI"""
 
 class PalmaresClub(models.Model):
@@ -293,6 +866,7 @@ class PalmaresClub(models.Model):
         on_delete=models.PROTECT,  # ✅ Changé
         verbose_name='Genre'
     )
+    recherche = champ_recherche(titre='A', competition='B')
 
     def __str__(self):
         return f"{self.titre} - {self.competition} ({self.annee})"
@@ -303,5 +877,9 @@ class PalmaresClub(models.Model):
         verbose_name = 'Palmarès'
         verbose_name_plural = 'Palmarès'
         ordering = ['-annee']
+        indexes = [
+            GinIndex(fields=['recherche'], name='palmares_recherche_idx'),
+            index_trigrammes('titre', 'palmares_titre_trgm_idx'),
+        ]
 
 
@@ -0,0 +1,142 @@
+"""
+Pagination par curseur (keyset) sur un ordre décroissant à deux champs.
+
+Contrairement à OFFSET, le coût d'une page ne dépend pas de sa position :
+la page suivante est lue avec ``WHERE (a, b) < (dernier_a, dernier_b)``
+sur les mêmes colonnes que l'index.
+
+Ce module fournit aussi PaginateurEstime, utilisé par l'admin pour éviter
+un COUNT(*) complet sur les grandes tables.
+"""
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+class PageCurseur:
+    """Une page de résultats et le curseur de la page suivante"""
+
+    def __init__(self, elements, curseur_suivant):
+        self.elements = elements
+        self.curseur_suivant = curseur_suivant
+
+    @property
+    def a_suivante(self):
+        return self.curseur_suivant is not None
+
+    def __iter__(self):
+        return iter(self.elements)
+
+    def __len__(self):
+        return len(self.elements)
+
+
+def encoder_curseur(valeurs):
+    texte = json.dumps([str(valeur) for valeur in valeurs])
+    return base64.urlsafe_b64encode(texte.encode()).decode().rstrip('=')
+
+
+def decoder_curseur(curseur, model, champs):
+    """Retourne les valeurs typées du curseur, ou None s'il est invalide"""
+    try:
+        texte = base64.urlsafe_b64decode(curseur + '=' * (-len(curseur) % 4)).decode()
+        valeurs = json.loads(texte)
+        if len(valeurs) != len(champs):
+            return None
+        return [
+            model._meta.get_field(champ).to_python(valeur)
+            for champ, valeur in zip(champs, valeurs)
+        ]
+    except (ValueError, TypeError, ValidationError):
+        return None
+
+
+def _valeur(element, champ):
+    """Valeur d'un champ sur une instance ou un dict (queryset .values())"""
+    if isinstance(element, dict):
+        return element[champ]
+    return getattr(element, champ)
+
+
+def _filtrer_apres_curseur(queryset, curseur, champs):
+    premier, second = champs
+    queryset = queryset.order_by(f'-{premier}', f'-{second}')
+
+    valeurs = decoder_curseur(curseur, queryset.model, champs) if curseur else None
+    if valeurs is not None:
+        valeur_premier, valeur_second = valeurs
+        queryset = queryset.filter(
+            Q(**{f'{premier}__lt': valeur_premier})
+            | Q(**{premier: valeur_premier, f'{second}__lt': valeur_second})
+        )
+    return queryset
+
+
+def _construire_page(elements, taille, champs):
+    # La requête lit un élément de plus pour savoir s'il existe une page suivante
+    premier, second = champs
+    curseur_suivant = None
+    if len(elements) > taille:
+        elements = elements[:taille]
+        dernier = elements[-1]
+        curseur_suivant = encoder_curseur([_valeur(dernier, premier), _valeur(dernier, second)])
+    return PageCurseur(elements, curseur_suivant)
+
+
+def paginer_par_curseur(queryset, curseur=None, taille=20, champs=('date_rencontre', 'id')):
+    """
+    Pagine ``queryset`` par ordre décroissant sur ``champs`` (le dernier doit
+    être unique). Un curseur invalide renvoie la première page.
+    """
+    queryset = _filtrer_apres_curseur(queryset, curseur, champs)
+    return _construire_page(list(queryset[:taille + 1]), taille, champs)
+
+
+async def apaginer_par_curseur(queryset, curseur=None, taille=20, champs=('date_rencontre', 'id')):
+    """Version asynchrone de paginer_par_curseur (ORM asynchrone)"""
+    queryset = _filtrer_apres_curseur(queryset, curseur, champs)
+    elements = [element async for element in queryset[:taille + 1]]
+    return _construire_page(elements, taille, champs)
+
+
+# ==================== NOMBRE ESTIMÉ ====================
+
+SEUIL_ESTIMATION = 10000
+
+
+def estimation_lignes(modele, alias='default'):
+    """Nombre de lignes estimé par les statistiques de PostgreSQL (None si indisponible)"""
+    connexion = connections[alias]
+    if connexion.vendor != 'postgresql':
+        return None
+    with connexion.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)",
+            [connexion.ops.quote_name(modele._meta.db_table)],
+        )
+        ligne = cursor.fetchone()
+    # reltuples vaut -1 tant que la table n'a pas été analysée
+    if ligne is None or ligne[0] < 0:
+        return None
+    return ligne[0]
+
+
+class PaginateurEstime(Paginator):
+    """
+    Paginator dont le total vient des statistiques de la table quand la liste
+    n'est pas filtrée et que la table est grande ; COUNT(*) exact sinon.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if hasattr(queryset, 'query') and not queryset.query.where:
+            estimation = estimation_lignes(queryset.model, queryset.db)
+            if estimation is not None and estimation >= SEUIL_ESTIMATION:
+                return estimation
+        return super().count
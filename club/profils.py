@@ -0,0 +1,58 @@
+"""
+Profil du joueur connecté, gardé dans la session.
+
+Le joueur est retrouvé par son lien Joueur.utilisateur (index unique) et
+le profil (catégories, coéquipiers) est mémorisé dans la session avec la
+version de cache des joueurs : il n'est recalculé que lorsqu'un joueur a
+changé (voir cache.py). Les matchs viennent du fil de la catégorie
+(voir flux.py).
+"""
+from datetime import date
+
+from .cache import versions_modeles
+from .models import Joueur
+
+CLE_SESSION = 'profil_joueur'
+
+MODELES_PROFIL = [Joueur]
+
+
+def _calculer(utilisateur, versions):
+    joueur = (
+        Joueur.objects.filter(utilisateur=utilisateur)
+        .values('pk', 'nom', 'prenom', 'date_naissance', 'category_id', 'category_age_id', 'category_age__nom')
+        .first()
+    )
+    coequipiers = []
+    if joueur is not None:
+        coequipiers = list(
+            Joueur.objects.filter(category_id=joueur['category_id'], category_age_id=joueur['category_age_id'])
+            .exclude(pk=joueur['pk'])
+            .order_by('nom', 'prenom')
+            .values('pk', 'nom', 'prenom')
+        )
+        # Session sérialisée en JSON
+        joueur['date_naissance'] = joueur['date_naissance'].isoformat()
+    return {
+        'utilisateur': utilisateur.pk,
+        'versions': versions,
+        'joueur': joueur,
+        'coequipiers': coequipiers,
+    }
+
+
+def profil_session(request):
+    """Profil du joueur connecté : {'joueur': dict ou None, 'coequipiers': [dicts]}"""
+    versions = versions_modeles(MODELES_PROFIL)
+    profil = request.session.get(CLE_SESSION)
+    if (
+        profil is None or profil['utilisateur'] != request.user.pk
+        or profil['versions'] != versions or 'coequipiers' not in profil
+    ):
+        profil = _calculer(request.user, versions)
+        request.session[CLE_SESSION] = profil
+
+    joueur = profil['joueur']
+    if joueur is not None:
+        joueur = {**joueur, 'date_naissance': date.fromisoformat(joueur['date_naissance'])}
+    return {'joueur': joueur, 'coequipiers': profil['coequipiers']}
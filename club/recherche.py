@@ -0,0 +1,139 @@
+"""
+Recherche plein texte sur les joueurs, adversaires, championnats et palmarès.
+
+Chaque modèle porte une colonne ``recherche`` (tsvector français calculé et
+stocké par PostgreSQL à chaque écriture, voir ``champ_recherche``) indexée en
+GIN ; les accents sont retirés des deux côtés par la fonction SQL immuable
+``club_sans_accents`` (migration 0009), « eleonore » trouve donc « Éléonore ».
+Les mots saisis sont cherchés par préfixe (« rako » trouve « Rakoto »).
+
+Quand l'extension pg_trgm est installée, la migration ajoute un index
+trigrammes sur le libellé de chaque modèle et la recherche tolère les fautes
+de frappe (« rakto ») : la similarité trigramme s'ajoute alors au rang plein
+texte. Sans pg_trgm, seule la recherche plein texte est faite.
+
+La même fonction ``filtrer`` sert à la page publique, à l'API et aux champs
+de recherche de l'admin.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import F, Q, TextField, Value
+from django.db.models.functions import Cast
+from django.urls import reverse
+
+from .models import (
+    NOM_COMPLET_JOUEUR, ChampionnatCompetition, EquipeAdverse, Joueur, PalmaresClub, sans_accents
+)
+
+LONGUEUR_MIN = 2
+LIMITE_DEFAUT = 20
+LIMITE_MAX = 50
+MOTS_MAX = 8
+
+# Type public -> modèle, libellé affiché, détail et texte indexé en trigrammes
+# (le même que l'index de la migration 0009, sinon PostgreSQL ne l'utilise pas)
+SOURCES = {
+    'joueur': {
+        'modele': Joueur,
+        'libelle': NOM_COMPLET_JOUEUR,
+        'detail': F('category_age__nom'),
+        'trigrammes': NOM_COMPLET_JOUEUR,
+    },
+    'adversaire': {
+        'modele': EquipeAdverse,
+        'libelle': F('nom'),
+        'detail': F('category_age__nom'),
+        'trigrammes': 'nom',
+    },
+    'championnat': {
+        'modele': ChampionnatCompetition,
+        'libelle': F('nom'),
+        'detail': F('lieu_deroulement'),
+        'trigrammes': 'nom',
+    },
+    'palmares': {
+        'modele': PalmaresClub,
+        'libelle': F('titre'),
+        'detail': F('competition'),
+        'trigrammes': 'titre',
+    },
+}
+SOURCES_PAR_MODELE = {source['modele']: source for source in SOURCES.values()}
+MODELES = [source['modele'] for source in SOURCES.values()]
+
+
+def mots(texte):
+    """Mots de la saisie (lettres et chiffres), sans la ponctuation qui casserait la tsquery"""
+    return re.findall(r'[^\W_]+', texte or '')[:MOTS_MAX]
+
+
+def requete(texte):
+    """tsquery « mot1:* & mot2:* » sans accents, ou None si la saisie ne contient aucun mot"""
+    termes = mots(texte)
+    if not termes:
+        return None
+    brut = ' & '.join(f'{terme}:*' for terme in termes)
+    return SearchQuery(sans_accents(Value(brut)), config='french', search_type='raw')
+
+
+def trigrammes_disponibles(using=DEFAULT_DB_ALIAS):
+    """pg_trgm est-il installé ? (vérifié une fois par connexion)"""
+    connexion = connections[using]
+    if not hasattr(connexion, '_club_pg_trgm'):
+        with connexion.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            connexion._club_pg_trgm = cursor.fetchone() is not None
+    return connexion._club_pg_trgm
+
+
+def filtrer(queryset, texte):
+    """Restreint `queryset` aux lignes qui correspondent à `texte`, annotées de leur `pertinence`"""
+    tsquery = requete(texte)
+    if tsquery is None:
+        return queryset.none()
+    source = SOURCES_PAR_MODELE[queryset.model]
+    condition = Q(recherche=tsquery)
+    pertinence = SearchRank(F('recherche'), tsquery)
+    if trigrammes_disponibles(queryset.db):
+        cible = sans_accents(Value(' '.join(mots(texte))))
+        queryset = queryset.alias(cle_trigrammes=sans_accents(source['trigrammes']))
+        condition |= Q(cle_trigrammes__trigram_word_similar=cible)
+        pertinence = pertinence + TrigramWordSimilarity(cible, 'cle_trigrammes')
+    return queryset.annotate(pertinence=pertinence).filter(condition)
+
+
+def _url(resultat):
+    if resultat['type'] == 'adversaire':
+        return reverse('club:adversaire', args=[resultat['id']])
+    if resultat['type'] == 'palmares':
+        return reverse('club:historique')
+    return None
+
+
+def rechercher(texte, types=None, limite=LIMITE_DEFAUT):
+    """Résultats classés par pertinence, tous types confondus, en une seule requête (UNION ALL).
+
+    Chaque résultat : {'type', 'id', 'libelle', 'detail', 'pertinence', 'url'}.
+    """
+    if requete(texte) is None:
+        return []
+    branches = [
+        filtrer(source['modele'].objects.all(), texte)
+        .annotate(
+            type=Value(type_resultat, output_field=TextField()),
+            libelle=Cast(source['libelle'], TextField()),
+            detail=Cast(source['detail'], TextField()),
+        )
+        .order_by('-pertinence', 'libelle')
+        .values('type', 'id', 'libelle', 'detail', 'pertinence')[:limite]
+        for type_resultat, source in SOURCES.items()
+        if types is None or type_resultat in types
+    ]
+    if not branches:
+        return []
+    resultats = branches[0]
+    if len(branches) > 1:
+        resultats = resultats.union(*branches[1:], all=True).order_by('-pertinence', 'libelle')[:limite]
+    return [{**resultat, 'url': _url(resultat)} for resultat in resultats]
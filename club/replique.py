@@ -0,0 +1,123 @@
+"""
+Lecture des pages publiques sur une réplique PostgreSQL.
+
+Quand l'alias REPLIQUE['ALIAS'] existe dans DATABASES, les vues décorées par
+``lecture_replique`` (accueil, calendrier, matchs d'une catégorie, historique)
+lisent les modèles du club sur la réplique ; tout le reste (admin, sessions,
+comptes, écritures) reste sur 'default'. L'alias est porté par une variable
+de contexte, que ``sync_to_async`` transmet aux requêtes ORM des vues
+asynchrones, et lu par ``RouteurReplique``.
+
+Lire ce qu'on vient d'écrire : la réplique peut avoir quelques secondes de
+retard. Après une requête POST (ou PUT, DELETE...), ``RepliqueMiddleware``
+(middleware.py) pose un cookie qui renvoie ce visiteur vers le primaire pendant
+REPLIQUE['DELAI_COLLANT'] secondes. Chaque invalidation du cache des pages
+(``invalider_modele``, appelée à chaque écriture sur un modèle du club) ouvre
+aussi la même fenêtre pour tout le monde : sans cela, une page recalculée
+depuis une réplique en retard serait mise en cache sous la nouvelle version
+de ses modèles et y resterait.
+
+Sans réplique configurée, le décorateur et le middleware ne font rien.
+"""
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+REGLAGES_DEFAUT = {
+    'ALIAS': 'replica',
+    'DELAI_COLLANT': 10,
+    'COOKIE': 'asi_primaire',
+}
+
+CLE_ECRITURE = 'replique:ecriture'
+METHODES_SURES = {'GET', 'HEAD', 'OPTIONS', 'TRACE'}
+
+_alias_lecture = ContextVar('club_alias_lecture', default=None)
+
+
+def reglages():
+    return {**REGLAGES_DEFAUT, **getattr(settings, 'REPLIQUE', {})}
+
+
+def replique_active():
+    return reglages()['ALIAS'] in settings.DATABASES
+
+
+def alias_lecture():
+    """Alias où lire les modèles du club dans le contexte courant (None : primaire)"""
+    return _alias_lecture.get()
+
+
+def noter_ecriture():
+    """Renvoie toutes les lectures vers le primaire le temps que la réplique rattrape l'écriture"""
+    if replique_active():
+        cache.set(CLE_ECRITURE, 1, reglages()['DELAI_COLLANT'])
+
+
+def _alias_pour(request, ecriture_recente):
+    options = reglages()
+    if ecriture_recente or request.COOKIES.get(options['COOKIE']):
+        return None
+    return options['ALIAS']
+
+
+def coller_au_primaire(request, response):
+    """Après une requête qui écrit, renvoie ce visiteur vers le primaire pendant DELAI_COLLANT secondes"""
+    if request.method not in METHODES_SURES and replique_active():
+        options = reglages()
+        response.set_cookie(
+            options['COOKIE'], '1', max_age=options['DELAI_COLLANT'],
+            httponly=True, samesite='Lax', secure=request.is_secure(),
+        )
+    return response
+
+
+def lecture_replique(vue):
+    """Les lectures ORM de la vue vont sur la réplique (sauf écriture récente)"""
+    if iscoroutinefunction(vue):
+        @wraps(vue)
+        async def wrapper_async(request, *args, **kwargs):
+            if not replique_active():
+                return await vue(request, *args, **kwargs)
+            jeton = _alias_lecture.set(_alias_pour(request, await cache.aget(CLE_ECRITURE) is not None))
+            try:
+                return await vue(request, *args, **kwargs)
+            finally:
+                _alias_lecture.reset(jeton)
+        return wrapper_async
+
+    @wraps(vue)
+    def wrapper(request, *args, **kwargs):
+        if not replique_active():
+            return vue(request, *args, **kwargs)
+        jeton = _alias_lecture.set(_alias_pour(request, cache.get(CLE_ECRITURE) is not None))
+        try:
+            return vue(request, *args, **kwargs)
+        finally:
+            _alias_lecture.reset(jeton)
+    return wrapper
+
+
+class RouteurReplique:
+    """Routeur de DATABASE_ROUTERS : seules les lectures des modèles du club suivent `lecture_replique`"""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == 'club':
+            return _alias_lecture.get()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Mêmes données des deux côtés
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == reglages()['ALIAS']:
+            return False
+        return None
@@ -0,0 +1,171 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import classement, flux, live
+from .cache import invalider_modele, invalider_objets
+from .models import (
+    CHAMPS_SETS, CategoryAge, CategoryGenre, ChampionnatCompetition, Classement, EquipeAdverse, Joueur,
+    MatchDay, MatchDayEquipeAdverse, PalmaresClub, Saison, ScoreSet
+)
+
+# Champs affichés dans le fil des catégories (flux.py)
+CHAMPS_FLUX = ['date_rencontre', 'lieu_rencontre', 'championnat_id', 'sets_club', 'sets_adverse']
+
+# ==================== MATCHS ====================
+
+@receiver(pre_save, sender=MatchDay)
+def memoriser_etat_match(sender, instance, raw=False, **kwargs):
+    """Garde l'état enregistré du match avant modification"""
+    instance._etat_precedent = None
+    if raw or instance.pk is None:
+        return
+    instance._etat_precedent = (
+        MatchDay.objects.filter(pk=instance.pk)
+        .values(*classement.CHAMPS_CLASSEMENT, 'date_rencontre', 'lieu_rencontre')
+        .first()
+    )
+
+
+@receiver(post_save, sender=MatchDay)
+def maj_classement_match(sender, instance, raw=False, **kwargs):
+    """Met à jour le classement de façon incrémentale"""
+    if raw:
+        return
+    etat_precedent = getattr(instance, '_etat_precedent', None)
+    if etat_precedent is not None:
+        classement.retirer(etat_precedent)
+    classement.ajouter(instance)
+
+
+@receiver(post_save, sender=MatchDay)
+def synchroniser_scores_sets(sender, instance, created=False, raw=False, **kwargs):
+    """Recopie les colonnes setN_* dans la table ScoreSet quand elles changent"""
+    if raw:
+        return
+    etat_precedent = getattr(instance, '_etat_precedent', None)
+    if etat_precedent is not None and all(
+        etat_precedent[champ] == getattr(instance, champ) for champ in CHAMPS_SETS
+    ):
+        return
+    if created and not instance.sets_joues():
+        return
+    ScoreSet.objects.synchroniser([instance])
+
+
+@receiver(post_save, sender=MatchDay)
+def diffuser_score(sender, instance, created=False, raw=False, **kwargs):
+    """Publie le nouveau score aux spectateurs abonnés (après validation de la transaction)"""
+    if raw or created:
+        return
+    etat_precedent = getattr(instance, '_etat_precedent', None)
+    if etat_precedent is not None and all(
+        etat_precedent[champ] == getattr(instance, champ)
+        for champ in CHAMPS_SETS + ['sets_club', 'sets_adverse']
+    ):
+        return
+    message = live.message_score(instance)
+    transaction.on_commit(lambda: live.get_broker().publier(instance.pk, message))
+
+
+@receiver(post_delete, sender=MatchDay)
+def retirer_match_du_classement(sender, instance, **kwargs):
+    classement.retirer(classement.etat_match(instance))
+
+
+# ==================== BILANS PAR ADVERSAIRE ====================
+
+@receiver(post_save, sender=MatchDay)
+def invalider_bilans_match(sender, instance, created=False, raw=False, **kwargs):
+    """Un match modifié rend obsolète le bilan de ses adversaires"""
+    # À la création, le match n'a pas encore d'adversaires : ce sont les
+    # liaisons MatchDayEquipeAdverse qui invalident alors les bilans.
+    if raw or created:
+        return
+    invalider_objets(
+        EquipeAdverse,
+        MatchDayEquipeAdverse.objects.filter(match_day=instance).values_list('equipe_adverse_id', flat=True),
+    )
+
+
+@receiver(post_save, sender=MatchDayEquipeAdverse)
+@receiver(post_delete, sender=MatchDayEquipeAdverse)
+def invalider_bilan_liaison(sender, instance, raw=False, **kwargs):
+    # La suppression d'un match passe par ici (suppression en cascade des liaisons)
+    if raw:
+        return
+    invalider_objets(EquipeAdverse, [instance.equipe_adverse_id])
+
+
+# ==================== FIL DES CATÉGORIES ====================
+
+@receiver(post_save, sender=MatchDay)
+def rafraichir_flux_match(sender, instance, raw=False, **kwargs):
+    """Recalcule le fil de la catégorie du match (et de l'ancienne s'il a changé de championnat)"""
+    if raw:
+        return
+    etat_precedent = getattr(instance, '_etat_precedent', None)
+    championnats = {instance.championnat_id}
+    if etat_precedent is not None:
+        # Saisie en direct des sets : le fil ne change pas
+        if all(etat_precedent[champ] == getattr(instance, champ) for champ in CHAMPS_FLUX):
+            return
+        championnats.add(etat_precedent['championnat_id'])
+    flux.planifier(championnats=championnats)
+
+
+@receiver(post_delete, sender=MatchDay)
+def rafraichir_flux_match_supprime(sender, instance, **kwargs):
+    flux.planifier(championnats=[instance.championnat_id])
+
+
+@receiver(post_save, sender=MatchDayEquipeAdverse)
+@receiver(post_delete, sender=MatchDayEquipeAdverse)
+def rafraichir_flux_liaison(sender, instance, raw=False, **kwargs):
+    """Les adversaires affichés dans le fil viennent des liaisons"""
+    if raw:
+        return
+    flux.planifier(matchs=[instance.match_day_id])
+
+
+@receiver(post_save, sender=ChampionnatCompetition)
+@receiver(post_delete, sender=ChampionnatCompetition)
+@receiver(post_save, sender=EquipeAdverse)
+def rafraichir_tous_les_flux(sender, instance, created=False, raw=False, **kwargs):
+    """Catégorie d'un championnat ou nom d'un adversaire : rare, on recalcule tous les fils"""
+    if raw or created:
+        return
+    flux.planifier(tout=True)
+
+
+# ==================== COMPÉTITIONS ====================
+
+@receiver(post_save, sender=ChampionnatCompetition)
+def maj_categories_classement(sender, instance, raw=False, **kwargs):
+    """Répercute les catégories du championnat sur ses lignes de classement"""
+    if raw:
+        return
+    Classement.objects.filter(championnat=instance).update(
+        category_genre_id=instance.category_genre_id,
+        category_age_id=instance.category_age_id,
+    )
+
+
+# ==================== CACHE DES PAGES ====================
+
+MODELES_EN_CACHE = [
+    CategoryAge, CategoryGenre, ChampionnatCompetition, EquipeAdverse, Joueur,
+    MatchDay, MatchDayEquipeAdverse, PalmaresClub, Saison,
+]
+
+
+def invalider_cache(sender, raw=False, **kwargs):
+    """Invalide les pages qui dépendent du modèle modifié"""
+    if raw:
+        return
+    invalider_modele(sender)
+
+
+for modele in MODELES_EN_CACHE:
+    post_save.connect(invalider_cache, sender=modele, dispatch_uid=f'invalider_cache_{modele.__name__}')
+    post_delete.connect(invalider_cache, sender=modele, dispatch_uid=f'invalider_cache_supp_{modele.__name__}')
@@ -0,0 +1,388 @@
+"""
+Chaîne de construction des fichiers statiques du club.
+
+``collectstatic`` avec le stockage StockageStatiques :
+
+1. retire des feuilles de style du club les sélecteurs qui n'apparaissent
+   dans aucun gabarit, module Python ou script du club (extraction « par
+   mots », comme PurgeCSS), puis minifie CSS et JS ;
+2. écrit la CSS critique (``*.critique.css``) des feuilles listées dans
+   STATIQUES['CRITIQUE'] : les règles utiles au haut des pages, jusqu'au
+   marqueur ``{# pli #}`` ;
+3. nomme chaque fichier d'après son contenu (ManifestStaticFilesStorage) et
+   écrit à côté une variante gzip, et brotli si le paquet est installé.
+
+Les noms changent avec le contenu : le serveur web peut servir STATIC_URL
+avec « Cache-Control: public, max-age=31536000, immutable » et les
+variantes .gz/.br (gzip_static / brotli_static de nginx).
+"""
+import gzip
+import re
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.template.loader import get_template
+
+try:
+    import brotli
+except ImportError:  # compression brotli facultative
+    brotli = None
+
+REGLAGES_DEFAUT = {
+    # Classes ajoutées par le JavaScript de Bootstrap ou du thème, absentes des gabarits
+    'LISTE_BLANCHE': [],
+    # Feuille de style -> gabarits dont le haut de page sert à calculer la CSS critique
+    'CRITIQUE': {},
+    # Feuilles de polices téléchargées par `vendoriser_polices`
+    'POLICES': [],
+}
+
+MARQUEUR_PLI = '{# pli #}'
+EXTENSIONS_COMPRESSEES = {'.css', '.js', '.svg', '.json', '.txt', '.html', '.map', '.ttf', '.eot'}
+TAILLE_MIN_COMPRESSION = 256
+
+
+def reglages():
+    return {**REGLAGES_DEFAUT, **getattr(settings, 'STATIQUES', {})}
+
+
+# ==================== ANALYSE CSS ====================
+
+_CHAINE = r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\''
+_RE_CHAINE = re.compile(_CHAINE, re.S)
+_ESPACES = re.compile(rf'({_CHAINE})|\s+', re.S)
+_COMMENTAIRE = re.compile(rf'({_CHAINE})|/\*(?!!).*?\*/', re.S)
+# Groupes dont le contenu ne restreint pas la correspondance (:not(.a) vaut aussi sans .a)
+_GROUPES_NEUTRES = re.compile(r':(?:not|is|where|has)\((?:[^()]|\([^()]*\))*\)')
+_CLASSES_ID = re.compile(r'[.#](-?[_a-zA-Z][\w-]*)')
+_MOTS = re.compile(r'[\w-]+')
+# Règles de groupe dont les règles internes sont elles aussi filtrées
+GROUPES_IMBRIQUES = {'media', 'supports', 'layer', 'container'}
+
+
+def _fin_bloc(css, debut):
+    """Position de l'accolade fermant le bloc ouvert juste avant `debut`"""
+    profondeur = 1
+    i = debut
+    while i < len(css):
+        caractere = css[i]
+        if caractere in '"\'':
+            fin = _RE_CHAINE.match(css, i)
+            i = fin.end() if fin else i + 1
+            continue
+        if css.startswith('/*', i):
+            i = css.find('*/', i + 2)
+            i = len(css) if i < 0 else i + 2
+            continue
+        if caractere == '{':
+            profondeur += 1
+        elif caractere == '}':
+            profondeur -= 1
+            if profondeur == 0:
+                return i
+        i += 1
+    return len(css)
+
+
+def _prochain(css, i, caracteres):
+    """Position du premier de `caracteres` hors chaînes, commentaires et parenthèses"""
+    parentheses = 0
+    while i < len(css):
+        caractere = css[i]
+        if caractere in '"\'':
+            fin = _RE_CHAINE.match(css, i)
+            i = fin.end() if fin else i + 1
+            continue
+        if css.startswith('/*', i):
+            i = css.find('*/', i + 2)
+            i = len(css) if i < 0 else i + 2
+            continue
+        if caractere == '(':
+            parentheses += 1
+        elif caractere == ')':
+            parentheses -= 1
+        elif caractere in caracteres and parentheses <= 0:
+            return i
+        i += 1
+    return len(css)
+
+
+def analyser(css):
+    """Découpe une feuille en nœuds :
+
+    - ('regle', prelude, declarations)
+    - ('groupe', prelude, [noeuds])   @media, @supports...
+    - ('bloc', prelude, contenu)      @font-face, @keyframes... (gardés tels quels)
+    - ('instruction', texte)          @charset, @import
+    """
+    css = _COMMENTAIRE.sub(lambda m: m.group(1) or '', css)
+    noeuds = []
+    i = 0
+    while i < len(css):
+        while i < len(css) and (css[i].isspace() or css[i] == ';'):
+            i += 1
+        if i >= len(css):
+            break
+        if css.startswith('/*!', i):
+            fin = css.find('*/', i)
+            fin = len(css) if fin < 0 else fin + 2
+            noeuds.append(('instruction', css[i:fin]))
+            i = fin
+            continue
+        separateur = _prochain(css, i, '{;' if css[i] == '@' else '{')
+        prelude = css[i:separateur].strip()
+        if separateur >= len(css) or css[separateur] == ';':
+            noeuds.append(('instruction', prelude + ';'))
+            i = separateur + 1
+            continue
+        fin = _fin_bloc(css, separateur + 1)
+        contenu = css[separateur + 1:fin]
+        if prelude.startswith('@'):
+            nom = re.match(r'@([\w-]+)', prelude).group(1).lower()
+            if nom in GROUPES_IMBRIQUES:
+                noeuds.append(('groupe', prelude, analyser(contenu)))
+            else:
+                noeuds.append(('bloc', prelude, contenu))
+        else:
+            noeuds.append(('regle', prelude, contenu))
+        i = fin + 1
+    return noeuds
+
+
+def _decouper(texte, separateur=','):
+    morceaux = []
+    i = 0
+    while i <= len(texte):
+        fin = _prochain(texte, i, separateur)
+        if texte[i:fin].strip():
+            morceaux.append(texte[i:fin])
+        i = fin + 1
+    return morceaux
+
+
+def _compacter(texte):
+    """Réduit les blancs à un espace, hors chaînes"""
+    return _ESPACES.sub(lambda m: m.group(1) or ' ', texte).strip()
+
+
+def _declarations(corps):
+    declarations = []
+    for declaration in _decouper(corps, ';'):
+        if ':' not in declaration:
+            continue
+        propriete, valeur = declaration.split(':', 1)
+        valeur = _compacter(valeur)
+        valeur = re.sub(rf'({_CHAINE})|\s*,\s*', lambda m: m.group(1) or ',', valeur)
+        propriete = propriete.strip()
+        # Propriété personnalisée vide (« --bs-btn-font-family: ; ») : l'espace est sa valeur
+        if not valeur and propriete.startswith('--'):
+            valeur = ' '
+        declarations.append(f'{propriete}:{valeur}')
+    return ';'.join(declarations)
+
+
+def serialiser(noeuds):
+    """Écrit les nœuds en CSS minifiée"""
+    morceaux = []
+    for noeud in noeuds:
+        if noeud[0] == 'instruction':
+            morceaux.append(noeud[1])
+        elif noeud[0] == 'regle':
+            selecteurs = ','.join(_compacter(s) for s in _decouper(noeud[1]))
+            morceaux.append(f'{selecteurs}{{{_declarations(noeud[2])}}}')
+        elif noeud[0] == 'groupe':
+            prelude = re.sub(r'\s*:\s*', ':', _compacter(noeud[1]))
+            morceaux.append(f'{prelude}{{{serialiser(noeud[2])}}}')
+        else:
+            morceaux.append(f'{_compacter(noeud[1])}{{{_compacter(noeud[2])}}}')
+    return ''.join(morceaux)
+
+
+# ==================== PURGE ====================
+
+def _selecteur_utilise(selecteur, mots):
+    noms = _CLASSES_ID.findall(_GROUPES_NEUTRES.sub('', re.sub(_CHAINE, '', selecteur)))
+    return all(nom in mots for nom in noms)
+
+
+def purger(noeuds, mots):
+    """Garde les règles dont au moins un sélecteur n'utilise que des classes et id connus"""
+    gardes = []
+    for noeud in noeuds:
+        if noeud[0] == 'regle':
+            selecteurs = [s for s in _decouper(noeud[1]) if _selecteur_utilise(s, mots)]
+            if selecteurs:
+                gardes.append(('regle', ','.join(selecteurs), noeud[2]))
+        elif noeud[0] == 'groupe':
+            enfants = purger(noeud[2], mots)
+            if enfants:
+                gardes.append(('groupe', noeud[1], enfants))
+        else:
+            gardes.append(noeud)
+    return gardes
+
+
+def mots_de(textes):
+    mots = set()
+    for texte in textes:
+        mots.update(_MOTS.findall(texte))
+    return mots
+
+
+def _sources_du_club():
+    """Textes où une classe CSS peut apparaître : gabarits, modules Python et scripts du club"""
+    racine = Path(apps.get_app_config('club').path)
+    dossiers = [racine / 'templates'] + [Path(dossier) for moteur in settings.TEMPLATES for dossier in moteur.get('DIRS', [])]
+    fichiers = [f for dossier in dossiers for f in dossier.rglob('*.html')]
+    fichiers += [f for f in racine.rglob('*.py') if 'migrations' not in f.parts]
+    fichiers += list((racine / 'static').rglob('*.js'))
+    return (fichier.read_text(encoding='utf-8') for fichier in fichiers)
+
+
+@lru_cache(maxsize=1)
+def mots_utilises():
+    return frozenset(mots_de(_sources_du_club()) | set(reglages()['LISTE_BLANCHE']))
+
+
+def purger_css(css, mots=None):
+    """Feuille purgée et minifiée"""
+    return serialiser(purger(analyser(css), mots_utilises() if mots is None else mots))
+
+
+# ==================== JAVASCRIPT ====================
+
+_COMMENTAIRE_JS = re.compile(r'/\*.*?\*/', re.S)
+
+
+def minifier_js(js):
+    """Minification prudente : commentaires, indentation et lignes vides.
+
+    Les fins de ligne sont gardées (insertion automatique des points-virgules)
+    et les commentaires « // » ne sont retirés que sur une ligne à eux seuls,
+    pour ne jamais couper une chaîne ou une URL.
+    """
+    js = _COMMENTAIRE_JS.sub('', js)
+    lignes = (ligne.strip() for ligne in js.splitlines())
+    return '\n'.join(ligne for ligne in lignes if ligne and not ligne.startswith('//')) + '\n'
+
+
+# ==================== CSS CRITIQUE ====================
+
+def nom_critique(chemin):
+    """css/agency.css -> css/agency.critique.css"""
+    return re.sub(r'\.css$', '.critique.css', chemin)
+
+
+def haut_de_page(nom_gabarit):
+    source = get_template(nom_gabarit).template.source
+    return source.split(MARQUEUR_PLI, 1)[0]
+
+
+def calculer_critique(css, gabarits):
+    """Règles de `css` utilisées par le haut de page des gabarits donnés"""
+    mots = mots_de(haut_de_page(nom) for nom in gabarits)
+    return serialiser(purger(analyser(css), mots))
+
+
+@lru_cache(maxsize=None)
+def css_critique(chemin):
+    """CSS critique d'une feuille : fichier construit par collectstatic, sinon calculée (développement)"""
+    from django.contrib.staticfiles.storage import staticfiles_storage
+
+    if isinstance(staticfiles_storage, ManifestStaticFilesStorage) and not settings.DEBUG:
+        with staticfiles_storage.open(nom_critique(chemin)) as fichier:
+            return fichier.read().decode('utf-8')
+    source = finders.find(chemin)
+    gabarits = reglages()['CRITIQUE'].get(chemin, [])
+    if source is None or not gabarits:
+        return ''
+    return calculer_critique(Path(source).read_text(encoding='utf-8'), gabarits)
+
+
+# ==================== STOCKAGE ====================
+
+def compresser(contenu):
+    """Variantes précompressées {extension: octets}, seulement si elles sont plus petites"""
+    variantes = {}
+    tampon = BytesIO()
+    with gzip.GzipFile(fileobj=tampon, mode='wb', compresslevel=9, mtime=0) as sortie:
+        sortie.write(contenu)
+    variantes['.gz'] = tampon.getvalue()
+    if brotli is not None:
+        variantes['.br'] = brotli.compress(contenu, quality=11)
+    return {extension: donnees for extension, donnees in variantes.items() if len(donnees) < len(contenu)}
+
+
+class StockageStatiques(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage + purge/minification des fichiers du club + gzip/brotli"""
+
+    def _fichiers_du_club(self, paths):
+        racine = Path(apps.get_app_config('club').path) / 'static'
+        for chemin, (stockage, chemin_source) in paths.items():
+            emplacement = getattr(stockage, 'location', None)
+            if emplacement and Path(emplacement).resolve() == racine.resolve():
+                yield chemin, stockage, chemin_source
+
+    def _remplacer(self, paths, chemin, contenu):
+        """Écrit `contenu` dans STATIC_ROOT et fait lire le hachage depuis cette copie"""
+        if self.exists(chemin):
+            self.delete(chemin)
+        self._save(chemin, ContentFile(contenu.encode('utf-8')))
+        paths[chemin] = (self, chemin)
+
+    def optimiser(self, paths):
+        critiques = reglages()['CRITIQUE']
+        for chemin, stockage, chemin_source in list(self._fichiers_du_club(paths)):
+            if not chemin.endswith(('.css', '.js')):
+                continue
+            with stockage.open(chemin_source) as fichier:
+                source = fichier.read().decode('utf-8')
+            if chemin.endswith('.css'):
+                if chemin in critiques:
+                    self._remplacer(paths, nom_critique(chemin), calculer_critique(source, critiques[chemin]))
+                self._remplacer(paths, chemin, purger_css(source))
+            else:
+                self._remplacer(paths, chemin, minifier_js(source))
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            yield from super().post_process(paths, dry_run, **options)
+            return
+        paths = dict(paths)
+        self.optimiser(paths)
+        # Un fichier peut être renommé à chaque passe : seul le dernier nom compte
+        noms_finaux = {}
+        for nom, nom_hache, traite in super().post_process(paths, dry_run, **options):
+            if not isinstance(traite, Exception) and nom_hache:
+                noms_finaux[nom] = nom_hache
+            yield nom, nom_hache, traite
+        for nom_hache in noms_finaux.values():
+            if Path(nom_hache).suffix in EXTENSIONS_COMPRESSEES:
+                self.ecrire_variantes(nom_hache)
+
+    def url_converter(self, name, hashed_files, template=None):
+        convertir = super().url_converter(name, hashed_files, template)
+
+        def convertir_ou_garder(correspondance):
+            try:
+                return convertir(correspondance)
+            except ValueError:
+                # Image du thème absente du dépôt : l'URL reste telle quelle
+                return correspondance.group(0)
+        return convertir_ou_garder
+
+    def ecrire_variantes(self, nom):
+        with self.open(nom) as fichier:
+            contenu = fichier.read()
+        if len(contenu) < TAILLE_MIN_COMPRESSION:
+            return
+        for extension, donnees in compresser(contenu).items():
+            if self.exists(nom + extension):
+                self.delete(nom + extension)
+            self._save(nom + extension, ContentFile(donnees))
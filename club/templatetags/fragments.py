@@ -0,0 +1,76 @@
+"""
+Fragments de gabarit mis en cache, versionnés comme les pages (voir cache.py).
+
+    {% load fragments %}
+    {% fragment_versionne 'grilles_categories' 'club.CategoryAge' 'club.CategoryGenre' %}
+      ...
+    {% fin_fragment_versionne %}
+
+    {% fragment_versionne 'navigation' selon user.is_authenticated %} ... {% fin_fragment_versionne %}
+
+La clé contient la version des modèles cités (un post_save la change), les
+valeurs qui suivent « selon », et l'empreinte du fichier du gabarit : un
+déploiement qui modifie le gabarit ne ressert jamais l'ancien fragment.
+"""
+import hashlib
+from pathlib import Path
+
+from django import template
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+
+from ..cache import versions_modeles
+from ..metriques import noter_cache
+
+register = template.Library()
+
+
+class FragmentVersionneNode(template.Node):
+    def __init__(self, nodelist, nom, modeles, selon, empreinte):
+        self.nodelist = nodelist
+        self.nom = nom
+        self.modeles = modeles
+        self.selon = selon
+        self.empreinte = empreinte
+
+    def render(self, context):
+        valeurs = [self.empreinte, *versions_modeles(self.modeles), *(var.resolve(context) for var in self.selon)]
+        cle = make_template_fragment_key(self.nom, valeurs)
+        contenu = cache.get(cle)
+        noter_cache('fragments', contenu is not None)
+        if contenu is None:
+            contenu = self.nodelist.render(context)
+            cache.set(cle, contenu, settings.CACHE_PAGES_DUREE)
+        return contenu
+
+
+def _empreinte(origine):
+    try:
+        return hashlib.sha1(Path(origine.name).read_bytes()).hexdigest()[:12]
+    except (AttributeError, TypeError, OSError):
+        return ''  # gabarit construit depuis une chaîne
+
+
+@register.tag
+def fragment_versionne(parser, token):
+    morceaux = token.split_contents()
+    if len(morceaux) < 2:
+        raise template.TemplateSyntaxError(f"'{morceaux[0]}' attend au moins le nom du fragment")
+    nom = morceaux[1].strip('\'"')
+    arguments = morceaux[2:]
+    selon = []
+    if 'selon' in arguments:
+        position = arguments.index('selon')
+        arguments, selon = arguments[:position], arguments[position + 1:]
+    try:
+        modeles = [apps.get_model(label.strip('\'"')) for label in arguments]
+    except (LookupError, ValueError) as erreur:
+        raise template.TemplateSyntaxError(f"'{morceaux[0]}' : {erreur}")
+
+    nodelist = parser.parse(('fin_fragment_versionne',))
+    parser.delete_first_token()
+    return FragmentVersionneNode(
+        nodelist, nom, modeles, [parser.compile_filter(var) for var in selon], _empreinte(parser.origin),
+    )
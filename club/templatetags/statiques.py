@@ -0,0 +1,82 @@
+from functools import lru_cache
+
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+
+from ..images import TYPES_MIME, variantes
+from ..statiques import css_critique as lire_css_critique
+
+register = template.Library()
+
+FEUILLE_POLICES = 'css/polices.css'
+
+
+@register.simple_tag
+def css_critique(chemin):
+    """CSS critique en ligne, feuille complète chargée sans bloquer l'affichage"""
+    url = static(chemin)
+    return format_html(
+        '<style>{}</style>\n'
+        '<link rel="preload" href="{}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'" />\n'
+        '<noscript><link rel="stylesheet" href="{}" /></noscript>',
+        # CSS issue de nos propres fichiers : pas d'échappement HTML
+        mark_safe(lire_css_critique(chemin).replace('</', '<\\/')),
+        url,
+        url,
+    )
+
+
+@lru_cache(maxsize=None)
+def _disponible(chemin):
+    if settings.DEBUG:
+        return finders.find(chemin) is not None
+    return staticfiles_storage.exists(chemin)
+
+
+@register.simple_tag
+def polices():
+    """Polices servies par le site (voir `vendoriser_polices`) ; sans elles, les piles système s'appliquent"""
+    if not _disponible(FEUILLE_POLICES):
+        return ''
+    return format_html('<link rel="stylesheet" href="{}" />', static(FEUILLE_POLICES))
+
+
+def _srcset(liste):
+    return ', '.join(f'{url} {largeur}w' for largeur, url in liste)
+
+
+@register.simple_tag
+def image_responsive(chemin, alt='', sizes='100vw', classe='', chargement='lazy', largeur_defaut=640):
+    """<picture> WebP + JPEG aux largeurs générées par `generer_images` ; image d'origine sinon"""
+    entree = variantes(chemin)
+    if entree is None:
+        try:
+            url = static(chemin)
+        except ValueError:
+            # Absente du manifeste de collectstatic : URL non hachée plutôt qu'une page en erreur
+            url = settings.STATIC_URL + chemin
+        return format_html(
+            '<img class="{}" src="{}" alt="{}" loading="{}" decoding="async" />',
+            classe, url, alt, chargement,
+        )
+
+    repli = entree['variantes'].get('jpeg') or next(iter(entree['variantes'].values()))
+    # src des navigateurs sans srcset : la plus petite variante d'au moins `largeur_defaut`
+    src = next((url for largeur, url in repli if largeur >= largeur_defaut), repli[-1][1])
+    sources = format_html_join(
+        '', '<source type="{}" srcset="{}" sizes="{}" />',
+        (
+            (TYPES_MIME[format_image], _srcset(liste), sizes)
+            for format_image, liste in entree['variantes'].items() if liste is not repli
+        ),
+    )
+    return format_html(
+        '<picture>{}<img class="{}" src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}" '
+        'loading="{}" decoding="async" /></picture>',
+        sources, classe, src, _srcset(repli), sizes, entree['largeur'], entree['hauteur'], alt, chargement,
+    )
@@ -1,3 +1,1305 @@
-from django.test import TestCase
+import asyncio
+import importlib
+import json
+import io
+import tempfile
+from pathlib import Path
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.template import Context, Template
+from django.template.loader import render_to_string
+from django.db import IntegrityError, connection, connections, transaction
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import flux, images, recherche, replique, statiques
+from .adversaires import bilan, bilans_adversaires
+from .categories import IndexCategories, reassigner
+from .classement import reconstruire
+from .exportation import exporter, lignes_matchs
+from .importation import importer, lire_lignes
+from .live import BrokerEnMemoire
+from .metriques import registre
+from .pagination import PaginateurEstime
+from .models import (
+    CategoryAge, CategoryGenre, ChampionnatCompetition, Classement, EquipeAdverse,
+    Joueur, MatchDay, MatchDayEquipeAdverse, PalmaresClub, Saison, ScoreSet
+)
+
+
+def creer_matchs(nombre, saison, championnat, equipes, debut=datetime(2024, 9, 1, tzinfo=dt_timezone.utc)):
+    """Crée `nombre` matchs joués, chacun lié à toutes les `equipes`"""
+    matchs = MatchDay.objects.bulk_create([
+        MatchDay(
+            date_rencontre=debut + timedelta(days=i),
+            lieu_rencontre='Gymnase',
+            championnat=championnat,
+            saison=saison,
+            sets_club=3,
+            sets_adverse=i % 3,
+        )
+        for i in range(nombre)
+    ])
+    MatchDayEquipeAdverse.objects.bulk_create([
+        MatchDayEquipeAdverse(match_day=match, equipe_adverse=equipe)
+        for match in matchs
+        for equipe in equipes
+    ])
+    return matchs
+
+
+class DonneesClubMixin:
+    @classmethod
+    def setUpClass(cls):
+        # Données non validées (TestCase) : une réplique ne les verrait pas
+        cls.enterClassContext(override_settings(REPLIQUE={**replique.reglages(), 'ALIAS': None}))
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.genre = CategoryGenre.objects.create(genre='F')
+        cls.age = CategoryAge.objects.create(nom='U17', age_min=15, age_max=17)
+        cls.saison = Saison.objects.create(periode='2024-2025')
+        cls.championnat = ChampionnatCompetition.objects.create(
+            nom='Championnat régional', date_champ=date(2024, 9, 1),
+            lieu_deroulement='Antananarivo', category_age=cls.age, category_genre=cls.genre,
+        )
+        cls.equipes = [
+            EquipeAdverse.objects.create(nom=f'Équipe {i}', category_genre=cls.genre, category_age=cls.age)
+            for i in range(2)
+        ]
+
+
+# ==================== CALENDRIER ====================
+
+class CalendarViewTests(DonneesClubMixin, TestCase):
+    url = reverse('club:calendar')
+
+    def setUp(self):
+        cache.clear()
+
+    def compter_requetes(self):
+        # Mesure le chemin base de données, pas le cache des pages
+        cache.clear()
+        with CaptureQueriesContext(connection) as contexte:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return len(contexte.captured_queries)
+
+    def test_nombre_de_requetes_constant(self):
+        creer_matchs(3, self.saison, self.championnat, self.equipes)
+        peu_de_matchs = self.compter_requetes()
+
+        creer_matchs(60, self.saison, self.championnat, self.equipes, debut=datetime(2023, 1, 1, tzinfo=dt_timezone.utc))
+        beaucoup_de_matchs = self.compter_requetes()
+
+        self.assertEqual(peu_de_matchs, beaucoup_de_matchs)
+
+    def test_pagination_par_curseur(self):
+        matchs = creer_matchs(45, self.saison, self.championnat, self.equipes)
+        attendus = sorted(matchs, key=lambda m: (m.date_rencontre, m.pk), reverse=True)
+
+        vus = []
+        url = self.url
+        while url:
+            response = self.client.get(url)
+            vus.extend(match.pk for match in response.context['matchs'])
+            suivante = response.context['page_suivante']
+            url = f"{self.url}{suivante}" if suivante else None
+
+        self.assertEqual(vus, [match.pk for match in attendus])
+
+    def test_curseur_invalide_renvoie_la_premiere_page(self):
+        creer_matchs(3, self.saison, self.championnat, self.equipes)
+        response = self.client.get(self.url, {'curseur': 'pas-un-curseur'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['matchs']), 3)
+
+
+# ==================== CACHE DES PAGES ====================
+
+class CachePagesTests(DonneesClubMixin, TestCase):
+    url = reverse('club:calendar')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_page_servie_depuis_le_cache_puis_invalidee(self):
+        creer_matchs(2, self.saison, self.championnat, self.equipes)
+        self.client.get(self.url)
+
+        # Ni la vue ni le validateur ETag ne touchent la base
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+        nouveau = dict(
+            date_rencontre=datetime(2025, 6, 1, tzinfo=dt_timezone.utc), lieu_rencontre='Nouveau gymnase',
+            championnat=self.championnat, saison=self.saison,
+        )
+        # La version du modèle ne change qu'à la validation de la transaction
+        with self.captureOnCommitCallbacks() as callbacks:
+            MatchDay.objects.create(**nouveau)
+            self.assertNotContains(self.client.get(self.url), 'Nouveau gymnase')
+        for callback in callbacks:
+            callback()
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Nouveau gymnase')
+
+    def test_parametres_distincts(self):
+        autre_saison = Saison.objects.create(periode='2025-2026')
+        creer_matchs(1, autre_saison, self.championnat, self.equipes)
+
+        self.assertEqual(len(self.client.get(self.url, {'saison': self.saison.pk}).context['matchs']), 0)
+        self.assertEqual(len(self.client.get(self.url, {'saison': autre_saison.pk}).context['matchs']), 1)
+
+    def test_page_categorie_invalidee_par_un_adversaire(self):
+        creer_matchs(1, self.saison, self.championnat, self.equipes)
+        url = reverse('club:matchs_by_category', args=['f', self.age.pk])
+        self.assertContains(self.client.get(url), 'Équipe 0')
+
+        self.equipes[0].nom = 'Équipe renommée'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.equipes[0].save()
+        self.assertContains(self.client.get(url), 'Équipe renommée')
+
+
+    async def test_vue_asynchrone_en_cache(self):
+        # Même parcours via ASGI : lecture, invalidation, contournement
+        await sync_to_async(creer_matchs)(1, self.saison, self.championnat, self.equipes)
+        self.assertNotContains(await self.async_client.get(self.url), 'Nouveau gymnase')
+
+        def ecrire():
+            with self.captureOnCommitCallbacks(execute=True):
+                match = MatchDay.objects.create(
+                    date_rencontre=datetime(2025, 6, 1, tzinfo=dt_timezone.utc), lieu_rencontre='Nouveau gymnase',
+                    championnat=self.championnat, saison=self.saison,
+                )
+            # Écriture sans signal : seule une page recalculée la verrait
+            MatchDay.objects.filter(pk=match.pk).update(lieu_rencontre='Gymnase déplacé')
+        await sync_to_async(ecrire)()
+        self.assertContains(await self.async_client.get(self.url), 'Gymnase déplacé')
+        await sync_to_async(MatchDay.objects.filter(lieu_rencontre='Gymnase déplacé').update)(lieu_rencontre='Autre gymnase')
+        self.assertContains(await self.async_client.get(self.url), 'Gymnase déplacé')
+
+        # Utilisateur connecté : jamais servi depuis le cache
+        await self.async_client.aforce_login(await User.objects.acreate_user('hery', password='secret'))
+        self.assertContains(await self.async_client.get(self.url), 'Autre gymnase')
+
+    @override_settings(ALLOWED_HOSTS=['club.example.com', 'miroir.example.com'])
+    def test_hote_dans_la_cle(self):
+        creer_matchs(2, self.saison, self.championnat, self.equipes)
+        url = reverse('club:api_matches')
+        for hote in ('club.example.com', 'miroir.example.com'):
+            with self.subTest(hote):
+                suivant = self.client.get(url, {'taille': 1}, HTTP_HOST=hote).json()['suivant']
+                self.assertTrue(suivant.startswith(f'http://{hote}/'))
+
+
+# ==================== GET CONDITIONNEL ====================
+
+class GetConditionnelTests(DonneesClubMixin, TestCase):
+    url = reverse('club:calendar')
+
+    def setUp(self):
+        cache.clear()
+        creer_matchs(2, self.saison, self.championnat, self.equipes)
+
+    def test_304_si_rien_na_change(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_change_apres_modification(self):
+        etag = self.client.get(self.url)['ETag']
+        match = MatchDay.objects.first()
+        match.lieu_rencontre = 'Autre gymnase'
+        with self.captureOnCommitCallbacks(execute=True):
+            match.save()
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_change_apres_suppression(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            MatchDay.objects.first().delete()
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+
+
+# ==================== API JSON ====================
+
+class ApiMatchsTests(DonneesClubMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_pagination_et_selection_des_champs(self):
+        creer_matchs(5, self.saison, self.championnat, self.equipes)
+        url = reverse('club:api_matches')
+
+        premiere = self.client.get(url, {'taille': 3, 'champs': 'id,adversaires'}).json()
+        self.assertEqual(len(premiere['resultats']), 3)
+        self.assertEqual(set(premiere['resultats'][0]), {'id', 'adversaires'})
+        self.assertEqual(len(premiere['resultats'][0]['adversaires']), 2)
+
+        seconde = self.client.get(premiere['suivant']).json()
+        self.assertEqual(len(seconde['resultats']), 2)
+        self.assertIsNone(seconde['suivant'])
+
+    def test_champ_inconnu(self):
+        response = self.client.get(reverse('club:api_matches'), {'champs': 'id,mot_de_passe'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_export_en_streaming(self):
+        creer_matchs(3, self.saison, self.championnat, self.equipes)
+        response = self.client.get(reverse('club:api_matches_export'), {'saison': self.saison.periode, 'champs': 'id,sets_club'})
+        self.assertTrue(response.streaming)
+        matchs = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(matchs), 3)
+        self.assertEqual(matchs[0]['sets_club'], 3)
+
+    async def test_export_en_streaming_sous_asgi(self):
+        # Itérateur asynchrone : sous ASGI, un générateur synchrone serait lu en entier avant l'envoi
+        await sync_to_async(creer_matchs)(3, self.saison, self.championnat, self.equipes)
+        response = await self.async_client.get(reverse('club:api_matches_export'), {'champs': 'id'})
+        self.assertTrue(response.is_async)
+        morceaux = [morceau async for morceau in response.streaming_content]
+        self.assertEqual(len(json.loads(b''.join(morceaux))), 3)
+
+
+# ==================== SCORES EN DIRECT ====================
+
+class ScoresEnDirectTests(DonneesClubMixin, TestCase):
+    async def test_message_publie_depuis_un_autre_thread(self):
+        broker = BrokerEnMemoire()
+        async with broker.abonner(42) as abonnement:
+            await asyncio.to_thread(broker.publier, 42, {'sets_club': 1})
+            self.assertEqual(await abonnement.recevoir(timeout=1), {'sets_club': 1})
+        self.assertEqual(broker.nombre_abonnes(42), 0)
+
+    async def test_flux_envoie_l_etat_courant(self):
+        match = (await sync_to_async(creer_matchs)(1, self.saison, self.championnat, self.equipes))[0]
+        response = await self.async_client.get(reverse('club:live_score', args=[match.pk]))
+        premier = await anext(aiter(response.streaming_content))
+        await response.streaming_content.aclose()
+        self.assertEqual(json.loads(premier.decode().removeprefix('data: '))['sets_club'], 3)
+
+    def test_saisie_invalide_refusee(self):
+        match = creer_matchs(1, self.saison, self.championnat, self.equipes)[0]
+        staff = User.objects.create_user('marqueur', password='x', is_staff=True)
+        self.client.force_login(staff)
+        url = reverse('club:saisir_score', args=[match.pk])
+        for donnees in ({'sets_club': '7'}, {'sets_club': '3', 'sets_adverse': '3'}):
+            with self.subTest(donnees):
+                response = self.client.post(url, donnees)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('erreur', response.json())
+        match.refresh_from_db()
+        self.assertEqual(match.sets_club, 3)
+
+    def test_flux_refuse_sous_wsgi(self):
+        match = creer_matchs(1, self.saison, self.championnat, self.equipes)[0]
+        response = self.client.get(reverse('club:live_score', args=[match.pk]))
+        self.assertEqual(response.status_code, 503)
+
+    def test_saisie_du_score_publie_apres_commit(self):
+        match = creer_matchs(1, self.saison, self.championnat, self.equipes)[0]
+        staff = User.objects.create_user('marqueur', password='x', is_staff=True)
+        self.client.force_login(staff)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(
+                reverse('club:saisir_score', args=[match.pk]), {'set1_club': '25', 'set1_adverse': '21'}
+            )
+        self.assertEqual(response.json()['sets'], [[25, 21]])
+        # Diffusion du score, fil de la catégorie (le match a commencé),
+        # puis versions du cache : bilans des adversaires et pages des matchs
+        self.assertEqual(len(callbacks), 4)
+
+
+# ==================== IMPORT ====================
+
+class ImportTests(DonneesClubMixin, TestCase):
+    def lignes(self, contenu):
+        return lire_lignes(io.StringIO(contenu), 'import.csv')
+
+    def test_import_des_matchs(self):
+        contenu = (
+            "date_rencontre;lieu;saison;championnat;adversaires;set1_club;set1_adverse;set2_club;set2_adverse;set3_club;set3_adverse\n"
+            "2024-10-05 15:00;Gymnase;2024-2025;Championnat régional;Équipe 0;25;20;25;18;25;23\n"
+            "05/10/2024 17:00;Gymnase;2024-2025;Championnat régional;\"Équipe 0; Équipe 1\";25;20;25;22;;\n"
+            "2024-10-06;Gymnase;2099-2100;Championnat régional;;;;;;;\n"
+        )
+        rapport = importer(self.lignes(contenu), 'matchs', taille_lot=1)
+
+        self.assertEqual(rapport.importees, 2)
+        self.assertEqual([numero for numero, _ in rapport.erreurs], [4])
+        self.assertEqual(MatchDayEquipeAdverse.objects.count(), 3)
+        self.assertEqual(ScoreSet.objects.count(), 5)
+        # La ligne 2 (deux sets joués) est un match en cours, hors classement
+        ligne = Classement.objects.get(saison=self.saison, championnat=self.championnat)
+        self.assertEqual((ligne.matchs_joues, ligne.victoires), (1, 1))
+
+    def test_scores_incoherents(self):
+        contenu = (
+            "date_rencontre,lieu,saison,championnat,sets_club,sets_adverse,set1_club,set1_adverse\n"
+            "2024-10-05,Gymnase,2024-2025,Championnat régional,3,0,18,25\n"
+        )
+        rapport = importer(self.lignes(contenu), 'matchs')
+        self.assertEqual(rapport.importees, 0)
+        self.assertIn('incohérents', rapport.erreurs[0][1])
+
+    def test_regles_des_sets(self):
+        entete = "date_rencontre,lieu,saison,championnat,set1_club,set1_adverse,set2_club,set2_adverse,set3_club,set3_adverse\n"
+        debut = "2024-10-05,Gymnase,2024-2025,Championnat régional,"
+        contenu = entete + debut + "25,20,25,18,10,5\n" + debut + "25,20,20,18,25,10\n" + debut + "30,20,,,,\n"
+        rapport = importer(self.lignes(contenu), 'matchs')
+        self.assertEqual(rapport.importees, 1)
+        self.assertEqual([numero for numero, _ in rapport.erreurs], [3, 4])
+        # Set 3 en cours : 2-0, comme MatchDay.deriver_sets
+        match = MatchDay.objects.get()
+        self.assertEqual((match.sets_club, match.sets_adverse, match.issue), (2, 0, MatchDay.Issue.EN_COURS))
+        match.full_clean()
+
+    def test_import_strict_annule_tout(self):
+        contenu = (
+            "nom,prenom,date_naissance,genre,categorie_age\n"
+            "Rakoto,Hery,2008-03-14,F,U17\n"
+            "Rabe,Soa,date inconnue,F,U17\n"
+            "Rasoa,Fara,date inconnue,F,U17\n"
+        )
+        rapport = importer(self.lignes(contenu), 'joueurs', taille_lot=1, strict=True)
+        self.assertEqual(rapport.importees, 0)
+        self.assertEqual(Joueur.objects.count(), 0)
+        # Arrêt à la première ligne invalide
+        self.assertEqual((rapport.lignes_lues, [numero for numero, _ in rapport.erreurs]), (2, [3]))
+
+
+class ExportTests(DonneesClubMixin, TestCase):
+    def test_export_relu_par_l_import(self):
+        creer_matchs(5, self.saison, self.championnat, self.equipes)
+        texte = ''.join(exporter(lignes_matchs(MatchDay.objects.all(), taille_lot=2), 'csv'))
+
+        MatchDay.objects.all().delete()
+        rapport = importer(lire_lignes(io.StringIO(texte), 'export.csv'), 'matchs')
+        self.assertEqual((rapport.importees, rapport.erreurs), (5, []))
+        self.assertEqual(MatchDayEquipeAdverse.objects.count(), 10)
+
+    def test_json_lines(self):
+        creer_matchs(3, self.saison, self.championnat, self.equipes)
+        lignes = list(exporter(lignes_matchs(MatchDay.objects.all(), taille_lot=2), 'jsonl'))
+        self.assertEqual(len(lignes), 3)
+        premier = json.loads(lignes[0])
+        self.assertEqual(premier['saison'], '2024-2025')
+        self.assertEqual(premier['adversaires'], 'Équipe 0; Équipe 1')
+
+    def test_action_admin(self):
+        creer_matchs(2, self.saison, self.championnat, self.equipes)
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.client.force_login(admin)
+        response = self.client.post(reverse('admin:club_matchday_changelist'), {
+            'action': 'exporter_csv',
+            '_selected_action': list(MatchDay.objects.values_list('pk', flat=True)),
+        })
+        self.assertTrue(response.streaming)
+        self.assertEqual(len(b''.join(response.streaming_content).decode().splitlines()), 3)
+
+    async def test_action_admin_sous_asgi(self):
+        await sync_to_async(creer_matchs)(2, self.saison, self.championnat, self.equipes)
+        admin = await User.objects.acreate_superuser('admin', 'admin@example.com', 'secret')
+        await self.async_client.aforce_login(admin)
+        response = await self.async_client.post(reverse('admin:club_matchday_changelist'), {
+            'action': 'exporter_jsonl',
+            '_selected_action': [pk async for pk in MatchDay.objects.values_list('pk', flat=True)],
+        })
+        self.assertTrue(response.is_async)
+        lignes = b''.join([morceau async for morceau in response.streaming_content]).decode().splitlines()
+        self.assertEqual([json.loads(ligne)['adversaires'] for ligne in lignes], ['Équipe 0; Équipe 1'] * 2)
+
+
+# ==================== RÉSULTATS STOCKÉS ====================
+
+class ClassementTests(DonneesClubMixin, TestCase):
+    compteurs = ['saison_id', 'championnat_id', 'matchs_joues', 'victoires', 'defaites', 'sets_gagnes', 'sets_perdus']
+
+    def creer(self, **scores):
+        return MatchDay.objects.create(
+            date_rencontre=datetime(2024, 10, 5, tzinfo=dt_timezone.utc), lieu_rencontre='Gymnase',
+            championnat=self.championnat, saison=self.saison, **scores
+        )
+
+    def lignes(self):
+        lignes = list(Classement.objects.order_by('saison_id', 'championnat_id').values_list(*self.compteurs))
+        # Le recalcul complet doit donner la même chose que l'incrémental
+        reconstruire()
+        self.assertEqual(list(Classement.objects.order_by('saison_id', 'championnat_id').values_list(*self.compteurs)), lignes)
+        return lignes
+
+    def test_enregistrement(self):
+        match = self.creer(sets_club=3, sets_adverse=1)
+        self.creer(sets_club=0, sets_adverse=3)
+        self.assertEqual(self.lignes(), [(self.saison.pk, self.championnat.pk, 2, 1, 1, 3, 4)])
+
+        match.sets_club, match.sets_adverse = 2, 3
+        match.save()
+        self.assertEqual(self.lignes(), [(self.saison.pk, self.championnat.pk, 2, 0, 2, 2, 6)])
+
+    def test_changement_de_saison_et_de_championnat(self):
+        autre_saison = Saison.objects.create(periode='2025-2026')
+        autre_championnat = ChampionnatCompetition.objects.create(nom='Coupe', date_champ=date(2025, 1, 1))
+        match = self.creer(sets_club=3, sets_adverse=0)
+
+        match.saison = autre_saison
+        match.save()
+        self.assertEqual(self.lignes(), [(autre_saison.pk, self.championnat.pk, 1, 1, 0, 3, 0)])
+
+        match.championnat = autre_championnat
+        match.save()
+        self.assertEqual(self.lignes(), [(autre_saison.pk, autre_championnat.pk, 1, 1, 0, 3, 0)])
+
+    def test_suppression(self):
+        match = self.creer(sets_club=3, sets_adverse=2)
+        self.creer(sets_club=1, sets_adverse=3)
+        match.delete()
+        self.assertEqual(self.lignes(), [(self.saison.pk, self.championnat.pk, 1, 0, 1, 1, 3)])
+        MatchDay.objects.all().delete()
+        self.assertEqual(self.lignes(), [])
+
+    def test_update_du_queryset(self):
+        match = self.creer()
+        autre_saison = Saison.objects.create(periode='2025-2026')
+
+        MatchDay.objects.filter(pk=match.pk).update(sets_club=3, sets_adverse=0)
+        self.assertEqual(self.lignes(), [(self.saison.pk, self.championnat.pk, 1, 1, 0, 3, 0)])
+
+        MatchDay.objects.filter(pk=match.pk).update(saison=autre_saison)
+        self.assertEqual(self.lignes(), [(autre_saison.pk, self.championnat.pk, 1, 1, 0, 3, 0)])
+
+        MatchDay.objects.get(pk=match.pk).delete()
+        self.assertEqual(Classement.objects.count(), 0)
+
+
+class ResultatStockeTests(DonneesClubMixin, TestCase):
+    def creer(self, **scores):
+        return MatchDay.objects.create(
+            date_rencontre=datetime(2024, 10, 5, tzinfo=dt_timezone.utc), lieu_rencontre='Gymnase',
+            championnat=self.championnat, saison=self.saison, **scores
+        )
+
+    def test_sets_deduits_des_sets_termines(self):
+        # Sans résultat saisi, les sets terminés font foi ; le 4e set est en cours
+        match = self.creer(
+            set1_club=25, set1_adverse=20, set2_club=23, set2_adverse=25,
+            set3_club=27, set3_adverse=25, set4_club=12, set4_adverse=10,
+        )
+        match.refresh_from_db()
+        self.assertEqual((match.sets_club, match.sets_adverse), (2, 1))
+        self.assertEqual(match.issue, MatchDay.Issue.EN_COURS)
+        self.assertEqual((match.points_club, match.points_adverse, match.ecart_points), (87, 80, 7))
+
+        match.set4_club = 25
+        match.sets_club = match.sets_adverse = None
+        match.save(update_fields=['set4_club'])
+        match.refresh_from_db()
+        self.assertEqual(match.resultat(), "✅ Victoire")
+
+    def test_resultat_saisi_conserve(self):
+        # Saisie contradictoire : le 3-0 saisi n'est pas écrasé, clean() la signale
+        match = self.creer(
+            sets_club=3, sets_adverse=0,
+            set1_club=25, set1_adverse=20, set2_club=23, set2_adverse=25,
+        )
+        match.refresh_from_db()
+        self.assertEqual((match.sets_club, match.sets_adverse), (3, 0))
+        with self.assertRaises(ValidationError):
+            match.full_clean()
+
+    def test_match_en_cours_hors_classement(self):
+        compteurs = ['matchs_joues', 'victoires', 'defaites', 'sets_gagnes', 'sets_perdus']
+        self.creer(sets_club=1, sets_adverse=3)
+        avant = Classement.objects.values(*compteurs).get()
+
+        en_cours = self.creer(sets_club=2, sets_adverse=1)
+        MatchDayEquipeAdverse.objects.create(match_day=en_cours, equipe_adverse=self.equipes[0])
+        self.assertEqual(Classement.objects.values(*compteurs).get(), avant)
+        reconstruire()
+        self.assertEqual(Classement.objects.values(*compteurs).get(), avant)
+        self.assertEqual(bilan(self.equipes[0].pk)['total']['matchs'], 0)
+
+    def test_resultat_a_verifier_hors_classement(self):
+        compteurs = ['matchs_joues', 'victoires', 'defaites']
+        self.creer(sets_club=1, sets_adverse=3)
+        avant = Classement.objects.values(*compteurs).get()
+        # Résultat hérité hors règles, conservé et marqué par la migration 0007
+        self.creer(sets_club=3, sets_adverse=3, a_verifier=True)
+        self.assertEqual(Classement.objects.values(*compteurs).get(), avant)
+        reconstruire()
+        self.assertEqual(Classement.objects.values(*compteurs).get(), avant)
+
+    def test_colonnes_a_jour_apres_update(self):
+        match = self.creer()
+        MatchDay.objects.filter(pk=match.pk).update(sets_club=1, sets_adverse=3)
+        self.assertEqual(MatchDay.objects.defaites().get().ecart_sets, -2)
+        self.assertFalse(MatchDay.objects.victoires().exists())
+
+    def test_scores_sets_suivent_les_ecritures_groupees(self):
+        match = self.creer(set1_club=25, set1_adverse=20)
+        scores = lambda: list(ScoreSet.objects.values_list('numero', 'points_club', 'points_adverse'))
+
+        MatchDay.objects.filter(pk=match.pk).update(set1_club=27, set1_adverse=25, set2_club=20, set2_adverse=25)
+        self.assertEqual(scores(), [(1, 27, 25), (2, 20, 25)])
+
+        # L'objet en mémoire a encore l'ancien set 1 : ScoreSet suit la base
+        match.set2_club = match.set2_adverse = None
+        MatchDay.objects.bulk_update([match], ['set2_club', 'set2_adverse'])
+        self.assertEqual(scores(), [(1, 27, 25)])
+
+        ScoreSet.objects.all().delete()
+        self.assertEqual(ScoreSet.objects.reconstruire(), 1)
+        self.assertEqual(scores(), [(1, 27, 25)])
+
+    def test_agregats_par_set(self):
+        scores = lambda *sets: {
+            f'set{i}_{camp}': points
+            for i, (club, adverse) in enumerate(sets, 1)
+            for camp, points in (('club', club), ('adverse', adverse))
+        }
+        # 3-2 avec tie-break, 3-0 sans 4e ni 5e set, match non joué
+        cinq_sets = self.creer(**scores((25, 20), (22, 25), (25, 23), (20, 25), (15, 13)))
+        trois_sets = self.creer(**scores((25, 15), (25, 18), (25, 10)))
+        non_joue = self.creer()
+
+        self.assertEqual(
+            [
+                tuple(ligne.values())
+                for ligne in ScoreSet.objects.statistiques_par_set().values(
+                    'numero', 'nb_sets', 'sets_gagnes', 'total_points_club', 'total_points_adverse',
+                    'moyenne_points_club', 'moyenne_points_adverse', 'moyenne_ecart',
+                )
+            ],
+            [
+                (1, 2, 2, 50, 35, 25.0, 17.5, 7.5),
+                (2, 2, 1, 47, 43, 23.5, 21.5, 2.0),
+                (3, 2, 2, 50, 33, 25.0, 16.5, 8.5),
+                (4, 1, 0, 20, 25, 20.0, 25.0, -5.0),
+                (5, 1, 1, 15, 13, 15.0, 13.0, 2.0),
+            ],
+        )
+        self.assertEqual(
+            ScoreSet.objects.scores_par_match([cinq_sets.pk, trois_sets.pk, non_joue.pk]),
+            {
+                cinq_sets.pk: [(1, 25, 20), (2, 22, 25), (3, 25, 23), (4, 20, 25), (5, 15, 13)],
+                trois_sets.pk: [(1, 25, 15), (2, 25, 18), (3, 25, 10)],
+                non_joue.pk: [],
+            },
+        )
+
+    def test_contraintes(self):
+        for scores in ({'sets_club': 3}, {'sets_club': 4, 'sets_adverse': 0},
+                       {'sets_club': 3, 'sets_adverse': 3}, {'set1_club': -1}):
+            with self.subTest(scores), self.assertRaises(IntegrityError), transaction.atomic():
+                self.creer(**scores)
+
+    def test_matchs_les_plus_serres(self):
+        large = self.creer(**{f'set{i}_{camp}': points for i in (1, 2, 3) for camp, points in (('club', 25), ('adverse', 10))})
+        serre = self.creer(**{f'set{i}_{camp}': points for i in (1, 2, 3) for camp, points in (('club', 23), ('adverse', 25))})
+        self.creer()
+        self.assertEqual(list(MatchDay.objects.plus_serres().values_list('pk', flat=True)), [serre.pk, large.pk])
+
+
+# ==================== ADMIN ====================
+
+class AdminChangelistTests(DonneesClubMixin, TestCase):
+    def setUp(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.client.force_login(admin)
+
+    def compter_requetes(self, url):
+        with CaptureQueriesContext(connection) as requetes:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(requetes)
+
+    def test_requetes_bornees(self):
+        for url_name in ('admin:club_matchday_changelist', 'admin:club_joueur_changelist'):
+            with self.subTest(url_name):
+                url = reverse(url_name)
+                creer_matchs(3, self.saison, self.championnat, self.equipes)
+                Joueur.objects.bulk_create([
+                    Joueur(nom=f'J{i}', prenom='x', date_naissance=date(2009, 1, 1), category=self.genre, category_age=self.age)
+                    for i in range(3)
+                ])
+                peu = self.compter_requetes(url)
+
+                creer_matchs(60, self.saison, self.championnat, self.equipes, debut=datetime(2023, 9, 1, tzinfo=dt_timezone.utc))
+                Joueur.objects.bulk_create([
+                    Joueur(nom=f'K{i}', prenom='x', date_naissance=date(2009, 1, 1), category=self.genre, category_age=self.age)
+                    for i in range(60)
+                ])
+                self.assertEqual(self.compter_requetes(url), peu)
+                self.assertLessEqual(peu, 10)
+
+    def test_resultat_triable(self):
+        creer_matchs(2, self.saison, self.championnat, self.equipes)
+        response = self.client.get(reverse('admin:club_matchday_changelist'), {'o': '8'})
+        self.assertContains(response, 'Victoire', count=2)
+
+
+# ==================== TABLEAU DE BORD ====================
+
+class TableauDeBordTests(DonneesClubMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.utilisateur = User.objects.create_user('hery', password='secret', first_name='Hery', last_name='Rakoto')
+        self.joueur = Joueur.objects.create(
+            nom='Rakoto', prenom='Hery', date_naissance=date(2009, 3, 14),
+            category=self.genre, category_age=self.age, utilisateur=self.utilisateur,
+        )
+        self.client.force_login(self.utilisateur)
+
+    def creer_match_a_venir(self, jours=7, championnat=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return MatchDay.objects.create(
+                date_rencontre=timezone.now() + timedelta(days=jours), lieu_rencontre='Gymnase',
+                championnat=championnat or self.championnat, saison=self.saison,
+            )
+
+    def test_profil_en_session(self):
+        match = self.creer_match_a_venir()
+        response = self.client.get(reverse('club:dashboard'))
+        self.assertEqual(response.context['joueur']['pk'], self.joueur.pk)
+        self.assertEqual([m['id'] for m in response.context['prochains_matchs']], [match.pk])
+
+        # Profil en session et fil en cache : aucune lecture des joueurs ni des matchs
+        with CaptureQueriesContext(connection) as requetes:
+            self.client.get(reverse('club:dashboard'))
+        self.assertFalse([r for r in requetes if 'FROM "joueur"' in r['sql'] or '"match_day"' in r['sql']])
+
+        # Un nouveau match rafraîchit le fil de sa catégorie
+        autre = self.creer_match_a_venir(jours=2)
+        response = self.client.get(reverse('club:dashboard'))
+        self.assertEqual([m['id'] for m in response.context['prochains_matchs']], [autre.pk, match.pk])
+
+    def test_fil_de_la_categorie(self):
+        seniors = CategoryAge.objects.create(nom='Seniors', age_min=18, age_max=99)
+        championnat_seniors = ChampionnatCompetition.objects.create(
+            nom='Championnat seniors', date_champ=date(2024, 9, 1),
+            lieu_deroulement='Antananarivo', category_age=seniors, category_genre=self.genre,
+        )
+        self.creer_match_a_venir(championnat=championnat_seniors)
+        match = self.creer_match_a_venir(jours=3)
+        with self.captureOnCommitCallbacks(execute=True):
+            match.equipes_adverses.add(self.equipes[0])
+            joue = MatchDay.objects.create(
+                date_rencontre=timezone.now() - timedelta(days=3), lieu_rencontre='Gymnase',
+                championnat=self.championnat, saison=self.saison, sets_club=3, sets_adverse=0,
+            )
+        Joueur.objects.create(nom='Rabe', prenom='Soa', date_naissance=date(2008, 1, 1), category=self.genre, category_age=self.age)
+        Joueur.objects.create(nom='Rasoa', prenom='Lova', date_naissance=date(1995, 1, 1), category=self.genre, category_age=seniors)
+
+        response = self.client.get(reverse('club:dashboard'))
+        prochains = response.context['prochains_matchs']
+        self.assertEqual([m['id'] for m in prochains], [match.pk])
+        self.assertEqual(prochains[0]['adversaires'], [self.equipes[0].nom])
+        self.assertEqual([m['id'] for m in response.context['derniers_resultats']], [joue.pk])
+        self.assertEqual([j['nom'] for j in response.context['coequipiers']], ['Rabe'])
+
+        # Match passé de catégorie : retiré du fil U17
+        with self.captureOnCommitCallbacks(execute=True):
+            match.championnat = championnat_seniors
+            match.save()
+        self.assertEqual(flux.lire(self.genre.pk, self.age.pk)['a_venir'], [])
+
+    def test_fil_ne_se_vide_pas(self):
+        with mock.patch.object(flux, 'NB_A_VENIR', 1):
+            demain = self.creer_match_a_venir(jours=1)
+            apres = self.creer_match_a_venir(jours=2)
+            self.assertEqual([m['id'] for m in flux.lire(self.genre.pk, self.age.pk)['a_venir']], [demain.pk])
+
+            # Le match stocké est passé : le fil est recalculé, pas vidé
+            plus_tard = timezone.now() + timedelta(days=1, hours=12)
+            with mock.patch('django.utils.timezone.now', return_value=plus_tard):
+                self.assertEqual([m['id'] for m in flux.lire(self.genre.pk, self.age.pk)['a_venir']], [apres.pk])
+
+    def test_liaison_des_comptes_existants(self):
+        Joueur.objects.update(utilisateur=None)
+        User.objects.create_user('homonyme1', first_name='Soa', last_name='Rabe')
+        User.objects.create_user('homonyme2', first_name='soa', last_name='RABE')
+        Joueur.objects.create(nom='Rabe', prenom='Soa', date_naissance=date(2008, 1, 1), category=self.genre)
+
+        migration = importlib.import_module('club.migrations.0008_joueur_utilisateur')
+        migration.lier_comptes(apps, None)
+
+        self.assertEqual(
+            dict(Joueur.objects.values_list('nom', 'utilisateur__username')),
+            {'Rakoto': 'hery', 'Rabe': None},
+        )
+
+
+# ==================== ADVERSAIRES ====================
+
+class BilanAdversaireTests(DonneesClubMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.matchs = creer_matchs(4, self.saison, self.championnat, [self.equipes[0]])
+        MatchDay.objects.create(
+            date_rencontre=datetime(2025, 1, 1, tzinfo=dt_timezone.utc), lieu_rencontre='Gymnase',
+            championnat=self.championnat, saison=self.saison,
+            sets_club=1, sets_adverse=3, set1_club=25, set1_adverse=20, set2_club=10, set2_adverse=25,
+        ).equipes_adverses.add(self.equipes[1])
+
+    def test_bilan_et_cache(self):
+        resultat = bilan(self.equipes[0].pk)
+        self.assertEqual(
+            [resultat['total'][cle] for cle in ('matchs', 'victoires', 'defaites', 'sets_gagnes', 'sets_perdus')],
+            [4, 4, 0, 12, 3],
+        )
+        self.assertEqual(resultat['total']['ratio_sets'], 4.0)
+        self.assertEqual([ligne['saison__periode'] for ligne in resultat['saisons']], ['2024-2025'])
+        with self.assertNumQueries(0):
+            bilan(self.equipes[0].pk)
+
+    def test_invalidation_par_adversaire(self):
+        bilan(self.equipes[0].pk)
+        bilan(self.equipes[1].pk)
+
+        match = self.matchs[0]
+        match.sets_adverse = 3
+        match.sets_club = 2
+        with self.captureOnCommitCallbacks(execute=True):
+            match.save()
+
+        with self.assertNumQueries(0):
+            bilan(self.equipes[1].pk)
+        self.assertEqual(bilan(self.equipes[0].pk)['total']['defaites'], 1)
+
+    def test_liste_des_adversaires(self):
+        with self.assertNumQueries(1):
+            lignes = bilans_adversaires()
+        self.assertEqual([(ligne['nom'], ligne['matchs'], ligne['victoires']) for ligne in lignes],
+                         [('Équipe 0', 4, 4), ('Équipe 1', 1, 0)])
+        self.assertEqual((lignes[1]['points_gagnes'], lignes[1]['points_perdus']), (35, 45))
+
+        response = self.client.get(reverse('club:adversaire', args=[self.equipes[1].pk]))
+        self.assertContains(response, 'Défaite')
+
+
+class CategoriesAgeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.u15 = CategoryAge.objects.create(nom='U15', age_min=13, age_max=14)
+        cls.u17 = CategoryAge.objects.create(nom='U17', age_min=15, age_max=16)
+        cls.senior = CategoryAge.objects.create(nom='Senior', age_min=20)
+        cls.genre = CategoryGenre.objects.create(genre='M')
+
+    def test_recherche_dans_l_index(self):
+        index = IndexCategories.charger()
+        self.assertEqual(index.categorie_id(12), None)
+        self.assertEqual(index.categorie_id(13), self.u15.pk)
+        self.assertEqual(index.categorie_id(16), self.u17.pk)
+        self.assertEqual(index.categorie_id(18), None)
+        self.assertEqual(index.categorie_id(45), self.senior.pk)
+
+    def test_tranches_qui_se_chevauchent(self):
+        with self.assertRaises(ValidationError):
+            CategoryAge(nom='U16', age_min=14, age_max=15).full_clean()
+        CategoryAge(nom='U19', age_min=17, age_max=19).full_clean()
+
+        # Données hors formulaire : l'index ne doit pas perdre les tranches englobantes
+        jeunes = CategoryAge.objects.create(nom='Jeunes', age_min=10, age_max=19)
+        index = IndexCategories.charger()
+        self.assertEqual(index.categorie_id(13), self.u15.pk)
+        self.assertEqual(index.categorie_id(18), jeunes.pk)
+        self.assertEqual(index.categorie_id(11), jeunes.pk)
+
+    def test_reassignation_en_masse(self):
+        Joueur.objects.bulk_create([
+            Joueur(nom='A', prenom='a', date_naissance=date(2010, 6, 1), category=self.genre, category_age=self.u15),
+            Joueur(nom='B', prenom='b', date_naissance=date(2008, 1, 15), category=self.genre, category_age=self.u17),
+            Joueur(nom='C', prenom='c', date_naissance=date(1990, 3, 3), category=self.genre),
+        ])
+        # Index, lecture des joueurs, un seul UPDATE (+ point de sauvegarde)
+        with self.assertNumQueries(5):
+            deplacements = reassigner(date(2025, 12, 31), taille_lot=10)
+
+        self.assertEqual(deplacements, {self.u17.pk: 1, None: 1, self.senior.pk: 1})
+        self.assertEqual(
+            dict(Joueur.objects.values_list('nom', 'category_age__nom')),
+            {'A': 'U17', 'B': None, 'C': 'Senior'},
+        )
+
+
+class AgeEnSqlTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.u17 = CategoryAge.objects.create(nom='U17', age_min=15, age_max=16)
+        cls.genre = CategoryGenre.objects.create(genre='F')
+        naissances = [date(2009, 12, 31), date(2010, 1, 1), date(2010, 6, 15), date(2011, 6, 16), date(1999, 2, 28)]
+        Joueur.objects.bulk_create([
+            Joueur(nom=f'J{i}', prenom='x', date_naissance=naissance, category=cls.genre, category_age=cls.u17)
+            for i, naissance in enumerate(naissances)
+        ])
+
+    def test_age_identique_au_calcul_python(self):
+        reference = date(2025, 6, 15)
+        for joueur in Joueur.objects.avec_age(reference):
+            attendu = reference.year - joueur.date_naissance.year - (
+                (reference.month, reference.day) < (joueur.date_naissance.month, joueur.date_naissance.day)
+            )
+            self.assertEqual(joueur.age_revolu, attendu, joueur.date_naissance)
+
+    def test_filtre_et_tranche(self):
+        reference = date(2025, 6, 15)
+        with self.assertNumQueries(1):
+            joueurs = list(
+                Joueur.objects.filter(category__genre='F').age_entre(15, 16, reference=reference)
+                .avec_tranche_age().order_by('age_revolu', 'nom')
+            )
+        self.assertEqual([j.nom for j in joueurs], ['J0', 'J1', 'J2'])
+        self.assertEqual({j.tranche_age for j in joueurs}, {'U17'})
+
+    def test_histogramme(self):
+        with self.assertNumQueries(1):
+            lignes = list(Joueur.objects.histogramme_ages(date(2025, 6, 15)))
+        self.assertEqual(
+            [(ligne['age_revolu'], ligne['nombre']) for ligne in lignes],
+            [(13, 1), (15, 3), (26, 1)],
+        )
+
+    def test_colonne_admin_triable(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.client.force_login(admin)
+        response = self.client.get(reverse('admin:club_joueur_changelist'), {'o': '4', 'tranche_age': self.u17.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['cl'].result_count, Joueur.objects.age_entre(15, 16).count())
+
+
+# ==================== JEU DE DONNÉES ET BENCHMARK ====================
+
+class SeedEtBenchmarkTests(TestCase):
+    def seed(self):
+        call_command('seed', vider=True, graine=7, saisons=2, annee=2025, matchs=30,
+                     adversaires=6, joueurs=20, stdout=io.StringIO())
+        return list(MatchDay.objects.order_by('date_rencontre', 'id').values_list(
+            'date_rencontre', 'championnat__nom', 'set1_club', 'set1_adverse', 'sets_club', 'sets_adverse'
+        ))
+
+    def test_seed_reproductible(self):
+        premier = self.seed()
+        self.assertEqual(len(premier), 60)
+        self.assertEqual(self.seed(), premier)
+        # Les sets déclarés correspondent aux scores par set
+        for match in MatchDay.objects.exclude(sets_club=None):
+            sets = (match.sets_club, match.sets_adverse)
+            match.deriver_sets()
+            self.assertEqual((match.sets_club, match.sets_adverse), sets)
+        self.assertTrue(Classement.objects.exists())
+
+    def test_benchmark_couvre_toutes_les_urls(self):
+        self.seed()
+        with tempfile.TemporaryDirectory() as dossier:
+            sortie = Path(dossier) / 'bench.json'
+            call_command('benchmark', requetes=2, sortie=str(sortie), filtre='api_', stdout=io.StringIO())
+            rapport = json.loads(sortie.read_text(encoding='utf-8'))
+
+        self.assertEqual(set(rapport['urls']), {
+            'api_matches', 'api_matches_export', 'api_matches_categorie',
+            'api_standings', 'api_palmares', 'api_saisons', 'api_recherche',
+        })
+        mesure = rapport['urls']['api_saisons']
+        self.assertEqual((mesure['statut'], mesure['requetes_sql']), (200, 1))
+        self.assertLessEqual(mesure['latence_ms']['p50'], mesure['latence_ms']['p99'])
+
+
+# ==================== MÉTRIQUES ====================
+
+class MetriquesTests(DonneesClubMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        registre.vider()
+
+    @override_settings(METRIQUES={'JETON': 'secret'})
+    def exposition(self):
+        response = self.client.get(reverse('club:metriques'), headers={'Authorization': 'Bearer secret'})
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    @override_settings(METRIQUES={'ECHANTILLONNAGE': 1.0})
+    def test_histogrammes_par_vue(self):
+        creer_matchs(3, self.saison, self.championnat, self.equipes)
+        self.client.get(reverse('club:home'))
+        self.client.get(reverse('club:home'))
+        texte = self.exposition()
+
+        self.assertIn('asi_requetes_total{statut="200",vue="club:home"} 2', texte)
+        self.assertIn('asi_requete_duree_secondes_count{vue="club:home"} 2', texte)
+        self.assertIn('asi_gabarit_duree_secondes_count{vue="club:home"} 1', texte)
+        self.assertIn('asi_cache_lectures_total{cache="pages",resultat="echec"} 1', texte)
+        self.assertIn('asi_cache_lectures_total{cache="pages",resultat="succes"} 1', texte)
+        # Vue asynchrone : les requêtes SQL exécutées via sync_to_async sont comptées
+        sql = [ligne for ligne in texte.splitlines() if ligne.startswith('asi_requete_sql_nombre_sum{vue="club:home"}')]
+        self.assertGreater(float(sql[0].split()[-1]), 0)
+
+    @override_settings(METRIQUES={'SEUIL_LENT_MS': 0})
+    def test_requetes_lentes_journalisees(self):
+        with self.assertLogs('club.metriques', 'WARNING') as journal:
+            self.client.get(reverse('club:categories_choice'))
+        evenement = json.loads(journal.records[0].getMessage())
+        self.assertEqual((evenement['vue'], evenement['statut']), ('club:categories_choice', 200))
+        self.assertGreaterEqual(evenement['sql_nombre'], 1)
+
+    @override_settings(METRIQUES={'ECHANTILLONNAGE': 0})
+    def test_sans_echantillonnage(self):
+        self.client.get(reverse('club:categories_choice'))
+        self.assertEqual(registre.exposition().strip(), '')
+
+    @override_settings(METRIQUES={'JETON': 'secret'})
+    def test_acces_restreint(self):
+        url = reverse('club:metriques')
+        # Derrière un proxy local, tous les visiteurs arrivent de 127.0.0.1
+        self.assertEqual(self.client.get(url, REMOTE_ADDR='127.0.0.1').status_code, 403)
+        self.assertEqual(self.client.get(url, headers={'Authorization': 'Bearer autre'}).status_code, 403)
+        with self.settings(METRIQUES={'IPS_AUTORISEES': ['10.0.0.5']}):
+            self.assertEqual(self.client.get(url, REMOTE_ADDR='10.0.0.5').status_code, 200)
+
+
+# ==================== GABARITS ====================
+
+class FragmentsVersionnesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_fragment_invalide_par_le_modele(self):
+        gabarit = Template(
+            "{% load fragments %}{% fragment_versionne 'liste' 'club.CategoryAge' selon genre %}"
+            "{% for categorie in categories %}{{ categorie.nom }} {{ genre }};{% endfor %}{% fin_fragment_versionne %}"
+        )
+        CategoryAge.objects.create(nom='U15', age_min=13, age_max=14)
+        contexte = lambda: Context({'categories': CategoryAge.objects.order_by('nom'), 'genre': 'F'})
+
+        self.assertEqual(gabarit.render(contexte()), 'U15 F;')
+        CategoryAge.objects.update(nom='Modifié')  # sans signal : le fragment reste en cache
+        with self.assertNumQueries(0):
+            self.assertEqual(gabarit.render(contexte()), 'U15 F;')
+        # « selon » : une autre valeur est un autre fragment
+        self.assertEqual(gabarit.render(Context({'categories': CategoryAge.objects.all(), 'genre': 'M'})), 'Modifié M;')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            CategoryAge.objects.create(nom='U13', age_min=11, age_max=12)
+        self.assertEqual(gabarit.render(contexte()), 'Modifié F;U13 F;')
+
+    def test_navigation_selon_la_connexion(self):
+        self.client.get(reverse('club:categories_choice'))
+        User.objects.create_user('membre', password='x')
+        self.client.login(username='membre', password='x')
+        response = self.client.get(reverse('club:contact'))
+        self.assertContains(response, 'Dashboard')
+        self.assertNotContains(response, 'Join Today')
+
+
+# ==================== FICHIERS STATIQUES ====================
+
+class StatiquesTests(TestCase):
+    def test_purge_et_minification(self):
+        css = """
+        @charset "UTF-8";
+        /* commentaire */
+        .utilisee, .absente { color : red ;  margin: 0 , 1px }
+        .absente > a { color: blue }
+        a:not(.absente) { content: "a  b" }
+        @media (min-width: 768px) { .absente { color: red } }
+        @media (min-width: 992px) { #menu .utilisee { padding: 0 } }
+        @keyframes clignote { from { opacity: 0 } to { opacity: 1 } }
+        """
+        self.assertEqual(
+            statiques.purger_css(css, {'utilisee', 'menu'}),
+            '@charset "UTF-8";.utilisee{color:red;margin:0,1px}a:not(.absente){content:"a  b"}'
+            '@media (min-width:992px){#menu .utilisee{padding:0}}'
+            '@keyframes clignote{from { opacity: 0 } to { opacity: 1 }}',
+        )
+
+    def test_minification_js(self):
+        js = "// Scripts\n/* bloc */\nwindow.addEventListener('load', () => {\n    // commentaire\n    go('http://x');\n});\n"
+        self.assertEqual(statiques.minifier_js(js), "window.addEventListener('load', () => {\ngo('http://x');\n});\n")
+
+    def test_collectstatic(self):
+        source = Path(apps.get_app_config('club').path) / 'static' / 'css' / 'agency.css'
+        with tempfile.TemporaryDirectory() as dossier, override_settings(
+            STATIC_ROOT=dossier,
+            STORAGES={**settings.STORAGES, 'staticfiles': {'BACKEND': 'club.statiques.StockageStatiques'}},
+        ):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            manifeste = json.loads((Path(dossier) / 'staticfiles.json').read_text())['paths']
+            agency = Path(dossier) / manifeste['css/agency.css']
+            self.assertRegex(agency.name, r'^agency\.[0-9a-f]{12}\.css$')
+            self.assertLess(agency.stat().st_size, source.stat().st_size / 3)
+            self.assertTrue(Path(f'{agency}.gz').exists())
+            self.assertIn('navbar-shrink', agency.read_text())
+            self.assertIn('css/agency.critique.css', manifeste)
+
+            # CSS critique lue dans le fichier construit
+            statiques.css_critique.cache_clear()
+            with override_settings(DEBUG=False):
+                html = render_to_string('index.html')
+            statiques.css_critique.cache_clear()
+        critique = html.split('<style>')[1].split('</style>')[0]
+        self.assertIn('.masthead{', critique)
+        self.assertNotIn('.timeline', critique)
+        self.assertIn(f'href="/static/{manifeste["css/agency.css"]}" as="style"', html)
+
+
+class ImagesResponsivesTests(TestCase):
+    gabarit = Template(
+        "{% load statiques %}{% image_responsive 'assets/img/portfolio/1.jpg' alt='Match' classe='img-fluid' sizes='50vw' %}"
+    )
+
+    def setUp(self):
+        dossier = tempfile.TemporaryDirectory()
+        self.addCleanup(dossier.cleanup)
+        reglage = override_settings(MEDIA_ROOT=dossier.name, MEDIA_URL='/media/')
+        reglage.enable()
+        self.addCleanup(reglage.disable)
+        self.medias = Path(dossier.name)
+
+    def test_image_non_traitee(self):
+        html = self.gabarit.render(Context())
+        self.assertEqual(
+            html,
+            '<img class="img-fluid" src="/static/assets/img/portfolio/1.jpg" alt="Match" loading="lazy" decoding="async" />',
+        )
+
+    def test_srcset_depuis_le_manifeste(self):
+        (self.medias / 'derives').mkdir()
+        (self.medias / images.MANIFESTE).write_text(json.dumps({'assets/img/portfolio/1.jpg': {
+            'empreinte': 'abc', 'largeur': 800, 'hauteur': 600,
+            'variantes': {
+                'webp': [[320, 'derives/abc/1-320.webp'], [800, 'derives/abc/1-800.webp']],
+                'jpeg': [[320, 'derives/abc/1-320.jpg'], [800, 'derives/abc/1-800.jpg']],
+            },
+        }}))
+        html = self.gabarit.render(Context())
+        self.assertIn(
+            '<source type="image/webp" srcset="/media/derives/abc/1-320.webp 320w, /media/derives/abc/1-800.webp 800w" sizes="50vw" />',
+            html,
+        )
+        self.assertIn('src="/media/derives/abc/1-800.jpg" srcset="/media/derives/abc/1-320.jpg 320w, /media/derives/abc/1-800.jpg 800w"', html)
+        self.assertIn('width="800" height="600" alt="Match" loading="lazy"', html)
+
+    @skipUnless(images.Image is not None, "Pillow n'est pas installé")
+    def test_generation_des_variantes(self):
+        source = self.medias / 'photo.jpg'
+        images.Image.new('RGB', (1000, 500), 'green').save(source)
+        reglages_images = {**images.REGLAGES_DEFAUT, 'LARGEURS': [320, 640, 1280]}
+
+        entree = images.generer(source, self.medias / 'derives', reglages_images)
+        self.assertEqual([largeur for largeur, _ in entree['variantes']['webp']], [320, 640, 1000])
+        variante = self.medias / entree['variantes']['jpeg'][0][1]
+        with images.Image.open(variante) as image:
+            self.assertEqual(image.size, (320, 160))
+
+        # Source inchangée : rien n'est réécrit
+        date_ecriture = variante.stat().st_mtime_ns
+        images.generer(source, self.medias / 'derives', reglages_images)
+        self.assertEqual(variante.stat().st_mtime_ns, date_ecriture)
+
+
+# ==================== RECHERCHE ====================
+
+class RechercheTests(DonneesClubMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.joueuse = Joueur.objects.create(
+            nom='Rakotomalala', prenom='Éléonore', date_naissance=date(2008, 5, 1),
+            category=cls.genre, category_age=cls.age,
+        )
+        Joueur.objects.create(nom='Andria', prenom='Aina', date_naissance=date(2008, 5, 1), category=cls.genre)
+        PalmaresClub.objects.create(titre='Champion de Madagascar', competition='Coupe nationale', annee=2019, category=cls.genre)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_sans_accents_et_par_prefixe(self):
+        resultats = recherche.rechercher('eleonore RAKO')
+        self.assertEqual([(r['type'], r['id']) for r in resultats], [('joueur', self.joueuse.pk)])
+        self.assertEqual(resultats[0]['libelle'], 'Éléonore Rakotomalala')
+
+        types = {r['type'] for r in recherche.rechercher('champion')}
+        self.assertEqual(types, {'championnat', 'palmares'})
+        self.assertEqual(recherche.rechercher('!!'), [])
+
+    def test_vecteur_mis_a_jour_a_l_ecriture(self):
+        self.equipes[0].nom = 'Mahajanga Volley'
+        self.equipes[0].save()
+        resultats = recherche.rechercher('mahajanga', types=['adversaire'])
+        self.assertEqual(resultats[0]['url'], reverse('club:adversaire', args=[self.equipes[0].pk]))
+
+    def test_tolerance_aux_fautes(self):
+        if not recherche.trigrammes_disponibles():
+            self.skipTest("Extension pg_trgm non installée")
+        self.assertEqual(recherche.rechercher('rakotomalla')[0]['id'], self.joueuse.pk)
+
+    def test_api(self):
+        url = reverse('club:api_recherche')
+        resultats = self.client.get(url, {'q': 'equipe', 'types': 'adversaire', 'limite': 1}).json()['resultats']
+        self.assertEqual(len(resultats), 1)
+        self.assertEqual(resultats[0]['type'], 'adversaire')
+
+        self.assertEqual(self.client.get(url, {'q': 'e'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'q': 'equipe', 'types': 'utilisateur'}).status_code, 400)
+
+    def test_page_publique(self):
+        response = self.client.get(reverse('club:recherche'), {'q': 'madagascar'})
+        self.assertContains(response, 'Champion de Madagascar')
+
+    def test_admin(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'secret'))
+        response = self.client.get(reverse('admin:club_joueur_changelist'), {'q': 'éleonore'})
+        self.assertContains(response, 'Rakotomalala')
+        self.assertNotContains(response, 'Andria')
+
+    def test_index_plein_texte(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = recherche.filtrer(Joueur.objects.all(), 'rakoto').explain()
+        self.assertIn('joueur_recherche_idx', plan)
+
+
+# ==================== RÉPLIQUE ====================
+
+def _alias_des_lectures(request):
+    routeur = replique.RouteurReplique()
+    return routeur.db_for_read(MatchDay), routeur.db_for_read(User)
+
+
+class SansRepliqueTests(DonneesClubMixin, TestCase):
+    def test_tout_reste_sur_le_primaire(self):
+        vue = replique.lecture_replique(_alias_des_lectures)
+        self.assertEqual(vue(RequestFactory().get('/')), (None, None))
+        response = self.client.post(reverse('admin:login'), {'username': 'x', 'password': 'y'})
+        self.assertNotIn(replique.reglages()['COOKIE'], response.cookies)
+
+
+@skipUnless(replique.replique_active(), "Lancer avec un alias 'replica' (ASI_DB_REPLIQUE_HOST)")
+class RepliqueTests(TransactionTestCase):
+    """Le miroir de test est une autre connexion : il ne voit que les données validées"""
+    databases = '__all__'
+
+    def setUp(self):
+        self.genre = CategoryGenre.objects.create(genre='F')
+        cache.clear()  # oublie l'écriture ci-dessus
+        self.vue = replique.lecture_replique(_alias_des_lectures)
+        self.alias = replique.reglages()['ALIAS']
+
+    def test_pages_publiques_sur_la_replique(self):
+        self.assertEqual(self.vue(RequestFactory().get('/')), (self.alias, None))
+        PalmaresClub.objects.bulk_create([PalmaresClub(titre='Champion', competition='Coupe', annee=2020, category=self.genre)])
+        with CaptureQueriesContext(connections[self.alias]) as requetes:
+            response = self.client.get(reverse('club:historique'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(any('palmares_club' in requete['sql'] for requete in requetes))
+
+    def test_primaire_apres_un_post(self):
+        response = self.client.post(reverse('admin:login'), {'username': 'x', 'password': 'y'})
+        cookie = replique.reglages()['COOKIE']
+        self.assertIn(cookie, response.cookies)
+
+        requete = RequestFactory().get('/')
+        requete.COOKIES[cookie] = '1'
+        self.assertEqual(self.vue(requete), (None, None))
+
+    def test_primaire_apres_une_ecriture(self):
+        PalmaresClub.objects.create(titre='Champion', competition='Coupe', annee=2020, category=self.genre)
+        self.assertEqual(self.vue(RequestFactory().get('/')), (None, None))
+
+
+# ==================== INDEX ====================
+
+@skipUnless(connection.vendor == 'postgresql', "EXPLAIN spécifique à PostgreSQL")
+class PlansDeRequeteTests(TestCase):
+    """Vérifie que les requêtes chaudes passent par les index de MatchDay/ChampionnatCompetition"""
+
+    @classmethod
+    def setUpTestData(cls):
+        genres = [CategoryGenre.objects.create(genre=g) for g in ('M', 'F')]
+        ages = [CategoryAge.objects.create(nom=f'U{n}', age_min=n - 2, age_max=n) for n in (13, 15, 17, 19, 21)]
+        cls.saisons = [Saison.objects.create(periode=f'{annee}-{annee + 1}') for annee in range(2015, 2025)]
+        championnats = ChampionnatCompetition.objects.bulk_create([
+            ChampionnatCompetition(
+                nom=f'Championnat {i}', date_champ=date(2015 + i % 10, 9, 1), lieu_deroulement='Antananarivo',
+                category_age=ages[i % len(ages)], category_genre=genres[i % len(genres)],
+            )
+            for i in range(200)
+        ])
+        cls.age, cls.genre = ages[0], genres[0]
+
+        maintenant = timezone.now()
+        MatchDay.objects.bulk_create([
+            MatchDay(
+                date_rencontre=maintenant - timedelta(hours=i),
+                lieu_rencontre='Gymnase',
+                championnat=championnats[i % len(championnats)],
+                saison=cls.saisons[i % len(cls.saisons)],
+                sets_club=3,
+                sets_adverse=i % 3,
+            )
+            for i in range(20000)
+        ] + [
+            MatchDay(
+                date_rencontre=maintenant + timedelta(days=i + 1),
+                lieu_rencontre='Gymnase',
+                championnat=championnats[i % len(championnats)],
+                saison=cls.saisons[-1],
+            )
+            for i in range(50)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE match_day')
+            cursor.execute('ANALYZE championnat_competition')
+
+    def assertUtiliseIndex(self, queryset, nom_index):
+        # Sur un jeu de test, un parcours séquentiel peut rester moins cher :
+        # on le désactive pour vérifier que l'index couvre bien la requête.
+        # random_page_cost = 1.1 : réglage habituel sur SSD, qui évite les
+        # arbitrages instables entre deux index sur les petites tables.
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('SET LOCAL random_page_cost = 1.1')
+        plan = queryset.explain()
+        self.assertIn(nom_index, plan)
+
+    def test_prochains_matchs(self):
+        self.assertUtiliseIndex(MatchDay.objects.a_venir()[:5], 'match_day_a_venir_idx')
+
+    def test_calendrier_par_saison(self):
+        queryset = MatchDay.objects.filter(saison=self.saisons[3]).order_by('-date_rencontre', '-id')[:21]
+        self.assertUtiliseIndex(queryset, 'match_day_saison_date_idx')
+
+    def test_calendrier_complet(self):
+        queryset = MatchDay.objects.order_by('-date_rencontre', '-id')[:21]
+        self.assertUtiliseIndex(queryset, 'match_day_date_idx')
+
+    def test_matchs_par_categorie(self):
+        queryset = MatchDay.objects.par_categorie(self.age, self.genre).order_by('-date_rencontre')
+        self.assertUtiliseIndex(queryset, 'championnat_categories_idx')
+
+    def test_nombre_estime_sans_count(self):
+        paginateur = PaginateurEstime(MatchDay.objects.all(), 100)
+        with CaptureQueriesContext(connection) as requetes:
+            total = paginateur.count
+        self.assertAlmostEqual(total, 20050, delta=500)
+        self.assertNotIn('COUNT(', requetes[0]['sql'])
+
+        filtre = PaginateurEstime(MatchDay.objects.filter(saison=self.saisons[0]), 100)
+        self.assertEqual(filtre.count, MatchDay.objects.filter(saison=self.saisons[0]).count())
@@ -1,7 +1,7 @@
     # Ajoutez d'autres URLs ici selon vos besoins
 
 from django.urls import path
-from . import views
+from . import api, views
 
 app_name = 'club'
 
@@ -23,7 +23,30 @@ urlpatterns = [
     path('categories/', views.categories_choice, name='categories_choice'),
     path('matchs/<str:genre>/<int:age_id>/', views.matchs_by_category, name='matchs_by_category'),
     
+    # Bilans face aux adversaires
+    path('adversaires/', views.adversaires, name='adversaires'),
+    path('adversaires/<int:equipe_id>/', views.adversaire, name='adversaire'),
+    
     # Historique
     path('historique/', views.historique, name='historique'),
+
+    # Recherche
+    path('recherche/', views.recherche, name='recherche'),
+    
+    # Scores en direct
+    path('matchs/<int:match_id>/live/', views.live_score, name='live_score'),
+    path('matchs/<int:match_id>/score/', views.saisir_score, name='saisir_score'),
+    
+    # Métriques (Prometheus)
+    path('metrics/', views.metriques, name='metriques'),
+    
+    # API JSON (lecture seule)
+    path('api/v1/matches/', api.matchs, name='api_matches'),
+    path('api/v1/matches/export/', api.export_matchs, name='api_matches_export'),
+    path('api/v1/matches/<str:genre>/<int:age_id>/', api.matchs_par_categorie, name='api_matches_categorie'),
+    path('api/v1/standings/', api.classement, name='api_standings'),
+    path('api/v1/palmares/', api.palmares, name='api_palmares'),
+    path('api/v1/saisons/', api.saisons, name='api_saisons'),
+    path('api/v1/recherche/', api.recherche, name='api_recherche'),
     # Ajoutez vos autres URLs ici
 ]
\ No newline at end of file
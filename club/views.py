@@ -1,37 +1,75 @@
-from django.shortcuts import render, get_object_or_404, redirect
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+
+from django.shortcuts import render, get_object_or_404, aget_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import login, logout, authenticate
 from django.contrib import messages
-from django.utils import timezone
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_POST
 from .models import (
     MatchDay, ChampionnatCompetition, Saison, EquipeAdverse,
-    Joueur, PalmaresClub, CategoryAge, CategoryGenre
+    Joueur, PalmaresClub, CategoryAge, CategoryGenre, MatchDayEquipeAdverse
 )
+from . import adversaires as bilans
+from . import flux
+from . import recherche as moteur_recherche
+from .cache import mise_en_cache
+from .conditionnel import reponse_conditionnelle
+from .live import get_broker, message_score
+from .metriques import registre, reglages
+from .pagination import apaginer_par_curseur
+from .profils import profil_session
+from .replique import lecture_replique
+
+TAILLE_PAGE_CALENDRIER = 20
+INTERVALLE_PING_SSE = 15
 
 # ============================================
 # PAGES PUBLIQUES (sans authentification)
 # ============================================
+# Vues asynchrones (ORM asynchrone) : sous asi_club.asgi elles ne
+# mobilisent pas de thread du pool pendant les requêtes SQL.
 
-def home(request):
+async def _liste(queryset):
+    return [element async for element in queryset]
+
+async def _arender(request, template, context):
+    """render() pour une vue asynchrone : charge l'utilisateur avant le gabarit"""
+    # Sans cela, {{ user }} dans base.html ferait une requête synchrone
+    request.user = await request.auser()
+    return render(request, template, context)
+
+@lecture_replique
+@mise_en_cache([MatchDay, PalmaresClub, ChampionnatCompetition, CategoryGenre])
+async def home(request):
     """Page d'accueil"""
-    derniers_matchs = MatchDay.objects.all().order_by('-date_rencontre')[:3]
-    palmares = PalmaresClub.objects.all().order_by('-annee')[:5]
+    derniers_matchs, palmares = await asyncio.gather(
+        _liste(MatchDay.objects.select_related('championnat').order_by('-date_rencontre')[:3]),
+        _liste(PalmaresClub.objects.order_by('-annee')[:5]),
+    )
     
     context = {
         'derniers_matchs': derniers_matchs,
         'palmares': palmares,
     }
-    return render(request, 'home.html', context)
+    return await _arender(request, 'home.html', context)
 
 def about(request):
     """Page À propos"""
     return render(request, 'about.html')
 
-def calendar_view(request):
-    """Calendrier des matchs"""
-    matchs = MatchDay.objects.all().order_by('-date_rencontre')
-    
-    # Filtres optionnels
+MODELES_CALENDRIER = [
+    MatchDay, Saison, CategoryGenre, ChampionnatCompetition, EquipeAdverse, MatchDayEquipeAdverse
+]
+
+def _filtrer_calendrier(matchs, request):
+    """Filtres optionnels du calendrier (saison, genre)"""
     saison_id = request.GET.get('saison')
     genre_id = request.GET.get('genre')
     
@@ -39,13 +77,35 @@ def calendar_view(request):
         matchs = matchs.filter(saison_id=saison_id)
     if genre_id:
         matchs = matchs.filter(championnat__category_genre_id=genre_id)
+    return matchs
+
+PARAMETRES_CALENDRIER = ['saison', 'genre', 'curseur']
+
+@lecture_replique
+@reponse_conditionnelle(MODELES_CALENDRIER, parametres=PARAMETRES_CALENDRIER)
+@mise_en_cache(MODELES_CALENDRIER, parametres=PARAMETRES_CALENDRIER)
+async def calendar_view(request):
+    """Calendrier des matchs (pagination par curseur sur date_rencontre, id)"""
+    matchs = _filtrer_calendrier(
+        MatchDay.objects.select_related('championnat', 'saison').prefetch_related('equipes_adverses'),
+        request
+    )
+    
+    page = await apaginer_par_curseur(matchs, request.GET.get('curseur'), TAILLE_PAGE_CALENDRIER)
+    
+    page_suivante = None
+    if page.a_suivante:
+        params = request.GET.copy()
+        params['curseur'] = page.curseur_suivant
+        page_suivante = f"?{params.urlencode()}"
     
     context = {
-        'matchs': matchs,
-        'saisons': Saison.objects.all(),
-        'genres': CategoryGenre.objects.all(),
+        'matchs': page,
+        'page_suivante': page_suivante,
+        'saisons': await _liste(Saison.objects.all()),
+        'genres': await _liste(CategoryGenre.objects.all()),
     }
-    return render(request, 'calendar.html', context)
+    return await _arender(request, 'calendar.html', context)
 
 def contact(request):
     """Page Contact"""
@@ -101,17 +161,19 @@ def signup_view(request):
 
 @login_required
 def dashboard(request):
-    """Tableau de bord membre"""
-    joueur = Joueur.objects.filter(
-        nom__iexact=request.user.last_name,
-        prenom__iexact=request.user.first_name
-    ).first()
+    """Tableau de bord membre : profil en session, matchs lus dans le fil précalculé de sa catégorie"""
+    profil = profil_session(request)
+    joueur = profil['joueur']
+    if joueur is None:
+        fil = flux.lire()
+    else:
+        fil = flux.lire(joueur['category_id'], joueur['category_age_id'])
     
     context = {
         'joueur': joueur,
-        'prochains_matchs': MatchDay.objects.filter(
-            date_rencontre__gte=timezone.now()
-        ).order_by('date_rencontre')[:5]
+        'coequipiers': profil['coequipiers'],
+        'prochains_matchs': fil['a_venir'],
+        'derniers_resultats': fil['resultats'],
     }
     return render(request, 'dashboard.html', context)
 
@@ -119,43 +181,187 @@ def dashboard(request):
 # PAGES DE SÉLECTION DE CATÉGORIES
 # ============================================
 
-def categories_choice(request):
+@mise_en_cache([CategoryAge, CategoryGenre])
+async def categories_choice(request):
     """Page de choix des catégories"""
-    categories_age = CategoryAge.objects.all().order_by('age_min')
-    categories_genre = CategoryGenre.objects.all()
+    categories_age, categories_genre = await asyncio.gather(
+        _liste(CategoryAge.objects.all().order_by('age_min')),
+        _liste(CategoryGenre.objects.all()),
+    )
     
     context = {
         'categories_age': categories_age,
         'categories_genre': categories_genre,
     }
-    return render(request, 'categories_choice.html', context)
+    return await _arender(request, 'club/categories_choice.html', context)
 
-def matchs_by_category(request, genre, age_id):
+# Comme le calendrier : la page affiche aussi les adversaires et la saison des matchs
+MODELES_CATEGORIE = [
+    MatchDay, Saison, CategoryAge, CategoryGenre, ChampionnatCompetition, EquipeAdverse, MatchDayEquipeAdverse
+]
+
+@lecture_replique
+@reponse_conditionnelle(MODELES_CATEGORIE)
+@mise_en_cache(MODELES_CATEGORIE)
+async def matchs_by_category(request, genre, age_id):
     """Affiche les matchs d'une catégorie spécifique"""
-    category_age = get_object_or_404(CategoryAge, id=age_id)
-    category_genre = get_object_or_404(CategoryGenre, genre=genre.upper())
+    category_age = await aget_object_or_404(CategoryAge, id=age_id)
+    category_genre = await aget_object_or_404(CategoryGenre, genre=genre.upper())
     
-    matchs = MatchDay.objects.filter(
-        championnat__category_age=category_age,
-        championnat__category_genre=category_genre
-    ).order_by('-date_rencontre')
+    matchs = await _liste(
+        MatchDay.objects.par_categorie(category_age, category_genre)
+        .select_related('championnat', 'saison')
+        .prefetch_related('equipes_adverses')
+        .order_by('-date_rencontre')
+    )
     
     context = {
         'category_age': category_age,
         'category_genre': category_genre,
         'matchs': matchs,
     }
-    return render(request, 'matchs_by_category.html', context)
+    return await _arender(request, 'matchs_by_category.html', context)
+
+# ============================================
+# ADVERSAIRES
+# ============================================
+
+@mise_en_cache([MatchDay, MatchDayEquipeAdverse, EquipeAdverse])
+async def adversaires(request):
+    """Bilan global face à chaque adversaire"""
+    context = {
+        'bilans': await sync_to_async(bilans.bilans_adversaires)(),
+    }
+    return await _arender(request, 'adversaires.html', context)
+
+async def adversaire(request, equipe_id):
+    """Face à face contre un adversaire (bilan mis en cache par adversaire)"""
+    equipe = await aget_object_or_404(EquipeAdverse, id=equipe_id)
+    
+    context = {
+        'equipe': equipe,
+        'bilan': await sync_to_async(bilans.bilan)(equipe.pk),
+    }
+    return await _arender(request, 'adversaire.html', context)
 
 # ============================================
 # HISTORIQUES
 # ============================================
 
-def historique(request):
+MODELES_HISTORIQUE = [PalmaresClub, CategoryGenre]
+
+@lecture_replique
+@reponse_conditionnelle(MODELES_HISTORIQUE)
+@mise_en_cache(MODELES_HISTORIQUE)
+async def historique(request):
     """Page historique du club"""
-    palmares = PalmaresClub.objects.all().order_by('-annee')
+    palmares = await _liste(PalmaresClub.objects.select_related('category').order_by('-annee'))
     
     context = {
         'palmares': palmares,
     }
-    return render(request, 'historique.html', context)
\ No newline at end of file
+    return await _arender(request, 'historique.html', context)
+
+# ============================================
+# RECHERCHE
+# ============================================
+
+@mise_en_cache(moteur_recherche.MODELES + [CategoryAge], parametres=['q'])
+async def recherche(request):
+    """Recherche classée dans les joueurs, adversaires, championnats et palmarès"""
+    texte = request.GET.get('q', '').strip()
+    resultats = []
+    if len(texte) >= moteur_recherche.LONGUEUR_MIN:
+        resultats = await sync_to_async(moteur_recherche.rechercher)(texte)
+
+    context = {
+        'q': texte,
+        'longueur_min': moteur_recherche.LONGUEUR_MIN,
+        'resultats': resultats,
+    }
+    return await _arender(request, 'recherche.html', context)
+
+# ============================================
+# SCORES EN DIRECT
+# ============================================
+
+def _evenement_sse(message):
+    return f"data: {json.dumps(message)}\n\n"
+
+async def live_score(request, match_id):
+    """Flux Server-Sent Events des scores d'un match (ASGI uniquement)"""
+    if not isinstance(request, ASGIRequest):
+        # Sous WSGI, chaque spectateur bloquerait un worker pendant tout le match
+        return JsonResponse(
+            {'erreur': "Scores en direct indisponibles : le serveur ne tourne pas sous ASGI"}, status=503
+        )
+    if not await MatchDay.objects.filter(pk=match_id).aexists():
+        raise Http404("Match introuvable")
+    
+    async def evenements():
+        async with get_broker().abonner(match_id) as abonnement:
+            # État lu après l'abonnement : un score enregistré entre les deux
+            # n'est pas perdu (au pire, il est envoyé deux fois)
+            match = await MatchDay.objects.filter(pk=match_id).afirst()
+            if match is None:
+                return
+            yield _evenement_sse(message_score(match))
+            while True:
+                message = await abonnement.recevoir(timeout=INTERVALLE_PING_SSE)
+                # Commentaire SSE : garde la connexion ouverte à travers les proxys
+                yield _evenement_sse(message) if message is not None else ": ping\n\n"
+    
+    response = StreamingHttpResponse(evenements(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+@staff_member_required
+@require_POST
+def saisir_score(request, match_id):
+    """Saisie des scores d'un match par un marqueur (diffusés via live_score)"""
+    match = get_object_or_404(MatchDay, pk=match_id)
+    champs = ['sets_club', 'sets_adverse'] + [
+        f'set{i}_{camp}' for i in range(1, 6) for camp in ('club', 'adverse')
+    ]
+    
+    modifies = []
+    for champ in champs:
+        if champ not in request.POST:
+            continue
+        valeur = request.POST[champ].strip()
+        if valeur and not valeur.isdigit():
+            return JsonResponse({'erreur': f"Valeur invalide pour {champ}"}, status=400)
+        setattr(match, champ, int(valeur) if valeur else None)
+        modifies.append(champ)
+    
+    if modifies and not {'sets_club', 'sets_adverse'} & set(modifies):
+        # Scores de sets seuls : le résultat est redéduit des sets terminés
+        match.sets_club = match.sets_adverse = None
+        modifies += ['sets_club', 'sets_adverse']
+    if modifies:
+        try:
+            # Contraintes de la base comprises : une erreur de saisie donne un 400, pas un 500
+            match.full_clean()
+        except ValidationError as erreur:
+            return JsonResponse({'erreur': ' '.join(erreur.messages)}, status=400)
+        match.save(update_fields=modifies)
+    return JsonResponse(message_score(match))
+
+# ============================================
+# MÉTRIQUES (format Prometheus)
+# ============================================
+
+def _acces_metriques(request):
+    if request.user.is_staff:
+        return True
+    jeton = reglages()['JETON']
+    if jeton and request.headers.get('Authorization') == f'Bearer {jeton}':
+        return True
+    return request.META.get('REMOTE_ADDR') in reglages()['IPS_AUTORISEES']
+
+def metriques(request):
+    """Histogrammes du processus : latence, SQL, gabarits et cache par vue"""
+    if not _acces_metriques(request):
+        return HttpResponse(status=403)
+    return HttpResponse(registre.exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')